@@ -1,83 +1,261 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
+import types
+
+import qtutils
+import utils
+from PyQt5 import QtGui
+
 import wconfig
 import wconstants
 
-config = wconfig.read_settings_file(fallback=False)
-firstInstall = False
-if config is None:
-    config = wconfig.reset_settings_file()
-    firstInstall = True
-
-section = "General"
-dispSize = int(config[section]["Resolution"][0]), int(config["General"]["Resolution"][1])
-lang = config[section]["Language"]
-disp_units = wconstants.AVAIL_UNITS[config[section]["Units"]]
-
-section = "Texts"
-texts = config[section][lang]
-lang_code = texts["Code"]
-locale = texts["Locale"]
-
-section = "Appearance"
-setAsWallpaper = config[section]["Wallpaper"] == "True"
-clockMode = config[section]["Clock_mode"] == "True"
-showBkg = config[section]["Show_background"] == "True"
-bkgMode = config[section]["Background_mode"]
-iconSet = wconstants.AVAIL_ICONSET[config[section]["Icon_set"]]
-wsource = wconstants.WEATHER_1
-moonMode = config[section]["Moon_position"]
-newsMode = config[section]["News_mode"]
-showSunSigns = config[section]["Show_Constellations"] == "True"
-
-section = "Background"
-if showBkg and bkgMode in (wconstants.BKG_WEATHER, wconstants.BKG_FIXED):
-    subsection = "With_Background"
-else:
-    subsection = "Without_Background"
-dimBkg = config[section][subsection]["Dim_background"] == "True"
-outline = config[section][subsection]["Outline_mode"]
-dimFactor = config[section][subsection]["Dim_factor"]
-dimForecasts = config[section][subsection]["Dim_forecasts"] == "True"
-
-# Other
-dispRatio = float(dispSize[0]) / float(dispSize[1])
-timeout = 20
-debug = False
-
-
-section = "Colors"
-if showBkg and bkgMode == wconstants.BKG_WEATHER:
-    subsection = "With_Background"
-else:
-    subsection = "Without_Background"
-cBkg = config[section]["Color_Background"]
-nBkg = config[section]["Color_News_background"] if showBkg else "transparent"
-clockc = config[section][subsection]["Color_Clock"]
-clockh = config[section][subsection]["Color_Header"]
-nc = config[section][subsection]["Color_News"]
-wc = config[section][subsection]["Color_Weather"]
-chighlight = config[section]["Color_highlight"]
-cdark = config[section]["Color_dark"]
-cdim = config[section]["Color_dim"]
-crcm = config[section]["Color_Med_pop"]
-crcw = config[section]["Color_High_pop"]
-chigh = config[section]["Color_High_temp"]
-clow = config[section]["Color_Low_temp"]
-byc = config[section]["Color_Title"]
-
-
-section = "Weather"
-location = config[section]["Locations"]
-use_current_location = config[section]["Use_current"] == "True"
-
-section = "News"
-alternSource = config[section]["Alternate_News_source"] == "True"
-showPics = config[section]["Show_News_pics"] == "True"
-separator = config[section]["Separator"]
-fps = config[section]["FPS"]
-smooth = config[section]["Smooth"] == "True"
-
-section = "World_Clocks"
-timeZones = config[section]["Timezones"]
+# Settings are read from settings file once, validated and kept in a read-only Settings object (current). Modules
+# use them as module attributes ("settings.lang"), which are looked up in current object (see __getattr__ below), so
+# reloading them replaces all of them at once, and the object can be safely given to other threads as it is
+
+QT_COLORS = ("cBkg", "clockc", "clockh", "wc", "chighlight", "cdark", "cdim", "crcm", "crcw", "chigh", "clow", "byc")
+
+
+class SettingsError(ValueError):
+    pass
+
+
+class Settings:
+    # Values as read from settings file, plus some derived ones (unit scales, icons folder). Colors in QT_COLORS are
+    # converted to Qt color strings when created, so the object is never modified afterwards
+
+    __slots__ = ("firstInstall", "dispSize", "dispRatio", "lang", "disp_units", "windScale", "baroScale", "distLimit",
+                 "texts", "lang_code", "locale",
+                 "setAsWallpaper", "clockMode", "showBkg", "bkgMode", "iconSet", "iconFolder", "wsource", "moonMode",
+                 "newsMode", "showSunSigns", "staticLayer", "canvasRenderer", "ecoMode", "ecoStart", "ecoEnd",
+                 "dimBkg", "outline", "dimFactor", "dimForecasts",
+                 "nBkg", "nc",
+                 "location", "use_current_location", "maxWeatherAge", "prefetch", "weatherCacheSize",
+                 "alternSource", "showPics", "separator", "fps", "smooth",
+                 "timeZones",
+                 "timeout", "debug",
+                 "colors", "qtColors")
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError("Settings got unexpected fields: %s" % ", ".join(fields))
+        qtColors = {name: qtutils.getRGBAfromColorName(QtGui.QColor(self.colors[name])) for name in QT_COLORS} \
+            if self.colors else {}
+        object.__setattr__(self, "qtColors", types.MappingProxyType(qtColors))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Settings are read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError("Settings are read-only")
+
+    def __getattr__(self, name):
+        # Only called for names which are not slots
+        if name in QT_COLORS:
+            return self.qtColors[name]
+        raise AttributeError("No such setting: %s" % name)
+
+    def replace(self, **fields):
+        # Copy with some values changed (e.g. to compare different modes)
+        values = {name: getattr(self, name) for name in self.__slots__ if name != "qtColors"}
+        values.update(fields)
+        return Settings(**values)
+
+
+def parse(config, firstInstall=False, defaults=None):
+    # Returns settings and the errors found. A missing or invalid value is replaced by its default one, so a wrong
+    # setting doesn't discard all the others. Default settings are only read if some value is needed from them
+
+    errors = []
+
+    def lookup(source, path):
+        for key in path:
+            source = source[key]
+        return source
+
+    def default(*path):
+        nonlocal defaults
+        if defaults is None:
+            defaults = wconfig.read_default_settings()
+        return lookup(defaults, path)
+
+    def get(*path, convert=None, valid=None):
+
+        try:
+            value = lookup(config, path)
+        except (KeyError, IndexError, TypeError):
+            # Older settings files lack newer settings
+            value = default(*path)
+            return convert(value) if convert else value
+
+        try:
+            converted = convert(value) if convert else value
+            if valid is None or valid(converted):
+                return converted
+        except (KeyError, IndexError, TypeError, ValueError):
+            pass
+        errors.append("Invalid setting %s: %s. Using default value" % ("/".join(str(key) for key in path), value))
+        value = default(*path)
+        return convert(value) if convert else value
+
+    def flag(*path):
+        return get(*path) == "True"
+
+    def color(*path):
+        return get(*path, valid=QtGui.QColor.isValidColor)
+
+    def hhmm(value):
+        return value.replace(":", "").zfill(4)
+
+    def validTime(value):
+        return value.isdigit() and len(value) == 4 and int(value[:2]) < 24 and int(value[2:]) < 60
+
+    def coords(code):
+        try:
+            lat, lon = code.split("lat=")[1].split("&lon=")
+            return float(lat), float(lon)
+        except (IndexError, ValueError):
+            return None
+
+    try:
+        dispSize = get("General", "Resolution", convert=lambda value: (int(value[0]), int(value[1])),
+                       valid=lambda value: value[0] > 0 and value[1] > 0)
+        lang = get("General", "Language", valid=lambda value: value in config["Texts"] or value in default("Texts"))
+        units = get("General", "Units", valid=lambda value: value in wconstants.AVAIL_UNITS)
+        disp_units = wconstants.AVAIL_UNITS[units]
+
+        # Only texts of selected language are kept
+        texts = types.MappingProxyType(get("Texts", lang, convert=dict,
+                                           valid=lambda value: "Code" in value and "Locale" in value))
+
+        section = "Appearance"
+        showBkg = flag(section, "Show_background")
+        bkgMode = get(section, "Background_mode",
+                      valid=lambda value: value in (wconstants.BKG_SOLID, wconstants.BKG_WEATHER, wconstants.BKG_FIXED))
+        iconSet = wconstants.AVAIL_ICONSET[get(section, "Icon_set", valid=lambda value: value in wconstants.AVAIL_ICONSET)]
+        newsMode = get(section, "News_mode",
+                       valid=lambda value: value in (wconstants.NEWS_PERIOD, wconstants.NEWS_ALWAYSON, wconstants.NEWS_ALWAYSOFF))
+
+        if showBkg and bkgMode in (wconstants.BKG_WEATHER, wconstants.BKG_FIXED):
+            background = "With_Background"
+        else:
+            background = "Without_Background"
+
+        section = "Colors"
+        if showBkg and bkgMode == wconstants.BKG_WEATHER:
+            colors = "With_Background"
+        else:
+            colors = "Without_Background"
+        qtColors = {"cBkg": color(section, "Color_Background"),
+                    "clockc": color(section, colors, "Color_Clock"),
+                    "clockh": color(section, colors, "Color_Header"),
+                    "wc": color(section, colors, "Color_Weather"),
+                    "chighlight": color(section, "Color_highlight"),
+                    "cdark": color(section, "Color_dark"),
+                    "cdim": color(section, "Color_dim"),
+                    "crcm": color(section, "Color_Med_pop"),
+                    "crcw": color(section, "Color_High_pop"),
+                    "chigh": color(section, "Color_High_temp"),
+                    "clow": color(section, "Color_Low_temp"),
+                    "byc": color(section, "Color_Title")}
+
+        section = "Weather"
+        location = get(section, "Locations", convert=lambda value: tuple((loc[0], loc[1]) for loc in value),
+                       valid=lambda value: len(value) >= 1 and all(coords(loc[1]) is not None for loc in value))
+        maxAge = get(section, "Max_age", convert=float, valid=lambda value: value > 0)
+        prefetch = get(section, "Prefetch", convert=int, valid=lambda value: value >= 0)
+        cacheMB = get(section, "Cache_MB", convert=float, valid=lambda value: value > 0)
+
+        current = Settings(
+            firstInstall=firstInstall,
+            dispSize=dispSize,
+            dispRatio=float(dispSize[0]) / float(dispSize[1]),
+            lang=lang,
+            disp_units=disp_units,
+            windScale=wconstants.windScale[disp_units],
+            baroScale=wconstants.baroScale[disp_units],
+            distLimit=int(wconstants.distLimit[disp_units]),
+            texts=texts,
+            lang_code=texts.get("Code"),
+            locale=texts.get("Locale"),
+            setAsWallpaper=flag("Appearance", "Wallpaper"),
+            clockMode=flag("Appearance", "Clock_mode"),
+            showBkg=showBkg,
+            bkgMode=bkgMode,
+            iconSet=iconSet,
+            iconFolder=utils.resource_path(__file__, wconstants.ICON_FOLDER + iconSet),
+            wsource=wconstants.WEATHER_1,
+            moonMode=get("Appearance", "Moon_position"),
+            newsMode=newsMode,
+            showSunSigns=flag("Appearance", "Show_Constellations"),
+            staticLayer=flag("Appearance", "Static_layer"),
+            canvasRenderer=flag("Appearance", "Canvas_renderer"),
+            ecoMode=flag("Appearance", "Eco_mode"),
+            ecoStart=get("Appearance", "Eco_start", convert=hhmm, valid=validTime),
+            ecoEnd=get("Appearance", "Eco_end", convert=hhmm, valid=validTime),
+            dimBkg=flag("Background", background, "Dim_background"),
+            outline=get("Background", background, "Outline_mode"),
+            dimFactor=get("Background", background, "Dim_factor"),
+            dimForecasts=flag("Background", background, "Dim_forecasts"),
+            nBkg=color("Colors", "Color_News_background") if showBkg else "transparent",
+            nc=color("Colors", colors, "Color_News"),
+            location=location,
+            use_current_location=flag("Weather", "Use_current"),
+            maxWeatherAge=maxAge * 3600,
+            prefetch=prefetch,
+            weatherCacheSize=int(cacheMB * 1024 * 1024),
+            alternSource=flag("News", "Alternate_News_source"),
+            showPics=flag("News", "Show_News_pics"),
+            separator=get("News", "Separator"),
+            fps=get("News", "FPS", valid=lambda value: isinstance(value, int) and value > 0),
+            smooth=flag("News", "Smooth"),
+            timeZones=get("World_Clocks", "Timezones", convert=lambda value: tuple((tz[0], tz[1]) for tz in value)),
+            timeout=20,
+            debug=False,
+            colors=types.MappingProxyType(qtColors)
+        )
+
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        # Default settings are wrong too
+        raise SettingsError("Missing or invalid setting: %s" % repr(e))
+
+    return current, errors
+
+
+def load():
+    # A single read of settings file. If there is none yet, it's created from default settings (see wconfig)
+
+    config = wconfig.read_settings_file(fallback=False)
+    firstInstall = config is None
+    defaults = None
+    if firstInstall:
+        config = defaults = wconfig.reset_settings_file()
+    try:
+        current, errors = parse(config, firstInstall, defaults)
+    except SettingsError as e:
+        print("Invalid settings. Using default ones instead:\n" + str(e))
+        current, errors = parse(wconfig.read_default_settings(), firstInstall)
+    if errors:
+        print("Invalid settings:\n" + "\n".join(errors))
+    return current
+
+
+def reload():
+    # After settings file changed (see Window.softRestart)
+    global current
+    current = load()
+
+
+def override(**fields):
+    global current
+    current = current.replace(**fields)
+
+
+def __getattr__(name):
+    return getattr(current, name)
+
+
+current = load()
@@ -0,0 +1,419 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Micro-benchmarks for the repaint path. They replay the sample openweathermap.json response through the
+# same code the application uses, so run it on the target device (e.g. a Raspberry Pi) to get meaningful figures:
+#
+#     python3 wbench.py [rounds]
+#
+# Widgets and canvas renderers (see wcanvas) are compared running each one in its own process, so memory figures
+# are not mixed. To run only one of them:
+#
+#     python3 wbench.py rounds widgets|canvas
+
+import copy
+import json
+import os
+import subprocess
+import sys
+import time
+
+from PyQt5 import QtWidgets, QtCore
+
+import qtutils
+import settings
+import utils
+import wcolors
+import wconstants
+import wthrnews
+import wviews
+
+SAMPLE_FILE = "openweathermap.json"
+
+
+def load_sample():
+    # Sample response is old: move all its timestamps to "now", so it is parsed as a current forecast
+
+    with open(utils.resource_path(__file__, SAMPLE_FILE), encoding='UTF-8') as file:
+        w = json.load(file)
+    shift = int(time.time()) - w["current"]["dt"]
+
+    def rebase(item):
+        if isinstance(item, dict):
+            for key, value in item.items():
+                if key in ("dt", "sunrise", "sunset", "moonrise", "moonset", "start", "end") and isinstance(value, int):
+                    item[key] = value + shift
+                else:
+                    rebase(value)
+        elif isinstance(item, list):
+            for value in item:
+                rebase(value)
+
+    rebase(w)
+    return w
+
+
+def capture_emissions(win, func):
+    # Run func and return the payloads it made UpdateData emit to the Window
+
+    emitted = []
+    win.update_data.dataChanged.connect(emitted.append)
+    func()
+    # Payloads are sent when control returns to the event loop: do not wait for it
+    win.update_data.commit()
+    win.update_data.dataChanged.disconnect(emitted.append)
+
+    return emitted
+
+
+def capture_payloads(win, w):
+    # Run a weather update and keep the forecasts payloads emitted to the Window (snapshots are read-only: no need to copy)
+
+    payloads = {}
+    for data in capture_emissions(win, lambda: win.update_data.onWeatherUpdated(wviews.Result(data=w), True)):
+        for section in (wconstants.FF_DAILY, wconstants.FF_HOURLY):
+            if section in data.keys():
+                payloads[section] = data[section]
+
+    return payloads
+
+
+def legacy_payload(section, views):
+    # Former payload format: a dict keyed by widget names, built by concatenating strings on every refresh
+
+    data = {}
+    for i, view in enumerate(views):
+        if section == wconstants.FF_DAILY:
+            data.update({"ff_day_" + str(i + 1): view.day,
+                         "ff_" + str(i + 1) + "_img": view.icon,
+                         "ff_icon_size": view.icon_size,
+                         "ff_max_" + str(i + 1): view.max,
+                         "ff_min_" + str(i + 1): view.min,
+                         "ff_pop_" + str(i + 1): view.pop,
+                         "ff_pop_" + str(i + 1) + "_color": view.pop_color})
+        else:
+            data["fh_temp_" + str(i + 1)] = view.temp
+            if view.icon:
+                data["fh_" + str(i + 1) + "_img"] = view.icon
+                data["fh_icon_size"] = view.icon_size
+            if view.time:
+                data["fh_time_" + str(i + 1)] = view.time
+
+    return data
+
+
+def legacy_repaintFF(win, data):
+    # Former implementation: walk all widgets and slice their names on every update
+    for w in win.widgets:
+        name = w.objectName()
+        prefix = name[:3]
+        suffix = name[-6:]
+        label = name[:-6]
+        if prefix == "ff_":
+            if suffix == "_label":
+                if "_pop_" in name:
+                    style = qtutils.setColor(w.styleSheet(), data[label + "_color"])
+                    w.setStyleSheet(style)
+                w.setText(data[label])
+                w.setFixedHeight(w.fontMetrics().height())
+            else:
+                size = int(data["ff_icon_size"] * win.imgRatio)
+                img = qtutils.resizeImageWithQT(win.iconf + data[name], size, size, expand=False)
+                w.setPixmap(img)
+                w.adjustSize()
+
+
+def legacy_repaintFH(win, data):
+    # Former implementation: walk all widgets and slice their names on every update
+    keys = data.keys()
+    for w in win.widgets:
+        name = w.objectName()
+        prefix = name[:3]
+        suffix = name[-6:]
+        label = name[:-6]
+        if prefix == "fh_":
+            if suffix == "_label":
+                if label in keys:
+                    w.setText(data[label])
+                    w.setFixedHeight(w.fontMetrics().height())
+                else:
+                    w.clear()
+            else:
+                if name in keys:
+                    size = int(data["fh_icon_size"] * win.imgRatio)
+                    img = qtutils.resizeImageWithQT(win.iconf + data[name], size, size, expand=False)
+                    w.setPixmap(img)
+                    w.adjustSize()
+                else:
+                    w.clear()
+
+
+def timeit(func, rounds):
+
+    start = time.perf_counter()
+    for i in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def bench_dispatch(win, payloads, rounds):
+
+    # All fields are repainted in both cases (no previous snapshots)
+    ff = payloads[wconstants.FF_DAILY]
+    fh = payloads[wconstants.FF_HOURLY]
+    results = {
+        "repaintFF (before)": timeit(lambda: legacy_repaintFF(win, legacy_payload(wconstants.FF_DAILY, ff)), rounds),
+        "repaintFF (after)": timeit(lambda: win.repaintFF(ff, None), rounds),
+        "repaintFH (before)": timeit(lambda: legacy_repaintFH(win, legacy_payload(wconstants.FF_HOURLY, fh)), rounds),
+        "repaintFH (after)": timeit(lambda: win.repaintFH(fh, None), rounds)
+    }
+    return results
+
+
+def legacy_repaintSEP(win, alpha):
+    # Former implementation: rewrite (and so re-parse and re-polish) the separator stylesheet on every tick
+    style = qtutils.setColorAlpha(win.sep_label.styleSheet(), alpha)
+    win.sep_label.setStyleSheet(style)
+
+
+def cputime(func, rounds, app):
+    # CPU time (not wall time) per call, including the repaint Qt does afterwards
+
+    start = time.process_time()
+    for i in range(rounds):
+        func(i)
+        app.processEvents()
+    return (time.process_time() - start) / rounds * 1000
+
+
+def bench_tick(win, app, rounds):
+    # Separator blinking, as done every second (not including the other clock fields, which are the same in both)
+    # Repainting the label (with no change) is measured too: it's what a tick costs whatever the color is set with
+
+    win.show()
+    seps = [wviews.Separator(sep=":", alpha=int(255 / (i + 1))) for i in range(2)]
+    ticks = {
+        "tick palette (after)": lambda i: win.repaintSEP(seps[i % 2], seps[(i + 1) % 2]),
+        "tick stylesheet (before)": lambda i: legacy_repaintSEP(win, seps[i % 2].alpha),
+        "label repaint only": lambda i: win.sep_label.update()
+    }
+    results = {}
+    for key, tick in ticks.items():
+        # Work left by previous benchmarks (and first polish of each path) must not be counted
+        cputime(tick, 10, app)
+        app.processEvents()
+        results[key] = cputime(tick, rounds, app)
+    # Legacy path left a "color:" rule in the stylesheet which would hide the palette
+    win.sep_label.setStyleSheet(wcolors.colors.stripColor(win.sep_label.styleSheet()))
+    wcolors.colors.forget(win.sep_label)
+    wcolors.colors.setColor(win.sep_label, win.font_color)
+    return results
+
+
+def count_fields(payload, shown):
+    # Fields differing from the snapshots already shown (so the ones repainted)
+
+    count = 0
+    for section, value in payload.items():
+        if section != wconstants.VERSION and section not in wconstants.EVENT_SECTIONS:
+            prev = shown.get(section)
+            if isinstance(value, tuple):
+                count += sum(len(view.changes(prev[i] if prev else None)) for i, view in enumerate(value))
+            else:
+                count += len(value.changes(prev))
+
+    return count
+
+
+def bench_delta(win, w, rounds):
+    # Full re-apply of a weather update (former behavior) vs. applying only what changed (temperature moved)
+
+    ud = win.update_data
+    ud.invalidate(*ud.emitted.keys())
+    full = capture_emissions(win, ud.show_weather)[-1]
+    # Window keeps the snapshots it shows: make it forget them (full) or go back to them (delta) before each round
+    shown = dict(win.model)
+    w2 = copy.deepcopy(w)
+    w2["current"]["temp"] += 1
+    delta = capture_emissions(win, lambda: ud.onWeatherUpdated(wviews.Result(data=w2), False))[-1]
+
+    def apply(data, model):
+        win.model = dict(model)
+        win.onDataChanged(data)
+
+    results = {
+        "full update (%s fields)" % count_fields(full, {}): timeit(lambda: apply(full, {}), rounds),
+        "delta update (%s fields)" % count_fields(delta, shown): timeit(lambda: apply(delta, shown), rounds)
+    }
+    return results
+
+
+class Sender(QtCore.QObject):
+    # Sends the same payload from a worker thread, through signals typed as the former ones (dict) and the current ones (object)
+
+    asDict = QtCore.pyqtSignal(dict, bool)
+    asObject = QtCore.pyqtSignal(object, bool)
+
+    def __init__(self, payloads):
+        QtCore.QObject.__init__(self)
+        self.payloads = payloads
+
+    @QtCore.pyqtSlot(str, int)
+    def send(self, kind, rounds):
+        for i in range(rounds):
+            data = self.payloads[kind]
+            if kind.endswith("dict"):
+                self.asDict.emit({"OK": data}, False)
+            else:
+                self.asObject.emit(wviews.Result(data=data, sent=time.perf_counter()), False)
+
+
+def bench_transport(app, w, rounds):
+    # Delivery cost of a result sent by a worker thread to the GUI thread: from first send to last one received
+    # (wall time, as both threads are involved) and CPU time of the whole process
+
+    news = json.dumps(w).encode("utf-8")
+    payloads = {"weather dict": w, "weather object": w, "news dict": news, "news object": news}
+    sender = Sender(payloads)
+    thread = QtCore.QThread()
+    sender.moveToThread(thread)
+    thread.start()
+    received = []
+    sender.asDict.connect(lambda data, firstRun: received.append(data["OK"]))
+    sender.asObject.connect(lambda result, firstRun: received.append(result.data))
+
+    def deliver(kind, count):
+        received.clear()
+        QtCore.QMetaObject.invokeMethod(sender, 'send', QtCore.Qt.QueuedConnection,
+                                        QtCore.Q_ARG(str, kind), QtCore.Q_ARG(int, count))
+        while len(received) < count:
+            app.processEvents()
+
+    # Warm up (first conversions of each type are slower)
+    for kind in payloads.keys():
+        deliver(kind, 10)
+
+    results = {}
+    for kind in payloads.keys():
+        start = time.perf_counter()
+        cpu = time.process_time()
+        deliver(kind, rounds)
+        results[kind] = ((time.perf_counter() - start) / rounds * 1000, (time.process_time() - cpu) / rounds * 1000,
+                         received[-1] is payloads[kind])
+
+    thread.quit()
+    thread.wait()
+    return results
+
+
+def rss_bytes():
+    # Resident memory of this process (Linux). Elsewhere, peak resident memory (if available)
+
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        try:
+            import resource
+        except ImportError:
+            return 0
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+
+
+def payload_stream(win, w, ticks):
+    # A full weather update followed by clock ticks (blinking separator, and time changing every minute)
+
+    stream = capture_emissions(win, lambda: win.update_data.onWeatherUpdated(wviews.Result(data=w), True))
+    for i in range(ticks):
+        data = {wconstants.SEP: wviews.Separator(sep=":", alpha=int(255 / (i % 2 + 1)))}
+        if i % 60 == 0:
+            data[wconstants.TIME] = wviews.Time(hour="%02d" % (i // 3600 % 24), minutes="%02d" % (i // 60 % 60))
+        stream.append(data)
+
+    return stream
+
+
+def bench_renderer(app, renderer, rounds):
+    # CPU time to apply and paint each payload of the same stream, and memory taken by the window
+
+    settings.override(canvasRenderer=renderer == "canvas")
+    before = rss_bytes()
+    win = wthrnews.Window()
+    win.show()
+    app.processEvents()
+    # Not done by processEvents() (canvas deletes the UI widgets when created)
+    app.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+    built = rss_bytes()
+    # Only the replayed payloads must be painted
+    win.update_data.clock.stop()
+    stream = payload_stream(win, load_sample(), rounds)
+    app.processEvents()
+
+    start = time.process_time()
+    for data in stream:
+        win.onDataChanged(data)
+        app.processEvents()
+    cpu = (time.process_time() - start) / len(stream) * 1000
+
+    return {"payloads": len(stream),
+            "objects": len(win.findChildren(QtCore.QObject)),
+            "cpu_ms": cpu,
+            "window_mb": (built - before) / 1024 / 1024,
+            "process_mb": rss_bytes() / 1024 / 1024}
+
+
+def compare_renderers(rounds):
+
+    results = {}
+    for renderer in ("widgets", "canvas"):
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), str(rounds), renderer],
+                             stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True).stdout
+        lines = out.strip().splitlines()
+        results[renderer] = json.loads(lines[-1]) if lines else None
+    return results
+
+
+def main():
+
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    app = QtWidgets.QApplication(sys.argv[:1])
+
+    if len(sys.argv) > 2:
+        # Run by compare_renderers(): results are read from last line
+        print(json.dumps(bench_renderer(app, sys.argv[2], rounds)))
+        app.quit()
+        return
+    win = wthrnews.Window()
+    w = load_sample()
+    payloads = capture_payloads(win, w)
+
+    print("Forecasts repaint, average of %s rounds (ms):" % rounds)
+    for key, value in bench_dispatch(win, payloads, rounds).items():
+        print("    %-30s %8.3f" % (key, value))
+
+    print("Weather update repaint, average of %s rounds (ms):" % rounds)
+    for key, value in bench_delta(win, w, rounds).items():
+        print("    %-30s %8.3f" % (key, value))
+
+    print("Worker to GUI thread delivery, average of %s rounds (microseconds):" % rounds)
+    for key, (wall, cpu, shared) in bench_transport(app, w, rounds).items():
+        print("    %-30s %8.1f wall %8.1f CPU   %s" % (key, wall * 1000, cpu * 1000, "by reference" if shared else "copied"))
+
+    print("Per-second tick, CPU time, average of %s rounds (ms):" % rounds)
+    for key, value in bench_tick(win, app, rounds).items():
+        print("    %-30s %8.3f" % (key, value))
+
+    print("Renderers, same payload stream (weather update + %s clock ticks):" % rounds)
+    for key, value in compare_renderers(rounds).items():
+        if value:
+            print("    %-10s CPU per payload %8.3f ms   Qt objects %5d   window %7.1f MB   process %7.1f MB"
+                  % (key, value["cpu_ms"], value["objects"], value["window_mb"], value["process_mb"]))
+        else:
+            print("    %-10s failed" % key)
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
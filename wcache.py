@@ -0,0 +1,446 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import collections
+import json
+import os
+import re
+import time
+
+import qtutils
+from PyQt5 import QtCore, QtGui
+
+import wconstants
+import wmetrics
+
+
+class PixmapCache:
+    # Scaled icons, so they are not decoded from disk and smooth-scaled again on every refresh / location change
+    # Least recently used pixmaps are evicted when the (approximate) bytes budget is exceeded
+
+    def __init__(self, maxBytes):
+        self.maxBytes = maxBytes
+        self.cache = collections.OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def pixmap(self, folder, file, size, ratio=1.0):
+
+        key = (folder, file, size, ratio)
+        img = self.cache.get(key)
+        if img is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+        else:
+            self.misses += 1
+            scaled = int(size * ratio)
+            img = qtutils.resizeImageWithQT(folder + file, scaled, scaled, expand=False)
+            self.cache[key] = img
+            self.bytes += self.pixmapBytes(img)
+            self.evict()
+
+        return img
+
+    def evict(self):
+        while self.bytes > self.maxBytes and len(self.cache) > 1:
+            key, img = self.cache.popitem(last=False)
+            self.bytes -= self.pixmapBytes(img)
+            self.evictions += 1
+
+    def clear(self):
+        self.cache.clear()
+        self.bytes = 0
+
+    @staticmethod
+    def pixmapBytes(img):
+        if img is None or img.isNull():
+            return 0
+        return img.width() * img.height() * img.depth() // 8
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"entries": len(self.cache),
+                "bytes": self.bytes,
+                "max_bytes": self.maxBytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "evictions": self.evictions}
+
+
+class BkgCache:
+    # Backgrounds already scaled to display resolution (and dimmed) stored on disk, so they are prepared only once
+    # Cached files are keyed by source file modification time, target size and dim factor
+    # Only QImage is used here (not QPixmap), since this runs on a worker thread
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.hits = 0
+        self.misses = 0
+        self.lastPrepareTime = 0.0
+
+    def cachedFile(self, source, width, height, dim):
+        try:
+            mtime = int(os.path.getmtime(source))
+        except OSError:
+            return None
+        name = os.path.splitext(os.path.basename(source))[0]
+        return os.path.join(self.folder, "%s_%sx%s_%s_%s%s" % (name, width, height, dim, mtime, wconstants.BKG_EXT))
+
+    def image(self, source, width, height, dim):
+
+        cached = self.cachedFile(source, width, height, dim)
+        img = QtGui.QImage()
+        if cached and os.path.exists(cached):
+            img.load(cached)
+        if not img.isNull():
+            self.hits += 1
+            return img
+
+        self.misses += 1
+        start = time.perf_counter()
+        img = QtGui.QImage(source)
+        if not img.isNull():
+            img = img.scaled(width, height, QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.SmoothTransformation)
+            img = img.convertToFormat(QtGui.QImage.Format_RGB32)
+            if dim:
+                painter = QtGui.QPainter(img)
+                painter.fillRect(img.rect(), QtGui.QColor(0, 0, 0, dim))
+                painter.end()
+            if cached:
+                self.store(cached, img)
+        self.lastPrepareTime = time.perf_counter() - start
+
+        return img
+
+    def store(self, cached, img):
+
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            # Discard previous versions of the same background (other sizes, dim factors or modification times)
+            prefix = os.path.basename(cached).split("_")[0] + "_"
+            for file in os.listdir(self.folder):
+                if file.startswith(prefix):
+                    os.remove(os.path.join(self.folder, file))
+            tmp = cached + ".tmp"
+            if img.save(tmp, "JPG", wconstants.bkgCacheQuality):
+                os.replace(tmp, cached)
+        except OSError as e:
+            print("Error storing background in cache:", cached, e)
+
+    def stats(self):
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "last_prepare_secs": self.lastPrepareTime}
+
+
+class FontFitCache:
+    # Point sizes which make a text fit its label (as calculated by qtutils.adjustFont()), so fonts are not fitted
+    # again every time the same location or alert is shown. Stored on disk, since these texts also repeat across restarts
+
+    def __init__(self, file, maxEntries):
+        self.file = file
+        self.maxEntries = maxEntries
+        self.sizes = None
+        self.hits = 0
+        self.misses = 0
+
+    def load(self):
+        try:
+            with open(self.file, encoding='UTF-8') as file:
+                self.sizes = json.load(file)
+        except (OSError, ValueError):
+            self.sizes = {}
+
+    def fit(self, label, pointSize, text):
+
+        if self.sizes is None:
+            self.load()
+        font = label.font()
+        key = "%s|%s|%s|%s" % (font.family(), pointSize, label.width(), text)
+        size = self.sizes.get(key)
+        if size:
+            self.hits += 1
+            font.setPointSize(size)
+        else:
+            self.misses += 1
+            font = qtutils.adjustFont(label, pointSize, text)
+            self.sizes[key] = font.pointSize()
+            while len(self.sizes) > self.maxEntries:
+                self.sizes.pop(next(iter(self.sizes)))
+            self.store()
+
+        return font
+
+    def store(self):
+
+        try:
+            os.makedirs(os.path.dirname(self.file), exist_ok=True)
+            tmp = self.file + ".tmp"
+            with open(tmp, "w", encoding='UTF-8') as file:
+                json.dump(self.sizes, file)
+            os.replace(tmp, self.file)
+        except OSError as e:
+            print("Error storing font sizes in cache:", self.file, e)
+
+    def stats(self):
+        return {"entries": len(self.sizes) if self.sizes else 0,
+                "hits": self.hits,
+                "misses": self.misses}
+
+
+class TranslationCache:
+    # Translated texts (weather alerts, which repeat on every refresh and for days), so each one is requested only once
+    # in a while (ttl, seconds). Stored on disk, so they are not requested again after restarting either
+    # Also keeps request stats (see UpdateData.translate)
+
+    def __init__(self, file, maxEntries, ttl):
+        self.file = file
+        self.maxEntries = maxEntries
+        self.ttl = ttl
+        self.texts = None       # "lang|text": (translated, time)
+        self.hits = 0
+        self.misses = 0
+        self.requests = 0
+        self.requested = 0
+        self.errors = 0
+        self.lastMs = 0.0
+        self.totalMs = 0.0
+
+    def load(self):
+        try:
+            with open(self.file, encoding='UTF-8') as file:
+                self.texts = json.load(file)
+        except (OSError, ValueError):
+            self.texts = {}
+
+    def get(self, text, lang):
+        # Returns None if not translated yet, or if translation expired
+
+        if self.texts is None:
+            self.load()
+        entry = self.texts.get(lang + "|" + text)
+        if entry and time.time() - entry[1] < self.ttl:
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        return None
+
+    def put(self, translations, lang):
+
+        if self.texts is None:
+            self.load()
+        now = time.time()
+        for text, translated in translations.items():
+            key = lang + "|" + text
+            self.texts.pop(key, None)
+            self.texts[key] = (translated, now)
+        while len(self.texts) > self.maxEntries:
+            self.texts.pop(next(iter(self.texts)))
+        self.store()
+
+    def done(self, texts, elapsed, ok):
+        # A request for texts (number of them) took elapsed ms
+
+        self.requests += 1
+        self.requested += texts
+        self.lastMs = elapsed
+        self.totalMs += elapsed
+        if not ok:
+            self.errors += 1
+
+    def store(self):
+
+        try:
+            os.makedirs(os.path.dirname(self.file), exist_ok=True)
+            tmp = self.file + ".tmp"
+            with open(tmp, "w", encoding='UTF-8') as file:
+                json.dump(self.texts, file, ensure_ascii=False)
+            os.replace(tmp, self.file)
+        except OSError as e:
+            print("Error storing translations in cache:", self.file, e)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"entries": len(self.texts) if self.texts else 0,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "requests": self.requests,
+                "texts_per_request": (self.requested / self.requests) if self.requests else 0.0,
+                "errors": self.errors,
+                "last_ms": self.lastMs,
+                "mean_ms": (self.totalMs / self.requests) if self.requests else 0.0}
+
+
+class LocationCache:
+    # Last known current location (as returned by geolocation by IP), so it's used from the start instead of waiting
+    # for it. Stored on disk, since it rarely changes across restarts
+
+    def __init__(self, file):
+        self.file = file
+        self.last = None        # {"lang": lang, "loc": loc, "time": time}
+        self.loaded = False
+        self.hits = 0
+        self.misses = 0
+        self.updates = 0
+
+    def load(self):
+        self.loaded = True
+        try:
+            with open(self.file, encoding='UTF-8') as file:
+                self.last = json.load(file)
+        except (OSError, ValueError):
+            self.last = None
+
+    def get(self, lang):
+        # Returns (location, age in seconds), or None if there is none for this language
+
+        if not self.loaded:
+            self.load()
+        if self.last and self.last.get("lang") == lang:
+            self.hits += 1
+            return self.last["loc"], max(0.0, time.time() - self.last["time"])
+        self.misses += 1
+        return None
+
+    def put(self, lang, loc):
+
+        self.updates += 1
+        self.loaded = True
+        self.last = {"lang": lang, "loc": loc, "time": time.time()}
+        try:
+            os.makedirs(os.path.dirname(self.file), exist_ok=True)
+            tmp = self.file + ".tmp"
+            with open(tmp, "w", encoding='UTF-8') as file:
+                json.dump(self.last, file, ensure_ascii=False)
+            os.replace(tmp, self.file)
+        except OSError as e:
+            print("Error storing location in cache:", self.file, e)
+
+    def stats(self):
+        return {"location": ", ".join(str(value) for value in self.last["loc"][:3]) if self.last else "-",
+                "age_secs": int(time.time() - self.last["time"]) if self.last else None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "updates": self.updates}
+
+
+class WeatherSnapshots:
+    # Last response for each location, so it can be shown at once when starting (even if offline) or when switching to
+    # another location. Decoded responses of recently used locations are kept in memory (least recently used are
+    # discarded when their size, as received, exceeds maxBytes). All of them are stored on disk with the time they
+    # were fetched, replacing previous file at once (never half-written)
+
+    def __init__(self, folder, maxBytes):
+        self.folder = folder
+        self.maxBytes = maxBytes
+        self.cache = collections.OrderedDict()     # key: (data, fetched, size)
+        self.bytes = 0
+        self.hits = 0
+        self.diskHits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stored = 0
+        self.lastStoreMs = 0.0
+
+    def file(self, key):
+        return os.path.join(self.folder, re.sub(r"[^\w.-]", "_", key) + ".json")
+
+    def resize(self, maxBytes):
+        self.maxBytes = maxBytes
+        self.evict()
+
+    def get(self, key):
+        # Returns (decoded response, fetch time), or None
+
+        entry = self.cache.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return entry[:2]
+
+        try:
+            with open(self.file(key), "rb") as file:
+                content = file.read()
+            snapshot = json.loads(content.decode('utf8'))
+            data, fetched = snapshot["data"], snapshot["fetched"]
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        self.diskHits += 1
+        self.keep(key, data, fetched, len(content))
+        return data, fetched
+
+    def age(self, key):
+        # Seconds since last response for this location was fetched (None if there is none), without loading it
+
+        entry = self.cache.get(key)
+        if entry is not None:
+            return time.time() - entry[1]
+        try:
+            # Written when fetched
+            return time.time() - os.path.getmtime(self.file(key))
+        except OSError:
+            return None
+
+    def put(self, key, content, data, fetched):
+        # content: response as received (JSON bytes), so it's not encoded again. data: decoded one
+
+        self.keep(key, data, fetched, len(content))
+        start = time.perf_counter()
+        cached = self.file(key)
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            tmp = cached + ".tmp"
+            with open(tmp, "wb") as file:
+                file.write(b'{"fetched": %f, "data": ' % fetched + content + b'}')
+            os.replace(tmp, cached)
+        except OSError as e:
+            print("Error storing weather in cache:", cached, e)
+            return
+        self.stored += 1
+        self.lastStoreMs = (time.perf_counter() - start) * 1000
+
+    def keep(self, key, data, fetched, size):
+
+        entry = self.cache.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+        self.cache[key] = (data, fetched, size)
+        self.bytes += size
+        self.evict()
+
+    def evict(self):
+        while self.bytes > self.maxBytes and len(self.cache) > 1:
+            key, entry = self.cache.popitem(last=False)
+            self.bytes -= entry[2]
+            self.evictions += 1
+
+    def stats(self):
+        return {"entries": len(self.cache),
+                "bytes": self.bytes,
+                "max_bytes": self.maxBytes,
+                "hits": self.hits,
+                "disk_hits": self.diskHits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "stored": self.stored,
+                "last_store_ms": self.lastStoreMs}
+
+
+pixmaps = PixmapCache(wconstants.pixmapCacheSize)
+wmetrics.register("Pixmap cache", pixmaps.stats)
+backgrounds = BkgCache(wconstants.BKG_CACHE_FOLDER)
+wmetrics.register("Background cache", backgrounds.stats)
+fonts = FontFitCache(wconstants.FONTFIT_CACHE_FILE, wconstants.fontFitCacheSize)
+wmetrics.register("Font fit cache", fonts.stats)
+translations = TranslationCache(wconstants.TRANSLATION_CACHE_FILE, wconstants.translationCacheSize,
+                                wconstants.translationTTL)
+wmetrics.register("Translations", translations.stats)
+geoloc = LocationCache(wconstants.GEOLOC_CACHE_FILE)
+wmetrics.register("Geolocation", geoloc.stats)
+weather = WeatherSnapshots(wconstants.WEATHER_CACHE_FOLDER, wconstants.weatherCacheSize)
+wmetrics.register("Weather snapshots", weather.stats)
@@ -0,0 +1,411 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import time
+
+import qtutils
+import utils
+from PyQt5 import QtWidgets, QtCore, QtGui
+
+import settings
+import wcache
+import wcolors
+import wconstants
+import wmetrics
+import zoneinfo
+
+
+class Canvas(QtWidgets.QWidget):
+    # Alternative renderer: the whole screen is drawn by this single widget in one paintEvent, from cached pixmaps and
+    # QStaticText, instead of using one QLabel (with its own font, stylesheet and size policy) per field
+    # Designer grid (wthrnews_ui) is only used as a template: geometries, fonts and alignments of its widgets are
+    # captured once, then template widgets are deleted. So the layout is fixed (it won't adapt to texts lengths)
+    # Live widgets (news marquee and world clocks) are children of the canvas, so they still repaint on their own
+
+    def __init__(self, window):
+        QtWidgets.QWidget.__init__(self, window.centralwidget)
+
+        self.win = window
+        self.slots = {}
+        self.texts = {}
+        self.images = {}
+        self.colors = {}
+        self.fits = {}
+        self.ffSlots = {}
+        self.fhSlots = {}
+        self.bkg = None
+        self.bkgColor = QtGui.QColor(QtCore.Qt.transparent)
+        self.alertText = ""
+        self.alertIcon = None
+        self.showingNews = False
+        self.onlyTime = False
+        self.tzOffset = None
+        self.clocks = []
+        self.paints = 0
+        self.lastPaintTime = 0.0
+        wmetrics.register("Canvas", self.stats)
+
+        self.setGeometry(0, 0, window.xmax, window.ymax)
+        self.capture(window)
+        self.marquee = window.marquee
+        self.marquee.setParent(self)
+        self.marquee.hide()
+        self.show()
+
+    def capture(self, window):
+
+        if settings.showBkg and settings.bkgMode == wconstants.BKG_SOLID:
+            rgba = qtutils.getRGBAfromColorRGB(settings.cBkg)
+            self.bkgColor = QtGui.QColor(rgba[0], rgba[1], rgba[2])
+
+        # Give labels the height they get once they show data (see Window.repaintFF), so rows are sized as in the widget UI
+        for w in window.widgets:
+            name = w.objectName()
+            if name[-6:] == "_label":
+                w.setText("0")
+                if name[:3] in ("ff_", "fh_"):
+                    w.setFixedHeight(w.fontMetrics().height())
+        window.gridLayout.activate()
+        for w in window.widgets:
+            name = w.objectName()
+            if w.isWidgetType() and w is not window.bkg_img and (name[-6:] == "_label" or name[-4:] == "_img"):
+                rect = QtCore.QRect(w.mapTo(window.centralwidget, QtCore.QPoint(0, 0)), w.size())
+                self.slots[name] = (rect, QtGui.QFont(w.font()), w.alignment())
+        # Same forecasts index as the Window one (see Window.buildWidgetIndex), but pointing to slot names
+        for index, slots in ((window.ffIndex, self.ffSlots), (window.fhIndex, self.fhSlots)):
+            for i, fields in index.items():
+                slots[i] = {field: (w.objectName(), kind) for field, (w, kind) in fields.items()}
+        self.clockBkg = qtutils.getBkgColor(window.ff_1_img.styleSheet())
+        self.clockSize = int((window.ymax - window.ff_1_img.x()) / 3)
+
+        for w in window.widgets:
+            wcolors.colors.forget(w)
+        for w in (window.gridLayoutWidget, window.bkg_img, window.cc_moon_img):
+            w.hide()
+            w.deleteLater()
+        window.widgets = []
+        window.ffIndex = {}
+        window.fhIndex = {}
+
+    def setBackground(self, img):
+        self.bkg = QtGui.QPixmap.fromImage(img)
+        self.update()
+
+    @staticmethod
+    def align(rect, size, alignment):
+
+        if alignment & QtCore.Qt.AlignRight:
+            x = rect.x() + rect.width() - size.width()
+        elif alignment & QtCore.Qt.AlignHCenter:
+            x = rect.x() + (rect.width() - size.width()) // 2
+        else:
+            x = rect.x()
+        if alignment & QtCore.Qt.AlignBottom:
+            y = rect.y() + rect.height() - size.height()
+        elif alignment & QtCore.Qt.AlignTop:
+            y = rect.y()
+        else:
+            y = rect.y() + (rect.height() - size.height()) // 2
+
+        return QtCore.QPoint(int(x), int(y))
+
+    def setText(self, name, text, fit=False):
+
+        if name not in self.slots:
+            return
+        prev = self.texts.pop(name, None)
+        if prev:
+            if prev[0] == text:
+                self.texts[name] = prev
+                return
+            self.update(prev[2])
+
+        if text:
+            rect, font, alignment = self.slots[name]
+            if fit:
+                font = self.fit(name, text)
+            if QtCore.Qt.mightBeRichText(text):
+                lines = [self.staticText(text, font)]
+            else:
+                # Plain QStaticText ignores line breaks
+                lines = [self.staticText(line, font) for line in text.split("\n")]
+
+            # Block of lines is aligned in its slot, and each line is aligned within the block
+            width = int(max(line.size().width() for line in lines))
+            height = int(sum(line.size().height() for line in lines))
+            block = QtCore.QRect(self.align(rect, QtCore.QSize(width, height), alignment), QtCore.QSize(width, height))
+            placed = []
+            y = block.y()
+            for line in lines:
+                size = line.size().toSize()
+                placed.append((self.align(QtCore.QRect(block.x(), y, width, size.height()), size, alignment), line))
+                y += size.height()
+            self.texts[name] = (text, font, block, placed)
+            self.update(block)
+
+    @staticmethod
+    def staticText(text, font):
+
+        static = QtGui.QStaticText(text)
+        static.setTextFormat(QtCore.Qt.RichText if QtCore.Qt.mightBeRichText(text) else QtCore.Qt.PlainText)
+        # Otherwise, rich texts are wrapped at their first spaces
+        option = QtGui.QTextOption()
+        option.setWrapMode(QtGui.QTextOption.NoWrap)
+        static.setTextOption(option)
+        static.prepare(QtGui.QTransform(), font)
+
+        return static
+
+    def fit(self, name, text):
+        # Shrink font until text fits its slot width (as qtutils.adjustFont does for labels)
+
+        key = (name, text)
+        rect, font, alignment = self.slots[name]
+        font = QtGui.QFont(font)
+        size = self.fits.get(key)
+        if size is None:
+            size = font.pointSize()
+            while size > 1:
+                font.setPointSize(size)
+                if self.staticText(text, font).size().width() <= rect.width():
+                    break
+                size -= 1
+            self.fits[key] = size
+        font.setPointSize(size)
+
+        return font
+
+    def setColor(self, name, color, alpha=None):
+
+        color = wcolors.colors.palette(color, alpha).color(QtGui.QPalette.WindowText)
+        if self.colors.get(name) != color:
+            self.colors[name] = color
+            if name in self.texts:
+                self.update(self.texts[name][2])
+
+    def setImage(self, name, img):
+
+        if name not in self.slots:
+            return
+        prev = self.images.pop(name, None)
+        if prev:
+            if img is not None and prev[0].cacheKey() == img.cacheKey():
+                self.images[name] = prev
+                return
+            self.update(prev[1])
+
+        if img is not None and not img.isNull():
+            rect, font, alignment = self.slots[name]
+            if name == "cc_moon_img":
+                # Not in the grid: it's placed by its top-left corner (and then resized to the image)
+                pos = rect.topLeft()
+                target = QtCore.QRect(pos, img.size())
+            else:
+                # As labels do, images are clipped to their slot
+                pos = self.align(rect, img.size(), alignment)
+                target = QtCore.QRect(pos, img.size()).intersected(rect)
+            self.images[name] = (img, target, target.translated(-pos))
+            self.update(target)
+
+    def clear(self, name):
+        self.setText(name, "")
+        self.setImage(name, None)
+
+    def paintEvent(self, event):
+
+        start = time.perf_counter()
+        clip = event.rect()
+        painter = QtGui.QPainter(self)
+        if self.bkg is not None:
+            painter.drawPixmap(clip, self.bkg, clip)
+        elif self.bkgColor.alpha():
+            painter.fillRect(clip, self.bkgColor)
+
+        for img, target, source in self.images.values():
+            if clip.intersects(target):
+                painter.drawPixmap(target, img, source)
+
+        default = wcolors.colors.palette(self.win.font_color).color(QtGui.QPalette.WindowText)
+        for name, (text, font, block, placed) in self.texts.items():
+            if clip.intersects(block):
+                painter.setFont(font)
+                painter.setPen(self.colors.get(name, default))
+                for pos, line in placed:
+                    painter.drawStaticText(pos, line)
+        painter.end()
+
+        self.paints += 1
+        self.lastPaintTime = time.perf_counter() - start
+
+    def applyData(self, data, prev):
+
+        contents = data.keys()
+
+        if wconstants.HEADER in contents:
+            self.repaintHEADER(data[wconstants.HEADER], prev[wconstants.HEADER])
+
+        if wconstants.MOON in contents:
+            self.repaintMOON(data[wconstants.MOON])
+
+        if wconstants.SUNSIGN in contents:
+            self.repaintSUNSIGN(data[wconstants.SUNSIGN])
+
+        if wconstants.SEP in contents:
+            self.repaintSEP(data[wconstants.SEP], prev[wconstants.SEP])
+
+        if wconstants.TIME in contents:
+            self.repaintTIME(data[wconstants.TIME], prev[wconstants.TIME])
+
+        if wconstants.CC in contents:
+            if self.onlyTime:
+                # We need to remove clocks first when recovering from weather data errors
+                self.hideClocks()
+            self.repaintCC(data[wconstants.CC], prev[wconstants.CC])
+
+        if wconstants.ALERT in contents:
+            self.repaintALERT(data[wconstants.ALERT])
+
+        if wconstants.FF_DAILY in contents:
+            self.repaintFF(data[wconstants.FF_DAILY], prev[wconstants.FF_DAILY], self.ffSlots)
+
+        if wconstants.FF_HOURLY in contents:
+            self.repaintFF(data[wconstants.FF_HOURLY], prev[wconstants.FF_HOURLY], self.fhSlots)
+
+        if wconstants.NEWS in contents:
+            self.repaintNEWS(data[wconstants.NEWS])
+
+        if wconstants.ONLY_CLOCK in contents:
+            self.showClocks()
+
+    def repaintHEADER(self, view, prev):
+        changed = view.changes(prev)
+        for field in ("day", "day_week", "month"):
+            if field in changed:
+                self.setText(field + "_label", getattr(view, field))
+        if "source" in changed or "by" in changed:
+            self.setText("by_label", qtutils.setHTMLStyle(view.source, color=settings.chighlight, strong=True) + view.by)
+        if "location" in changed:
+            self.setText("location_label", view.location, fit=True)
+
+    def repaintMOON(self, view):
+        if view.icon is None:
+            self.setImage("moon_img", None)
+        else:
+            self.setImage("moon_img", wcache.pixmaps.pixmap(utils.resource_path(__file__, wconstants.MOON_FOLDER), view.icon, view.size, self.win.imgRatio))
+
+    def repaintSUNSIGN(self, view):
+        self.setImage("sunsign_img", wcache.pixmaps.pixmap(utils.resource_path(__file__, wconstants.SUNSIGNS_FOLDER), view.icon, view.size, self.win.imgRatio))
+
+    def repaintSEP(self, view, prev):
+        changed = view.changes(prev)
+        if "alpha" in changed:
+            self.setColor("sep_label", self.win.font_color, view.alpha)
+        if "sep" in changed:
+            self.setText("sep_label", view.sep)
+
+    def repaintTIME(self, view, prev):
+        changed = view.changes(prev)
+        if "hour" in changed:
+            self.setText("hour_label", view.hour)
+        if "minutes" in changed:
+            self.setText("minutes_label", view.minutes)
+
+    def repaintCC(self, view, prev):
+        changed = view.changes(prev)
+        self.setImage("cc_img", wcache.pixmaps.pixmap(utils.resource_path(__file__, view.folder), view.icon, view.size, self.win.imgRatio))
+        if view.moon_icon is not None:
+            self.setImage("cc_moon_img", wcache.pixmaps.pixmap(utils.resource_path(__file__, wconstants.MOON_W_FOLDER), view.moon_icon, view.moon_size, self.win.imgRatio))
+        else:
+            self.setImage("cc_moon_img", None)
+        if "temp" in changed:
+            size = self.slots["cc_temp_label"][1].pointSize()
+            self.setText("cc_temp_label", view.temp + qtutils.setHTMLStyle(wconstants.degree_sign, fontSize=size, valign="super"))
+        if "temp_text" in changed:
+            self.setText("cc_temp_text_label", view.temp_text)
+        if "updated" in changed or "other_conds_1" in changed or "other_conds_2" in changed:
+            self.setText("cc_other_cond_label", view.updated + "\n" + view.other_conds_1 + "\n" + view.other_conds_2)
+
+    def repaintALERT(self, view):
+        if view.text is not None:
+            self.alertText = qtutils.setHTMLStyle(view.text, color=view.color, strong=True)
+            self.alertIcon = wcache.pixmaps.pixmap(utils.resource_path(__file__, wconstants.ALERT_ICONFOLDER), view.icon, view.icon_size, self.win.imgRatio)
+        else:
+            self.alertText = ""
+            self.alertIcon = None
+        if not self.showingNews:
+            self.setImage("alert_img", self.alertIcon)
+            self.setText("alert_label", self.alertText, fit=True)
+
+    def repaintFF(self, views, prevs, index):
+        for i, view in enumerate(views):
+            fields = index.get(i)
+            if fields:
+                for field in view.changes(prevs[i] if prevs else None):
+                    target = fields.get(field)
+                    if target:
+                        name, kind = target
+                        if kind == wconstants.W_IMG:
+                            self.setImage(name, wcache.pixmaps.pixmap(self.win.iconf, view.icon, view.icon_size, self.win.imgRatio) if view.icon else None)
+                        elif kind == wconstants.W_COLOR:
+                            self.setColor(name, getattr(view, field))
+                        else:
+                            self.setText(name, getattr(view, field) or "")
+
+    def repaintNEWS(self, view):
+        if view.titles is not None:
+            if not self.showingNews:
+                self.showingNews = True
+                self.setImage("alert_img", None)
+                self.setText("alert_label", "")
+                self.setText("alert_img", view.nsource)
+                self.marquee.setHtml(view.titles)
+                self.marquee.setGeometry(self.slots["alert_label"][0])
+                self.marquee.show()
+                self.marquee.start()
+
+        elif view.stop:
+            if self.showingNews:
+                self.showingNews = False
+                self.marquee.hide()
+                self.marquee.stop()
+                self.setText("alert_img", "")
+                self.setImage("alert_img", self.alertIcon)
+                self.setText("alert_label", self.alertText, fit=True)
+
+    def showClocks(self):
+
+        self.onlyTime = True
+        for name in self.slots.keys():
+            if name[:3] in ("ff_", "fh_", "cc_"):
+                self.clear(name)
+
+        if not self.tzOffset:
+            self.tzOffset = zoneinfo.get_world_clock_offsets(settings.timeZones)
+
+        rgbColor = qtutils.getRGBAfromColorRGB(settings.clockc)
+        color = QtGui.QColor().fromRgb(rgbColor[0], rgbColor[1], rgbColor[2], rgbColor[3])
+        for i in range(4):
+            self.setText("ff_day_%s_label" % (i + 1), self.tzOffset[i][0])
+            if len(self.clocks) <= i:
+                clock = qtutils.Clock(bcolor=color, bkcolor=self.clockBkg, size=self.clockSize, hoffset=self.tzOffset[i][1],
+                                      moffset=self.tzOffset[i][2])
+                clock.setParent(self)
+                self.clocks.append(clock)
+            clock = self.clocks[i]
+            rect = self.slots["ff_%s_img" % (i + 1)][0]
+            clock.move(self.align(rect, clock.size(), QtCore.Qt.AlignCenter))
+            clock.show()
+
+    def hideClocks(self):
+
+        if self.onlyTime:
+            self.onlyTime = False
+            for clock in self.clocks:
+                clock.stop()
+                clock.hide()
+
+    def stats(self):
+        return {"texts": len(self.texts),
+                "images": len(self.images),
+                "paint_events": self.paints,
+                "last_paint_secs": self.lastPaintTime}
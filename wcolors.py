@@ -0,0 +1,71 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import re
+
+import qtutils
+from PyQt5 import QtGui
+
+import wmetrics
+
+# "color:..." declarations, but not "background-color:..." ones
+COLOR_RULE = re.compile(r"(?<![-\w])color\s*:[^;]*;?")
+
+
+class Colors:
+    # Text colors are applied through (cached) QPalettes, so switching them (separator blinking, rain probability)
+    # does not make Qt parse the widget stylesheet and re-polish it, as setStyleSheet() does on every call
+    # Notice that setStyleSheet() resets the widget palette, so colors must be applied after any stylesheet change,
+    # and that a "color:" rule (in the widget or any of its parents) takes precedence over the palette
+
+    def __init__(self):
+        self.palettes = {}
+        self.applied = {}
+        self.changes = 0
+        self.skipped = 0
+
+    def palette(self, color, alpha=None):
+
+        key = (color, alpha)
+        pal = self.palettes.get(key)
+        if pal is None:
+            rgba = qtutils.getRGBAfromColorRGB(color)
+            if alpha is None:
+                alpha = rgba[3] if len(rgba) > 3 else 255
+            qcolor = QtGui.QColor(rgba[0], rgba[1], rgba[2], alpha)
+            pal = QtGui.QPalette()
+            pal.setColor(QtGui.QPalette.WindowText, qcolor)
+            pal.setColor(QtGui.QPalette.Text, qcolor)
+            self.palettes[key] = pal
+
+        return pal
+
+    def setColor(self, widget, color, alpha=None):
+
+        key = (color, alpha)
+        if self.applied.get(widget) == key:
+            self.skipped += 1
+        else:
+            self.changes += 1
+            self.applied[widget] = key
+            # Stylesheet is applied when the widget is polished (e.g. when first shown), which would discard the palette
+            widget.ensurePolished()
+            widget.setPalette(self.palette(color, alpha))
+
+    def forget(self, widget):
+        # Call it if widget palette was changed by other means (e.g. after setStyleSheet())
+        self.applied.pop(widget, None)
+
+    @staticmethod
+    def stripColor(style):
+        return COLOR_RULE.sub("", style).strip().rstrip(";")
+
+    def stats(self):
+        return {"palettes": len(self.palettes),
+                "widgets": len(self.applied),
+                "changes": self.changes,
+                "skipped": self.skipped}
+
+
+colors = Colors()
+wmetrics.register("Colors", colors.stats)
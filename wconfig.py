@@ -1,7 +1,9 @@
 #!/usr/bin/python3
 # -*- coding: utf-8 -*-
 
+import getopt
 import sys
+import time
 import tkinter as tk
 from tkinter import ttk
 import urllib.parse
@@ -27,11 +29,17 @@ def read_settings_file(fallback=True):
     return config
 
 
-def reset_settings_file():
+def read_default_settings():
 
     with open(default_settings_file, encoding='UTF-8', errors='ignore') as file:
         config = json.load(file)
 
+    return config
+
+
+def reset_settings_file():
+
+    config = read_default_settings()
     write_settings_file(config)
 
     return config
@@ -50,6 +58,9 @@ class WeatherConfig:
     def __init__(self):
         self.root = None
         self.config = None
+        self.tabs = {}
+        self.built = set()
+        self.start = None
 
     def terminate(self):
         self.root.destroy()
@@ -57,22 +68,23 @@ class WeatherConfig:
 
     def apply(self):
 
-        self.set_general()
-        self.set_appearance()
-        self.set_texts()
-        self.set_colors()
-        self.set_background()
-        self.set_Weather()
-        self.set_News()
-        self.set_WorldClocks()
+        # Tabs which have not been visited keep their values as they are on settings file
+        for tab, (build, collect) in self.tabs.items():
+            if tab in self.built:
+                collect()
 
         write_settings_file(self.config)
+        # When opened from the running program, this tells it to apply them
+        print(wconstants.CONFIG_APPLIED, flush=True)
 
         self.terminate()
 
-    def run(self, quit_event=None, x=None, y=None):
+    def run(self, x=None, y=None):
 
+        self.start = time.perf_counter()
         self.config = read_settings_file()
+        self.tabs = {}
+        self.built = set()
 
         self.padx = (0, 0)
         self.gapx = (30, 0)
@@ -109,30 +121,36 @@ class WeatherConfig:
         self.news_tab = ttk.Frame(self.notebook)
         self.clocks_tab = ttk.Frame(self.notebook)
 
-        self.notebook.add(self.general_tab, text="General", padding=5)
-        self.notebook.add(self.appearance_tab, text="Appearance", padding=5)
-        self.notebook.add(self.texts_tab, text="Translation", padding=5)
-        self.notebook.add(self.colors_tab, text="Colors", padding=5)
-        self.notebook.add(self.background_tab, text="Background", padding=5)
-        self.notebook.add(self.weather_tab, text="Weather", padding=5)
-        self.notebook.add(self.news_tab, text="News", padding=5)
-        self.notebook.add(self.clocks_tab, text="Clocks", padding=5)
-
-        self.get_general(self.general_tab)
-        self.get_appearance(self.appearance_tab)
-        self.get_texts(self.texts_tab)
-        self.get_colors(self.colors_tab)
-        self.get_background(self.background_tab)
-        self.get_Weather(self.weather_tab)
-        self.get_News(self.news_tab)
-        self.get_WorldClocks(self.clocks_tab)
-
-        if quit_event:
-            while self.root and not quit_event.is_set():
-                self.root.update_idletasks()
-                self.root.update()
-        else:
-            self.root.mainloop()
+        # Tab contents are built when first selected (see show_tab)
+        self.add_tab(self.general_tab, "General", self.get_general, self.set_general)
+        self.add_tab(self.appearance_tab, "Appearance", self.get_appearance, self.set_appearance)
+        self.add_tab(self.texts_tab, "Translation", self.get_texts, self.set_texts)
+        self.add_tab(self.colors_tab, "Colors", self.get_colors, self.set_colors)
+        self.add_tab(self.background_tab, "Background", self.get_background, self.set_background)
+        self.add_tab(self.weather_tab, "Weather", self.get_Weather, self.set_Weather)
+        self.add_tab(self.news_tab, "News", self.get_News, self.set_News)
+        self.add_tab(self.clocks_tab, "Clocks", self.get_WorldClocks, self.set_WorldClocks)
+
+        self.show_tab()
+        self.notebook.bind("<<NotebookTabChanged>>", self.show_tab)
+        self.root.after_idle(self.ready)
+
+        self.root.mainloop()
+
+    def add_tab(self, tab, text, build, collect):
+        self.notebook.add(tab, text=text, padding=5)
+        self.tabs[tab] = (build, collect)
+
+    def show_tab(self, event=None):
+
+        tab = self.notebook.nametowidget(self.notebook.select())
+        if tab not in self.built:
+            self.built.add(tab)
+            self.tabs[tab][0](tab)
+
+    def ready(self):
+        # Time to interactive: window is shown and idle. It's reported to the running program as well (if opened from it)
+        print(wconstants.CONFIG_READY, int((time.perf_counter() - self.start) * 1000), flush=True)
 
     def get_general(self, tab):
 
@@ -178,6 +196,7 @@ class WeatherConfig:
         self.lat = "0"
         self.lon = "0"
         self.currSuccess = False
+        self.currFailed = False
 
         self.loc = tk.StringVar(master=self.root, value=self.currloc)
         loc = tk.Entry(tab, width=30, textvariable=self.loc)
@@ -222,14 +241,20 @@ class WeatherConfig:
                 self.currSuccess = True
             else:
                 self.currloc = "(Not found)"
+                # Current location can't be used (if Weather tab is not built yet, it's applied then)
+                self.currFailed = True
 
             self.loc.set(self.currloc)
-            self.wloc.set(self.currloc)
-            self.wlat.set(self.lat)
-            self.wlon.set(self.lon)
-            if not self.currSuccess:
-                self.usecurr.set(False)
-                self.curr.config(state=tk.DISABLED)
+            if self.weather_tab in self.built:
+                self.wloc.set(self.currloc)
+                self.wlat.set(self.lat)
+                self.wlon.set(self.lon)
+                self.disable_current()
+
+    def disable_current(self):
+        if self.currFailed:
+            self.usecurr.set("False")
+            self.curr.config(state=tk.DISABLED)
 
     def reset_settings(self, tab):
 
@@ -253,9 +278,11 @@ class WeatherConfig:
 
     def reset_confirm(self):
 
+        # Opened again where it is
+        x, y = self.root.winfo_x(), self.root.winfo_y()
         self.config = reset_settings_file()
         self.terminate()
-        self.run()
+        self.run(x, y)
 
     def set_general(self):
 
@@ -335,6 +362,28 @@ class WeatherConfig:
         self.news.config(height=0)
         self.news.grid(row=15, column=1, sticky=tk.NW, rowspan=4, columnspan=3, padx=self.padx, pady=self.pady)
 
+        self.layer = tk.StringVar(master=self.root, value=self.config[section].get("Static_layer", "False"))
+        layer = tk.Checkbutton(tab, text='Static layer (repaint clock and news only)', variable=self.layer, onvalue="True", offvalue="False")
+        layer.grid(row=19, column=0, columnspan=4, sticky=tk.NW, padx=self.padx, pady=self.pady)
+
+        self.eco = tk.StringVar(master=self.root, value=self.config[section].get("Eco_mode", "False"))
+        eco = tk.Checkbutton(tab, text='Eco mode (*) from', variable=self.eco, onvalue="True", offvalue="False")
+        eco.grid(row=20, column=0, sticky=tk.NW, padx=self.padx, pady=self.pady)
+        self.ecostart = tk.Entry(tab, width=6)
+        self.ecostart.insert(0, self.config[section].get("Eco_start", "01:00"))
+        self.ecostart.grid(row=20, column=1, sticky=tk.NW, padx=self.padx, pady=self.pady)
+        label = tk.Label(tab, text="to")
+        label.grid(row=20, column=2, sticky=tk.NW, padx=self.padx, pady=self.pady)
+        self.ecoend = tk.Entry(tab, width=6)
+        self.ecoend.insert(0, self.config[section].get("Eco_end", "06:00"))
+        self.ecoend.grid(row=20, column=3, sticky=tk.NW, padx=self.padx, pady=self.pady)
+        label = tk.Label(tab, text="(*) " + self.config[section].get("Comment3", ""), wraplength=400, justify=tk.LEFT)
+        label.grid(row=21, column=0, columnspan=5, sticky=tk.NW, padx=self.padx)
+
+        self.canvas = tk.StringVar(master=self.root, value=self.config[section].get("Canvas_renderer", "False"))
+        canvas = tk.Checkbutton(tab, text='Canvas renderer (single widget, fixed layout)', variable=self.canvas, onvalue="True", offvalue="False")
+        canvas.grid(row=22, column=0, columnspan=4, sticky=tk.NW, padx=self.padx, pady=self.pady)
+
     def set_appearance(self):
 
         section = "Appearance"
@@ -348,6 +397,11 @@ class WeatherConfig:
         self.config[section]["Moon_position"] = self.moon.get(tk.ACTIVE)
         self.config[section]["Show_Constellations"] = self.sun.get()
         self.config[section]["News_mode"] = self.news.get(tk.ACTIVE)
+        self.config[section]["Static_layer"] = self.layer.get()
+        self.config[section]["Eco_mode"] = self.eco.get()
+        self.config[section]["Eco_start"] = self.ecostart.get()
+        self.config[section]["Eco_end"] = self.ecoend.get()
+        self.config[section]["Canvas_renderer"] = self.canvas.get()
 
     def get_texts(self, tab):
 
@@ -807,63 +861,38 @@ class WeatherConfig:
         self.curr = tk.Checkbutton(tab, text="Use this current location (If wrong, uncheck and set a new Default location below)",
                                    variable=self.usecurr, onvalue="True", offvalue="False", command=(lambda: self.getLoc(tab)))
         self.curr.grid(row=2, column=0, columnspan=4, sticky=tk.NW, padx=self.gapx, pady=self.pady)
+        self.disable_current()
+
+        label = tk.Label(tab, text="Max. age (hours):")
+        label.grid(row=2, column=4, sticky=tk.NW, padx=self.padx, pady=self.pady)
+        self.maxage = tk.Entry(tab, width=10)
+        self.maxage.insert(0, self.config[section].get("Max_age", "2"))
+        self.maxage.grid(row=2, column=5, sticky=tk.NW, padx=self.padx, pady=self.pady)
 
         label = tk.Label(tab, text="Locations stored on Settings (use Search feature to find and set other locations):")
         label.grid(row=3, column=0, columnspan=3, sticky=tk.NW, padx=self.padx, pady=self.pady)
 
-        label = tk.Label(tab, text="Default:")
-        label.grid(row=4, column=0, sticky=tk.NW, padx=self.gapx, pady=self.pady)
-        self.loc1 = tk.Entry(tab, width=20)
-        self.loc1.insert(0, str(self.config[section]["Locations"][0][0]))
-        self.loc1.grid(row=4, column=1, sticky=tk.NW, padx=self.padx, pady=self.pady)
-
-        label = tk.Label(tab, text="Latitude:")
-        label.grid(row=4, column=2, sticky=tk.NW, padx=self.padx, pady=self.pady)
-        self.lat1 = tk.Entry(tab, width=10)
-        self.lat1.insert(0, str(self.config[section]["Locations"][0][1]).split("lat=")[1].split("&")[0])
-        self.lat1.grid(row=4, column=3, sticky=tk.NW, padx=self.padx, pady=self.pady)
-
-        label = tk.Label(tab, text="Longitude:")
-        label.grid(row=4, column=4, sticky=tk.NW, padx=self.padx, pady=self.pady)
-        self.lon1 = tk.Entry(tab, width=10)
-        self.lon1.insert(0, str(self.config[section]["Locations"][0][1]).split("&lon=")[1])
-        self.lon1.grid(row=4, column=5, sticky=tk.NW, padx=self.padx, pady=self.pady)
+        # Any number of locations (rows left without description are removed when applying)
+        self.locFrame = tk.Frame(tab)
+        self.locFrame.grid(row=4, column=0, columnspan=6, sticky=tk.NW)
+        self.locRows = []
+        for loc in self.config[section]["Locations"]:
+            self.add_location_row(loc)
 
-        label = tk.Label(tab, text="Location 2:")
+        label = tk.Label(tab, text="Prefetched locations:")
         label.grid(row=5, column=0, sticky=tk.NW, padx=self.gapx, pady=self.pady)
-        self.loc2 = tk.Entry(tab, width=20)
-        self.loc2.insert(0, str(self.config[section]["Locations"][1][0]))
-        self.loc2.grid(row=5, column=1, sticky=tk.NW, padx=self.padx, pady=self.pady)
+        self.prefetch = tk.Entry(tab, width=10)
+        self.prefetch.insert(0, self.config[section].get("Prefetch", "3"))
+        self.prefetch.grid(row=5, column=1, sticky=tk.NW, padx=self.padx, pady=self.pady)
 
-        label = tk.Label(tab, text="Latitude:")
+        label = tk.Label(tab, text="Cache (MB):")
         label.grid(row=5, column=2, sticky=tk.NW, padx=self.padx, pady=self.pady)
-        self.lat2 = tk.Entry(tab, width=10)
-        self.lat2.insert(0, str(self.config[section]["Locations"][1][1]).split("lat=")[1].split("&")[0])
-        self.lat2.grid(row=5, column=3, sticky=tk.NW, padx=self.padx, pady=self.pady)
-
-        label = tk.Label(tab, text="Longitude:")
-        label.grid(row=5, column=4, sticky=tk.NW, padx=self.padx, pady=self.pady)
-        self.lon2 = tk.Entry(tab, width=10)
-        self.lon2.insert(0, str(self.config[section]["Locations"][1][1]).split("&lon=")[1])
-        self.lon2.grid(row=5, column=5, sticky=tk.NW, padx=self.padx, pady=self.pady)
+        self.cachemb = tk.Entry(tab, width=10)
+        self.cachemb.insert(0, self.config[section].get("Cache_MB", "2"))
+        self.cachemb.grid(row=5, column=3, sticky=tk.NW, padx=self.padx, pady=self.pady)
 
-        label = tk.Label(tab, text="Location 3:")
-        label.grid(row=6, column=0, sticky=tk.NW, padx=self.gapx, pady=self.pady)
-        self.loc3 = tk.Entry(tab, width=20)
-        self.loc3.insert(0, str(self.config[section]["Locations"][2][0]))
-        self.loc3.grid(row=6, column=1, sticky=tk.NW, padx=self.padx, pady=self.pady)
-
-        label = tk.Label(tab, text="Latitude:")
-        label.grid(row=6, column=2, sticky=tk.NW, padx=self.padx, pady=self.pady)
-        self.lat3 = tk.Entry(tab, width=10)
-        self.lat3.insert(0, str(self.config[section]["Locations"][2][1]).split("lat=")[1].split("&")[0])
-        self.lat3.grid(row=6, column=3, sticky=tk.NW, padx=self.padx, pady=self.pady)
-
-        label = tk.Label(tab, text="Longitude:")
-        label.grid(row=6, column=4, sticky=tk.NW, padx=self.padx, pady=self.pady)
-        self.lon3 = tk.Entry(tab, width=10)
-        self.lon3.insert(0, str(self.config[section]["Locations"][2][1]).split("&lon=")[1])
-        self.lon3.grid(row=6, column=5, sticky=tk.NW, padx=self.padx, pady=self.pady)
+        add = tk.Button(tab, text="Add location", command=(lambda: self.add_location_row(["", "lat=&lon="])))
+        add.grid(row=5, column=5, sticky=tk.NW, padx=self.padx, pady=self.pady)
 
         label = tk.Label(tab, text="Search city coordinates:")
         label.grid(row=7, column=0, columnspan=3, sticky=tk.NW, padx=self.padx, pady=self.pady)
@@ -886,6 +915,29 @@ class WeatherConfig:
         search = tk.Button(tab, text="Search", command=(lambda: self.search(tab)))
         search.grid(row=9, column=5, sticky=tk.NW, padx=self.padx, pady=self.pady)
 
+    def add_location_row(self, loc):
+
+        row = len(self.locRows)
+        label = tk.Label(self.locFrame, text="Default:" if row == 0 else "Location %s:" % (row + 1))
+        label.grid(row=row, column=0, sticky=tk.NW, padx=self.gapx, pady=self.pady)
+        desc = tk.Entry(self.locFrame, width=20)
+        desc.insert(0, str(loc[0]))
+        desc.grid(row=row, column=1, sticky=tk.NW, padx=self.padx, pady=self.pady)
+
+        label = tk.Label(self.locFrame, text="Latitude:")
+        label.grid(row=row, column=2, sticky=tk.NW, padx=self.padx, pady=self.pady)
+        lat = tk.Entry(self.locFrame, width=10)
+        lat.insert(0, str(loc[1]).split("lat=")[1].split("&")[0])
+        lat.grid(row=row, column=3, sticky=tk.NW, padx=self.padx, pady=self.pady)
+
+        label = tk.Label(self.locFrame, text="Longitude:")
+        label.grid(row=row, column=4, sticky=tk.NW, padx=self.padx, pady=self.pady)
+        lon = tk.Entry(self.locFrame, width=10)
+        lon.insert(0, str(loc[1]).split("&lon=")[1])
+        lon.grid(row=row, column=5, sticky=tk.NW, padx=self.padx, pady=self.pady)
+
+        self.locRows.append((desc, lat, lon))
+
     def search(self, tab):
 
         q = urllib.parse.quote(self.city.get() + ("," + self.prov.get() if self.prov.get() else "") + ("," + self.country.get() if self.country.get() else ""))
@@ -930,12 +982,13 @@ class WeatherConfig:
         section = "Weather"
 
         self.config[section]["Use_current"] = self.usecurr.get()
-        self.config[section]["Locations"][0][0] = self.loc1.get()
-        self.config[section]["Locations"][0][1] = "lat=%s&lon=%s" % (self.lat1.get(), self.lon1.get())
-        self.config[section]["Locations"][1][0] = self.loc2.get()
-        self.config[section]["Locations"][1][1] = "lat=%s&lon=%s" % (self.lat2.get(), self.lon2.get())
-        self.config[section]["Locations"][2][0] = self.loc3.get()
-        self.config[section]["Locations"][2][1] = "lat=%s&lon=%s" % (self.lat3.get(), self.lon3.get())
+        self.config[section]["Max_age"] = self.maxage.get()
+        self.config[section]["Prefetch"] = self.prefetch.get()
+        self.config[section]["Cache_MB"] = self.cachemb.get()
+        locations = [[desc.get(), "lat=%s&lon=%s" % (lat.get(), lon.get())]
+                     for desc, lat, lon in self.locRows if desc.get().strip()]
+        if locations:
+            self.config[section]["Locations"] = locations
 
     def get_News(self, tab):
 
@@ -1053,8 +1106,21 @@ class WeatherConfig:
 
 
 def main():
+
+    # Position (-x, -y) is given when opened from the running program
+    x = y = None
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], "x:y:")
+        for opt, arg in opts:
+            if opt == "-x":
+                x = arg
+            elif opt == "-y":
+                y = arg
+    except getopt.GetoptError:
+        pass
+
     app = WeatherConfig()
-    app.run()
+    app.run(x, y)
 
 
 if __name__ == "__main__":
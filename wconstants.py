@@ -22,6 +22,9 @@ FF_HOURLY = "FF_HOURLY"
 NEWS = "NEWS"
 ALERT = "ALERT"
 ONLY_CLOCK = "CLOCK"
+VERSION = "VERSION"
+EVENT_SECTIONS = (NEWS, ONLY_CLOCK)     # Always sent as they come (not diffed against previous emission)
+CLOCK_SECTIONS = (CC, FF_DAILY, FF_HOURLY, MOON, SUNSIGN)  # Cleared when showing world clocks
 
 # Units
 METRIC = 'metric'
@@ -64,6 +67,11 @@ DT_SHADOW = "Shadow"
 DT_FADEIN = "FadeIn"
 DT_FADEOUT = "FadeOut"
 
+# Widget update kinds (see Window.buildWidgetIndex)
+W_LABEL = "label"
+W_COLOR = "color"
+W_IMG = "img"
+
 # Folders
 RESOURCES_FOLDER = 'resources/'
 BKG_FOLDER = RESOURCES_FOLDER + 'wbkg/'
@@ -73,10 +81,19 @@ MOON_W_FOLDER = ICON_FOLDER + ICONSET_REALISTIC
 SUNSIGNS_FOLDER = RESOURCES_FOLDER + 'sunsigns/'
 FONTS_FOLDER = RESOURCES_FOLDER + 'fonts/'
 ALERT_ICONFOLDER = RESOURCES_FOLDER
+CACHE_FOLDER = 'cache/'
+BKG_CACHE_FOLDER = CACHE_FOLDER + 'wbkg/'
+FONTFIT_CACHE_FILE = CACHE_FOLDER + 'fontfit.json'
+TRANSLATION_CACHE_FILE = CACHE_FOLDER + 'translations.json'
+GEOLOC_CACHE_FILE = CACHE_FOLDER + 'geoloc.json'
+WEATHER_CACHE_FOLDER = CACHE_FOLDER + 'weather/'
+QUOTA_FILE = CACHE_FOLDER + 'quota.json'
 
 # Other
 SETTINGS_FILE = "settings.json"
 DEFAULT_SETTINGS_FILE = "defsett.json"
+CONFIG_APPLIED = "SETTINGS APPLIED"     # Reported by wconfig (on its standard output) when new settings are saved
+CONFIG_READY = "SETTINGS READY"         # Reported by wconfig when its window is interactive, followed by time taken (ms)
 HELP_FILE = "help.json"
 ALERT_ICON = "alert"
 SYSTEM_CAPTION = "Weather and News by alef"
@@ -117,6 +134,12 @@ iconSizeF = 140             # Daily forecasts icons
 moonIconSize = 170          # Moon phase icon
 sunsignIconSize = 100       # Sun Sign (Constellation) icon
 alertIconSize = 40          # Alert icon
+pixmapCacheSize = 8 * 1024 * 1024   # Memory budget (bytes) for scaled icons kept in memory (least recently used are discarded)
+bkgCacheQuality = 92                # JPG quality of backgrounds stored in cache (already scaled to display resolution)
+fontFitCacheSize = 256              # Fitted font sizes (location, alerts) kept in cache (oldest are discarded)
+weatherCacheSize = 2 * 1024 * 1024  # Default memory budget (bytes) for weather responses kept in memory (see Cache_MB setting)
+layerTileSize = 32                  # Static layer areas compared to find out what changed (pixels)
+flashTime = 300                     # Time repainted areas are shown when debugging repaints (milliseconds)
 
 # Text Sizes
 # WARNING: They all are relative to screen size (Yaxis)!
@@ -148,9 +171,18 @@ newsTh = Th             # News font size. Warning: text rendering may fail with
 # Note that other providers may (will) have slight differences in their APIs
 NSUB = 4                            # Number of daily forecasts shown (including current day)
 min_update_weather = 15             # Minute multiple in which update weather
-sec_update_weather = 5              # Second in which update weather
-errMax = 8                          # Around 2 hours without a correct weather update (will fall back to world_clocks)
+fast_update_weather = 5             # Minutes between weather updates while there are alerts or conditions are changing
+slow_update_weather = 30            # Minutes between weather updates while conditions are stable
+weatherDailyCalls = 1000            # API calls per day allowed for the key (free plan). Refresh slows down to keep within it
+quotaLockWait = 1                   # Seconds to wait for another instance to store its API calls count
+quotaLockStale = 10                 # Seconds after which a lock on API calls count was left by an instance which ended
+changeSmoothing = 0.3               # Weight of last response when averaging how often responses change (see wrefresh)
+changeFast = 0.6                    # Current conditions changing in at least this share of responses: refresh faster
+changeSlow = 0.2                    # Nothing changing in more than this share of responses: refresh slower
+changeSamples = 4                   # Responses compared before refreshing slower
+eco_update_weather = 60            # Minutes between weather updates while in eco mode
 weatherURL = 'https://api.openweathermap.org/data/2.5/onecall?%s&units=%s&lang=%s&exclude=minutely&appid=' + wkey.openweathermap_key
+prefetchDelay = 60                  # Seconds after starting to begin refreshing other locations in background
 hourly_number = 19                  # Number of hourly forecasts shown
 # degree_sign = u'\N{DEGREE SIGN}'    # Unicode for Degree symbol (https://www.ssewconstants.wiswconstants.edu/~tomw/java/unicode.html)
 degree_sign = "º"
@@ -176,6 +208,11 @@ tempLow = {METRIC: 4,  # Low temp alert (celsius)
 distLimit = {METRIC: 100,  # Current - Default locations distance warning (km)
              IMPERIAL: 62}                    # Current - Default locations distance warning (miles)
 
+# Background jobs (see wsched)
+maxJobs = 5                         # Network jobs running at the same time: all of them (weather, prefetch, news, translation, location)
+jobJitter = 30                      # Random seconds added to / subtracted from periodic jobs intervals
+jobTimeout = 60                     # Seconds after which a job which didn't report its result is considered finished
+
 # News
 nTime = 5 * 60                      # Duration in seconds of news ticker
 min_update_news = 15                # Minutes multiple in which update news
@@ -195,13 +232,19 @@ currentTZSep = "@"                  # Character to identify and show current Tim
 gIPURL = 'http://ip-api.com/json/?lang=%s'     # NO Key required, but not precise (good enough for Time Zone, not for location)
 # gURL = 'https://api.ipgeolocation.io/ipgeo?apiKey=%s' % wkey.ipgeolocation_key  # Or use this instead (more precise, but needs key)
 gURL = 'http://nominatim.openstreetmap.org/search?q=%s&format=json&addressdetails=1'  # No key required. Retrieves coordinates from address
+geolocTTL = 6 * 3600                # Current location is checked again after this time (seconds)
+geolocDelay = 5                     # Seconds after starting to check current location in background
 
 # Translation
 tUrl = "https://api.mymemory.translated.net/get?q=%s&langpair=en|%s"
-
-# HTTP Connection
-# Definitely, requests.get was caching... Maybe "Connection: keep-alive" which seems to be set by default!
-headers = {'Cache-Control': 'no-cache, no-store, max-age=0, pre-check=0, post-check=0, must-revalidate, proxy-revalidate',
-           'Pragma': 'no-cache',
-           'Connection': 'close',
-           'Keep-Alive': 'false'}
+tBatchSep = "\n"                    # Several texts are translated in one request, one per line
+tBatchBytes = 450                   # MyMemory doesn't accept more than 500 bytes per request
+translationCacheSize = 256          # Translated texts (alerts) kept in cache (oldest are discarded)
+translationTTL = 30 * 24 * 3600     # Translations are requested again after this time (seconds)
+
+# HTTP Connection (see wnet)
+# RTVE API returned obsolete news when requested with requests.get (cached on the way?), so it's always requested
+# with these headers and without validators
+noCacheHeaders = {'Cache-Control': 'no-cache, no-store, max-age=0, pre-check=0, post-check=0, must-revalidate, proxy-revalidate',
+                  'Pragma': 'no-cache'}
+netCacheEntries = 20                # Last responses kept to ask the server only if they were modified (ETag / Last-Modified)
@@ -0,0 +1,238 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import time
+
+from PyQt5 import QtWidgets, QtCore, QtGui
+
+import wconstants
+import wmetrics
+
+
+class StaticLayer(QtCore.QObject):
+    # Background and all widgets which only change on data updates (header, current conditions, forecasts...) are
+    # rendered once into an image, which is painted by the background widget. These widgets don't paint themselves,
+    # so each clock tick or marquee frame only repaints the (live) widget itself plus a plain image blit behind it,
+    # instead of all overlapping translucent widgets. Only the changed areas of the layer are repainted when rendered again
+
+    def __init__(self, bkg, widgets, parent=None):
+        QtCore.QObject.__init__(self, parent)
+
+        self.bkg = bkg
+        self.widgets = widgets
+        self.image = None
+        self.capturing = False
+        self.renders = 0
+        self.lastRenderTime = 0.0
+        self.lastDamage = 0
+        wmetrics.register("Static layer", self.stats)
+
+        self.bkg.installEventFilter(self)
+        for w in self.widgets:
+            w.installEventFilter(self)
+
+    def covers(self, obj):
+        return obj is self.bkg or obj in self.widgets
+
+    def eventFilter(self, obj, event):
+
+        if event.type() == QtCore.QEvent.Paint and not self.capturing and self.image is not None:
+            if obj is self.bkg:
+                painter = QtGui.QPainter(obj)
+                painter.drawImage(event.rect(), self.image, event.rect())
+                painter.end()
+            # Static widgets are already in the layer
+            return True
+
+        return False
+
+    def render(self):
+
+        start = time.perf_counter()
+        image = QtGui.QImage(self.bkg.size(), QtGui.QImage.Format_ARGB32_Premultiplied)
+        image.fill(QtCore.Qt.transparent)
+        painter = QtGui.QPainter(image)
+        self.capturing = True
+        try:
+            self.bkg.render(painter, QtCore.QPoint(), QtGui.QRegion(), QtWidgets.QWidget.DrawWindowBackground)
+            origin = self.bkg.mapToGlobal(QtCore.QPoint(0, 0))
+            for w in self.widgets:
+                if w.isVisibleTo(self.bkg.window()):
+                    w.render(painter, w.mapToGlobal(QtCore.QPoint(0, 0)) - origin, QtGui.QRegion(), QtWidgets.QWidget.RenderFlags())
+        finally:
+            self.capturing = False
+            painter.end()
+
+        damage = self.damage(self.image, image)
+        self.image = image
+        self.bkg.update(damage)
+        self.renders += 1
+        self.lastDamage = sum(r.width() * r.height() for r in damage.rects())
+        self.lastRenderTime = time.perf_counter() - start
+
+    @staticmethod
+    def damage(old, new):
+        # Compare both layers by tiles, so only what actually changed is repainted (and sent, e.g. over VNC)
+
+        if old is None or old.size() != new.size():
+            return QtGui.QRegion(new.rect())
+
+        region = QtGui.QRegion()
+        tile = wconstants.layerTileSize
+        for y in range(0, new.height(), tile):
+            for x in range(0, new.width(), tile):
+                rect = QtCore.QRect(x, y, tile, tile).intersected(new.rect())
+                if old.copy(rect) != new.copy(rect):
+                    region += rect
+
+        return region
+
+    def stats(self):
+        return {"renders": self.renders,
+                "last_render_secs": self.lastRenderTime,
+                "last_damage_pixels": self.lastDamage}
+
+
+class RepaintMonitor(QtCore.QObject):
+    # Counts pixels actually repainted by the widgets (overlapping widgets count once each), and optionally
+    # flashes the repainted areas on screen. An application event filter sees every event, so it's only installed
+    # while metrics are shown or repaints are flashed (counts are for that time only)
+
+    def __init__(self, window, layer=None):
+        QtCore.QObject.__init__(self, window)
+
+        self.window = window
+        self.layer = layer
+        self.overlay = None
+        self.paints = 0
+        self.pixels = 0
+        self.periodPixels = 0
+        self.periodStart = time.monotonic()
+        self.pixelsPerSec = 0.0
+        self.metrics = False
+        self.watching = False
+        wmetrics.register("Repaints", self.stats)
+
+    def setMetrics(self, shown):
+        self.metrics = shown
+        self.watch()
+
+    def watch(self):
+
+        watching = self.metrics or self.overlay is not None
+        if watching != self.watching:
+            self.watching = watching
+            if watching:
+                QtWidgets.QApplication.instance().installEventFilter(self)
+            else:
+                QtWidgets.QApplication.instance().removeEventFilter(self)
+
+    def eventFilter(self, obj, event):
+
+        if event.type() == QtCore.QEvent.Paint and obj.isWidgetType() and obj.window() is self.window and obj is not self.overlay:
+            if self.layer is None or obj is self.layer.bkg or not self.layer.covers(obj):
+                region = event.region()
+                if self.overlay is None or not self.overlay.causedBy(obj, region):
+                    self.count(sum(r.width() * r.height() for r in region.rects()))
+                    if self.overlay is not None:
+                        self.overlay.flash(obj, region)
+
+        elif event.type() == QtCore.QEvent.UpdateRequest and obj is self.window and self.overlay is not None:
+            # All widgets repainted by this request come next
+            self.overlay.sync()
+
+        return False
+
+    def count(self, pixels):
+
+        self.paints += 1
+        self.pixels += pixels
+        self.periodPixels += pixels
+        self.rollPeriod()
+
+    def rollPeriod(self):
+
+        now = time.monotonic()
+        elapsed = now - self.periodStart
+        if elapsed >= 1:
+            self.pixelsPerSec = self.periodPixels / elapsed
+            self.periodPixels = 0
+            self.periodStart = now
+
+    def toggleFlash(self):
+
+        if self.overlay is None:
+            self.overlay = FlashOverlay(self.window)
+        else:
+            self.overlay.deleteLater()
+            self.overlay = None
+        self.watch()
+
+        return self.overlay is not None
+
+    def stats(self):
+        self.rollPeriod()
+        return {"pixels_per_sec": int(self.pixelsPerSec),
+                "paint_events": self.paints,
+                "total_pixels": self.pixels}
+
+
+class FlashOverlay(QtWidgets.QWidget):
+    # Shows repainted areas for a moment. Repaints caused by the overlay itself (when showing or clearing them) are ignored:
+    # they are the ones in the areas it invalidated, and happen when the window processes its next update request
+
+    def __init__(self, window):
+        QtWidgets.QWidget.__init__(self, window)
+
+        self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)
+        self.setAttribute(QtCore.Qt.WA_NoSystemBackground)
+        self.setGeometry(window.rect())
+        self.flashes = []
+        self.flashed = QtGui.QRegion()
+        self.pending = QtGui.QRegion(self.rect())
+        self.own = QtGui.QRegion()
+        self.color = QtGui.QColor(255, 0, 0, 96)
+        self.clearTimer = QtCore.QTimer(self)
+        self.clearTimer.timeout.connect(self.clear)
+        self.show()
+        self.raise_()
+
+    def causedBy(self, obj, region):
+        return self.own.contains(region.translated(obj.mapTo(self.window(), QtCore.QPoint(0, 0))).boundingRect())
+
+    def sync(self):
+        self.own = self.pending
+        self.pending = QtGui.QRegion()
+
+    def flash(self, obj, region):
+
+        region = region.translated(obj.mapTo(self.window(), QtCore.QPoint(0, 0)))
+        self.flashes.append((time.monotonic() + wconstants.flashTime / 1000, region))
+        self.flashed += region
+        self.pending += region
+        self.update(region)
+        if not self.clearTimer.isActive():
+            self.clearTimer.start(wconstants.flashTime // 2)
+
+    def clear(self):
+
+        now = time.monotonic()
+        expired = QtGui.QRegion()
+        while self.flashes and self.flashes[0][0] <= now:
+            expired += self.flashes.pop(0)[1]
+        if not expired.isEmpty():
+            self.flashed = QtGui.QRegion()
+            for expiry, region in self.flashes:
+                self.flashed += region
+            self.pending += expired
+            self.update(expired)
+        if not self.flashes:
+            self.clearTimer.stop()
+
+    def paintEvent(self, event):
+
+        if not self.flashed.isEmpty():
+            painter = QtGui.QPainter(self)
+            for rect in (self.flashed & event.region()).rects():
+                painter.fillRect(rect, self.color)
+            painter.end()
@@ -0,0 +1,49 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Runtime counters. Each component registers a function returning its current figures (as a dict), so they
+# can be read while running (Quick Options Menu: "Show/Hide Metrics") without knowing how they are shown
+
+providers = {}
+
+
+def register(name, provider):
+    providers[name] = provider
+
+
+def unregister(name):
+    providers.pop(name, None)
+
+
+def report():
+
+    values = {}
+    for name, provider in providers.items():
+        try:
+            values[name] = provider()
+        except Exception as e:
+            values[name] = {"error": str(e)}
+
+    return values
+
+
+def format_report():
+
+    text = ""
+    for name, values in report().items():
+        text += name + "\n"
+        for key, value in values.items():
+            if isinstance(value, float):
+                value = "%.3f" % value
+            text += "    " + str(key) + ": " + str(value) + "\n"
+
+    return text
+
+
+def unregister_owners(owners):
+    # Removes the functions which are methods of any of the given objects (e.g. the widgets of a replaced window)
+
+    ids = set(id(owner) for owner in owners)
+    for name, provider in list(providers.items()):
+        if id(getattr(provider, "__self__", None)) in ids:
+            providers.pop(name)
@@ -0,0 +1,269 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import json
+import threading
+import time
+import traceback
+import urllib.parse
+
+import requests
+from PyQt5 import QtCore, QtNetwork
+
+import wconstants
+import wmetrics
+import wviews
+
+
+class HostStats:
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.notModified = 0
+        self.lastMs = 0.0
+        self.totalMs = 0.0
+        self.received = 0
+        self.saved = 0
+
+
+class HttpState:
+    # Shared by Engine and Session: last response of sources which send validators (ETag / Last-Modified), to ask
+    # for it again only if modified (304 Not Modified has no body), and counters per host
+
+    def __init__(self, maxEntries):
+        self.lock = threading.Lock()
+        self.maxEntries = maxEntries
+        self.validators = {}    # url: (etag, last_modified, content)
+        self.hosts = {}         # host: HostStats
+
+    def headers(self, url, fresh):
+        # fresh: always download it, asking caches on the way not to answer for the server (see wconstants.noCacheHeaders)
+
+        headers = {}
+        cached = None
+        if fresh:
+            headers.update(wconstants.noCacheHeaders)
+        else:
+            with self.lock:
+                cached = self.validators.get(url)
+            if cached:
+                etag, modified, content = cached
+                if etag:
+                    headers["If-None-Match"] = etag
+                if modified:
+                    headers["If-Modified-Since"] = modified
+        return headers, cached
+
+    def done(self, url, fresh, elapsed, received, content, etag, modified, notModified):
+
+        with self.lock:
+            stats = self.hosts.setdefault(urllib.parse.urlsplit(url).netloc, HostStats())
+            stats.requests += 1
+            stats.lastMs = elapsed
+            stats.totalMs += elapsed
+            stats.received += received
+            # Bytes not transferred thanks to compression or to not modified responses
+            stats.saved += max(0, len(content) - received)
+            if notModified:
+                stats.notModified += 1
+            elif not fresh and (etag or modified):
+                self.validators.pop(url, None)
+                self.validators[url] = (etag, modified, content)
+                while len(self.validators) > self.maxEntries:
+                    self.validators.pop(next(iter(self.validators)))
+
+    def failed(self, url, timeout=False):
+
+        with self.lock:
+            stats = self.hosts.setdefault(urllib.parse.urlsplit(url).netloc, HostStats())
+            stats.requests += 1
+            stats.errors += 1
+            if timeout:
+                stats.timeouts += 1
+
+    def stats(self):
+
+        stats = {}
+        with self.lock:
+            for host, h in self.hosts.items():
+                stats[host] = "%d req (%d err, %d timeouts, %d not modified), last %.0f ms, mean %.0f ms, %d KB in, %d KB saved" % \
+                              (h.requests, h.errors, h.timeouts, h.notModified, h.lastMs,
+                               h.totalMs / max(1, h.requests - h.errors), h.received / 1024, h.saved / 1024)
+        return stats
+
+
+class Request(QtCore.QObject):
+    # A request in progress (see Engine.get). finished is emitted once, with a wviews.Result holding response
+    # content (bytes) or the error, unless it's cancelled
+
+    finished = QtCore.pyqtSignal(object)
+
+    def __init__(self, url, fresh, cached, parent=None):
+        QtCore.QObject.__init__(self, parent)
+
+        self.url = url
+        self.fresh = fresh
+        self.cached = cached
+        self.reply = None
+        self.timer = None
+        self.start = time.perf_counter()
+        self.timedOut = False
+        self.cancelled = False
+
+    def isRunning(self):
+        return self.reply is not None
+
+    def cancel(self):
+        # Result is discarded (finished is not emitted)
+        if self.reply is not None:
+            self.cancelled = True
+            self.reply.abort()
+
+    def onTimeout(self):
+        if self.reply is not None:
+            self.timedOut = True
+            self.reply.abort()
+
+
+class Engine(QtCore.QObject):
+    # Non-blocking HTTP requests, run by Qt event loop (no threads): any number of them can be in progress at the same
+    # time. Connections are kept alive and reused (Qt keeps a pool per host), responses are requested compressed,
+    # and validators are sent when available (see HttpState)
+
+    def __init__(self, state, parent=None):
+        QtCore.QObject.__init__(self, parent)
+
+        self.state = state
+        self.manager = None
+        self.running = 0
+        self.maxRunning = 0
+        self.cancelled = 0
+
+    def get(self, url, timeout=None, fresh=False, callback=None):
+        # timeout in seconds. callback (optional) is connected to finished signal of returned Request
+
+        if self.manager is None:
+            self.manager = QtNetwork.QNetworkAccessManager(self)
+
+        headers, cached = self.state.headers(url, fresh)
+        request = Request(url, fresh, cached, self)
+        if callback is not None:
+            request.finished.connect(callback)
+        qreq = QtNetwork.QNetworkRequest(QtCore.QUrl(url))
+        qreq.setAttribute(QtNetwork.QNetworkRequest.FollowRedirectsAttribute, True)
+        for key, value in headers.items():
+            qreq.setRawHeader(key.encode("latin-1"), value.encode("latin-1"))
+        request.reply = self.manager.get(qreq)
+        request.reply.finished.connect(lambda: self.onFinished(request))
+        if timeout:
+            request.timer = QtCore.QTimer(request)
+            request.timer.setSingleShot(True)
+            request.timer.timeout.connect(request.onTimeout)
+            request.timer.start(int(timeout * 1000))
+        self.running += 1
+        self.maxRunning = max(self.maxRunning, self.running)
+        return request
+
+    def onFinished(self, request):
+
+        reply = request.reply
+        request.reply = None
+        self.running -= 1
+        if request.timer is not None:
+            request.timer.stop()
+        reply.deleteLater()
+
+        if request.cancelled:
+            self.cancelled += 1
+            request.deleteLater()
+            return
+
+        status = reply.attribute(QtNetwork.QNetworkRequest.HttpStatusCodeAttribute)
+        try:
+            if request.timedOut:
+                raise TimeoutError("No response from %s after %s ms" % (request.url, request.timer.interval()))
+            notModified = status == 304 and request.cached is not None
+            if notModified:
+                content = request.cached[2]
+                received = 0
+            else:
+                if reply.error() != QtNetwork.QNetworkReply.NoError:
+                    raise IOError("%s: %s" % (request.url, reply.errorString()))
+                content = bytes(reply.readAll())
+                # Qt decompresses it, so this is the size on the wire (if sent)
+                length = reply.rawHeader(b"Content-Length")
+                received = int(bytes(length)) if length else len(content)
+            etag = bytes(reply.rawHeader(b"ETag")).decode("latin-1") or None
+            modified = bytes(reply.rawHeader(b"Last-Modified")).decode("latin-1") or None
+        except:
+            self.state.failed(request.url, request.timedOut)
+            result = wviews.Result(error=traceback.format_exc(), sent=time.perf_counter())
+        else:
+            self.state.done(request.url, request.fresh, (time.perf_counter() - request.start) * 1000, received,
+                            content, etag, modified, notModified)
+            result = wviews.Result(data=content, sent=time.perf_counter())
+
+        request.finished.emit(result)
+        request.deleteLater()
+
+    def stats(self):
+        return {"in_progress": self.running,
+                "max_in_progress": self.maxRunning,
+                "cancelled": self.cancelled}
+
+
+class Session:
+    # Blocking requests, for code not running a Qt event loop (wconfig). Like Engine, connections are kept alive (a
+    # pool per host), responses are requested compressed and validators are sent when available
+    # A requests.Session is not meant to be shared by threads, so each thread gets its own one
+
+    def __init__(self, state):
+        self.local = threading.local()
+        self.state = state
+
+    def session(self):
+        s = getattr(self.local, "session", None)
+        if s is None:
+            s = requests.Session()
+            s.headers.update({"Accept-Encoding": "gzip, deflate"})
+            self.local.session = s
+        return s
+
+    def get(self, url, timeout=None, fresh=False):
+        # Returns response content (already decompressed). Raises an exception on errors, as urlopen() did
+
+        headers, cached = self.state.headers(url, fresh)
+
+        start = time.perf_counter()
+        try:
+            with self.session().get(url, headers=headers, timeout=timeout) as response:
+                notModified = response.status_code == 304 and cached is not None
+                if notModified:
+                    content = cached[2]
+                    received = 0
+                    etag = modified = None
+                else:
+                    response.raise_for_status()
+                    content = response.content
+                    received = int(response.headers.get("Content-Length", len(content)))
+                    etag = response.headers.get("ETag")
+                    modified = response.headers.get("Last-Modified")
+        except:
+            self.state.failed(url)
+            raise
+        self.state.done(url, fresh, (time.perf_counter() - start) * 1000, received, content, etag, modified, notModified)
+
+        return content
+
+    def get_json(self, url, timeout=None, fresh=False):
+        # Decoding is needed only by arm-Linux
+        return json.loads(self.get(url, timeout, fresh).decode('utf8'))
+
+
+state = HttpState(wconstants.netCacheEntries)
+wmetrics.register("Network", state.stats)
+engine = Engine(state)
+wmetrics.register("Network engine", engine.stats)
+session = Session(state)
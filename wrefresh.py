@@ -0,0 +1,224 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import os
+import time
+
+import wconstants
+import wkey
+import wmetrics
+
+# Weather refresh rate: faster while there are alerts or conditions are changing, slower while they are stable, and
+# never more calls than the daily limit of the API key (see wconstants.weatherDailyCalls)
+
+SECTIONS = ("current", "alerts", "forecast")
+
+
+class DailyQuota:
+    # Weather API calls made today (UTC, as the provider counts them), by any instance and across restarts (stored
+    # on disk). Calls are refused once the limit is reached. Counters are kept by key, so a new key starts from 0
+
+    def __init__(self, file, limit, key):
+        self.file = file
+        self.limit = limit
+        self.key = hashlib.sha1(key.encode("utf-8")).hexdigest()[:8]
+        self.day = None
+        self.calls = 0
+        self.refused = 0
+
+    def today(self):
+        return time.strftime("%Y-%m-%d", time.gmtime())
+
+    def check(self):
+        # Counters are read again from disk every time, as other instances may have made calls since, and start again
+        # every day. Returns all stored counters
+
+        day = self.today()
+        if self.day != day:
+            self.calls = 0
+        self.day = day
+        try:
+            with open(self.file, encoding='UTF-8') as file:
+                stored = json.load(file)
+            counter = stored.get(self.key, {})
+            if counter.get("day") == day:
+                self.calls = max(self.calls, counter["calls"])
+        except (OSError, ValueError, KeyError, AttributeError):
+            stored = {}
+        return stored
+
+    def left(self):
+        self.check()
+        return max(0, self.limit - self.calls)
+
+    def secondsLeft(self):
+        # Until counters start again (UTC midnight)
+        return 86400 - time.time() % 86400
+
+    def spend(self):
+        # Returns False (and the call must not be made) if there are no calls left today. Count is read and stored
+        # while holding the lock, so two instances can't both spend the last call nor overwrite each other's count
+
+        locked = self.lock()
+        try:
+            stored = self.check()
+            if self.calls >= self.limit:
+                self.refused += 1
+                return False
+            self.calls += 1
+            stored[self.key] = {"day": self.day, "calls": self.calls}
+            self.store(stored)
+            return True
+        finally:
+            if locked:
+                self.unlock()
+
+    def lock(self):
+        # Lock file created exclusively (same on every OS), held just while reading and storing the count. A lock
+        # which is too old was left by an instance which ended holding it. If it can't be taken, count is not locked
+
+        lockFile = self.file + ".lock"
+        deadline = time.monotonic() + wconstants.quotaLockWait
+        while True:
+            try:
+                os.makedirs(os.path.dirname(self.file), exist_ok=True)
+                os.close(os.open(lockFile, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lockFile) > wconstants.quotaLockStale:
+                        os.remove(lockFile)
+                        continue
+                except OSError:
+                    pass
+                if time.monotonic() >= deadline:
+                    print("Error locking API calls count:", lockFile)
+                    return False
+                time.sleep(0.01)
+            except OSError as e:
+                print("Error locking API calls count:", lockFile, e)
+                return False
+
+    def unlock(self):
+        try:
+            os.remove(self.file + ".lock")
+        except OSError:
+            pass
+
+    def store(self, stored):
+
+        try:
+            os.makedirs(os.path.dirname(self.file), exist_ok=True)
+            tmp = self.file + ".tmp"
+            with open(tmp, "w", encoding='UTF-8') as file:
+                json.dump(stored, file)
+            os.replace(tmp, self.file)
+        except OSError as e:
+            print("Error storing API calls count:", self.file, e)
+
+    def stats(self):
+        self.check()
+        elapsed = 86400 - self.secondsLeft()
+        return {"day": self.day,
+                "calls": self.calls,
+                "limit": self.limit,
+                "left": self.left(),
+                "calls_per_hour": self.calls * 3600 / max(60, elapsed),
+                "refused": self.refused}
+
+
+class RefreshPolicy:
+    # Tracks how often successive responses for the location shown actually change (per section), and chooses
+    # next refresh interval (seconds) accordingly, within the calls left today
+
+    def __init__(self, quota):
+        self.quota = quota
+        self.digests = None
+        self.rates = {section: None for section in SECTIONS}
+        self.changed = ()
+        self.responses = 0
+        self.interval = wconstants.min_update_weather * 60
+        self.reason = "normal"
+
+    def reset(self):
+        # Another location: its responses are not compared with previous ones
+        self.digests = None
+
+    @staticmethod
+    def digest(w):
+        # Only what is shown (as shown), so rounding noise is not taken as a change
+
+        cc = w["current"]
+        current = (int(cc["temp"]), int(cc["feels_like"]), cc["weather"][0]["id"], round(cc["wind_speed"]),
+                   cc["pressure"], cc["humidity"], int(cc["uvi"]))
+        alerts = tuple((alert["event"], alert["start"], alert["end"]) for alert in w.get("alerts", ()))
+        # Forecasts are keyed by their time, as they move forward every hour (and day)
+        forecast = {("day", day["dt"]): (int(day["temp"]["max"]), int(day["temp"]["min"]), day["weather"][0]["id"],
+                                         int(round(day["pop"] * 100 / 5))) for day in w["daily"][:wconstants.NSUB]}
+        forecast.update({("hour", hour["dt"]): (int(hour["temp"]), hour["weather"][0]["id"])
+                         for hour in w["hourly"][:wconstants.hourly_number]})
+        return {"current": current, "alerts": alerts, "forecast": forecast}
+
+    @staticmethod
+    def differs(old, new):
+        # Only forecasts for the same times are compared, so a new hour (or day) coming into view is not a change
+        if isinstance(new, dict):
+            return any(old[key] != value for key, value in new.items() if key in old)
+        return old != new
+
+    def update(self, w, alertActive):
+        # Returns next refresh interval, after a new response (decoded)
+
+        digests = self.digest(w)
+        if self.digests is not None:
+            self.responses += 1
+            self.changed = tuple(section for section in SECTIONS if self.differs(self.digests[section], digests[section]))
+            for section in SECTIONS:
+                value = 1.0 if section in self.changed else 0.0
+                rate = self.rates[section]
+                self.rates[section] = value if rate is None else rate + wconstants.changeSmoothing * (value - rate)
+        self.digests = digests
+
+        if alertActive:
+            self.reason = "alert"
+            interval = wconstants.fast_update_weather
+        elif self.rates["current"] is not None and self.rates["current"] >= wconstants.changeFast:
+            self.reason = "changing"
+            interval = wconstants.fast_update_weather
+        elif self.responses >= wconstants.changeSamples and \
+                all(rate is not None and rate <= wconstants.changeSlow for rate in self.rates.values()):
+            self.reason = "stable"
+            interval = wconstants.slow_update_weather
+        else:
+            self.reason = "normal"
+            interval = wconstants.min_update_weather
+        return self.limit(interval * 60)
+
+    def limit(self, interval):
+        # Calls left today are spread along the rest of the day, so refreshing never stops before it ends
+
+        needed = self.quota.secondsLeft() / max(1, self.quota.left())
+        if needed > interval:
+            self.reason = "quota"
+            interval = needed
+        self.interval = interval
+        return interval
+
+    def spare(self, interval):
+        # Calls which can be made today (e.g. to prefetch other locations) without slowing down the location shown
+        return self.quota.left() - self.quota.secondsLeft() / interval
+
+    def stats(self):
+        stats = {"interval_min": self.interval / 60,
+                 "reason": self.reason,
+                 "changed": ", ".join(self.changed) or "-"}
+        for section in SECTIONS:
+            rate = self.rates[section]
+            stats[section + "_change_rate"] = None if rate is None else round(rate, 2)
+        return stats
+
+
+quota = DailyQuota(wconstants.QUOTA_FILE, wconstants.weatherDailyCalls, wkey.openweathermap_key)
+wmetrics.register("Weather API calls", quota.stats)
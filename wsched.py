@@ -0,0 +1,173 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import math
+import random
+import time
+import traceback
+
+from PyQt5 import QtCore
+
+import settings
+import wconstants
+import wmetrics
+
+USER = 0        # Runs requested by the user (keys, menu, config changes) go before periodic ones
+PERIODIC = 1
+
+
+class Job:
+
+    def __init__(self, name, func, interval, jitter, network, timeout):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.network = network
+        self.timeout = timeout
+        self.runs = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.lastRun = None
+
+
+class Scheduler(QtCore.QObject):
+    # Owns all periodic and on-demand background jobs (weather, news...), so they are run from a single queue:
+    #   - Each job has one pending run at most (requesting it again just makes it more urgent), so they never pile up
+    #   - Network jobs are limited to maxRunning at the same time. They are asynchronous: job function returns True if
+    #     it started a request, and finished() must be called when its result arrives (or it's freed after its timeout)
+    #   - Periodic runs are rescheduled from their start time, plus a random jitter, so jobs with the same interval drift
+    #     apart instead of colliding on the same minute
+    # All times are in seconds
+
+    def __init__(self, maxRunning=1, parent=None):
+        QtCore.QObject.__init__(self, parent)
+
+        self.maxRunning = maxRunning
+        self.jobs = {}
+        self.pending = {}       # name: (due, priority, args)
+        self.running = {}       # name: deadline
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.dispatch)
+        self.stopped = False
+        wmetrics.register("Scheduler", self.stats)
+
+    def add(self, name, func, interval=None, jitter=0, delay=None, network=True, timeout=wconstants.jobTimeout):
+        # Periodic jobs are first run after delay (or their interval). Others only run when triggered
+
+        job = Job(name, func, interval, jitter, network, timeout)
+        self.jobs[name] = job
+        if interval:
+            self.queue(name, PERIODIC, self.nextInterval(job) if delay is None else delay)
+
+    def setInterval(self, name, interval):
+
+        job = self.jobs[name]
+        job.interval = interval
+        entry = self.pending.get(name)
+        if entry and entry[1] == PERIODIC:
+            self.pending.pop(name)
+            self.queue(name, PERIODIC, self.nextInterval(job))
+
+    def trigger(self, name, *args, priority=USER, delay=0):
+        self.queue(name, priority, delay, args)
+
+    def cancel(self, name):
+        if self.pending.pop(name, None):
+            self.arm()
+
+    def finished(self, name):
+        if self.running.pop(name, None) is not None:
+            self.arm()
+
+    def stop(self):
+        self.stopped = True
+        self.timer.stop()
+
+    def nextInterval(self, job):
+        return max(1.0, job.interval + random.uniform(-job.jitter, job.jitter))
+
+    def queue(self, name, priority, delay, args=()):
+
+        due = time.monotonic() + delay
+        entry = self.pending.get(name)
+        if entry:
+            # Keep the most urgent run, with the latest arguments
+            due = min(due, entry[0])
+            priority = min(priority, entry[1])
+        self.pending[name] = (due, priority, args)
+        self.arm()
+
+    def busy(self):
+        return sum(1 for name in self.running.keys() if self.jobs[name].network)
+
+    def blocked(self, job):
+        return job.name in self.running or (job.network and self.busy() >= self.maxRunning)
+
+    def arm(self):
+        # Wake up at next due run which can be started, or when a running job times out (and frees its slot)
+
+        if self.stopped:
+            return
+        wake = list(self.running.values())
+        for name, (due, priority, args) in self.pending.items():
+            if not self.blocked(self.jobs[name]):
+                wake.append(due)
+        if wake:
+            self.timer.start(max(0, math.ceil((min(wake) - time.monotonic()) * 1000)))
+        else:
+            self.timer.stop()
+
+    def dispatch(self):
+
+        now = time.monotonic()
+        for name, deadline in list(self.running.items()):
+            if deadline <= now:
+                if settings.debug: print("JOB TIMEOUT", name, time.strftime("%H:%M:%S"))
+                self.jobs[name].timeouts += 1
+                self.running.pop(name)
+
+        ready = sorted((priority, due, name) for name, (due, priority, args) in self.pending.items() if due <= now)
+        for priority, due, name in ready:
+            job = self.jobs[name]
+            if self.blocked(job):
+                job.waits += 1
+            else:
+                self.run(job, self.pending.pop(name)[2])
+
+        self.arm()
+
+    def run(self, job, args):
+        if settings.debug: print("JOB", job.name, args, time.strftime("%H:%M:%S"))
+
+        now = time.monotonic()
+        job.runs += 1
+        job.lastRun = now
+        self.running[job.name] = now + job.timeout
+        if job.interval:
+            self.queue(job.name, PERIODIC, self.nextInterval(job))
+        try:
+            started = job.func(*args)
+        except:
+            print(traceback.format_exc())
+            started = False
+        if not started:
+            self.running.pop(job.name, None)
+
+    def queueView(self):
+        # Pending runs in the order they would start, as "name (user|periodic) in N s"
+
+        now = time.monotonic()
+        view = []
+        for due, priority, name in sorted((due, priority, name) for name, (due, priority, args) in self.pending.items()):
+            view.append("%s (%s) in %d s" % (name, "user" if priority == USER else "periodic", max(0, due - now)))
+        return view
+
+    def stats(self):
+
+        stats = {"running": ", ".join(self.running.keys()) or "-",
+                 "queue": " | ".join(self.queueView()) or "-"}
+        for name, job in self.jobs.items():
+            stats[name] = "runs %s, waits %s, timeouts %s" % (job.runs, job.waits, job.timeouts)
+        return stats
@@ -9,32 +9,39 @@ import platform
 import signal
 import subprocess
 import sys
-import threading
 import time
 import traceback
-import urllib.request
 import urllib.parse
 import xml.etree.ElementTree as ET
 
 import bkgutils
 import qtutils
-import requests
 import utils
 import webutils
 import pywinctl as pwc
 from PyQt5 import QtWidgets, QtCore, QtGui
 
 import settings
+import wcache
+import wcanvas
+import wcolors
 import wconfig
 import wconstants
+import wlayer
+import wmetrics
+import wnet
+import wrefresh
+import wsched
+import wtime
 import wutils
+import wviews
 import zoneinfo
 from wthrnews_ui import Ui_MainWindow
 
 
 class Window(QtWidgets.QMainWindow, Ui_MainWindow):
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, warm=None, **kwargs):
         QtWidgets.QMainWindow.__init__(self, *args, **kwargs)
 
         self.archOS = platform.platform()
@@ -58,12 +65,17 @@ class Window(QtWidgets.QMainWindow, Ui_MainWindow):
         self.localTZ, self.is_dst = zoneinfo.get_local_tz()
         print("Local Time Zone:", self.localTZ, "/ Daylight Saving Time:", ("+" if time.localtime().tm_isdst >= 0 else "")+str(time.localtime().tm_isdst))
 
-        self.currentWP = bkgutils.getWallpaper()
+        self.currentWP = warm["wallpaper"] if warm else bkgutils.getWallpaper()
         self.parent = self.parent()
         self.setupUi(self)
         self.widgets = self.centralwidget.findChildren(QtCore.QObject)
 
-        x, y, locIndex, ncount, nsource, show_help = self.getOpts()
+        if warm:
+            # Soft restart (see softRestart): same position, location and news as the window it replaces
+            x, y, locIndex, ncount, nsource = warm["opts"]
+            show_help = False
+        else:
+            x, y, locIndex, ncount, nsource, show_help = self.getOpts()
         self.xmax, self.ymax = settings.dispSize
         if settings.setAsWallpaper:
             x, y, self.xmax, self.ymax = pwc.getWorkArea()
@@ -88,16 +100,28 @@ class Window(QtWidgets.QMainWindow, Ui_MainWindow):
         self.labelRatio = 0.8
         self.imgRatio = 1 if self.dispRatio > 4/3 else 0.9
         self.fineTuning = 0.45
+        self.bkgDim = 0
 
-        self.font = qtutils.loadFont(utils.resource_path(__file__, wconstants.FONTS_FOLDER) + wconstants.numberfont)
-        self.convertQtColors()
+        self.font = warm["font"] if warm else qtutils.loadFont(utils.resource_path(__file__, wconstants.FONTS_FOLDER) + wconstants.numberfont)
         self.font_color = settings.clockc
         # self.setToolTip(qtutils.setHTMLStyle('Click the tray icon to show Quick Menu', color="black", bkgcolor="white"))
+        self.model = {}
+        self.versions = {}
         self.location_initPointSize = None
         self.locAdjusted = False
         self.alertAdjusted = False
 
         self.resizeUI()
+        self.ffIndex = {}
+        self.fhIndex = {}
+        self.buildWidgetIndex()
+
+        self.layer = None
+        if settings.staticLayer and not settings.canvasRenderer:
+            live = (self.bkg_img, self.gridLayoutWidget, self.hour_label, self.sep_label, self.minutes_label)
+            static = [w for w in self.widgets if w.isWidgetType() and w not in live]
+            self.layer = wlayer.StaticLayer(self.bkg_img, static, self)
+        self.repaints = wlayer.RepaintMonitor(self, self.layer)
 
         self.marquee = qtutils.Marquee(
             parent=self,
@@ -106,10 +130,19 @@ class Window(QtWidgets.QMainWindow, Ui_MainWindow):
             bkgColor=settings.nBkg,
             direction=QtCore.Qt.RightToLeft
         )
+        self.infoFont = self.cc_other_cond_label.font()
+
+        self.canvas = None
+        if settings.canvasRenderer:
+            # From now on, UI widgets don't exist: the canvas draws all data
+            self.canvas = wcanvas.Canvas(self)
 
         self.update_data = None
-        self.iconf = utils.resource_path(__file__, wconstants.ICON_FOLDER + settings.iconSet)
+        self.iconf = settings.iconFolder
         self.bkg = ""
+        self.update_bkg_obj = None
+        self.update_bkg_thread = None
+        self.updateBkgStart(warm["bkgWorker"] if warm else None)
         self.moon = ""
         self.sunsign = ""
         self.iconNow = ""
@@ -120,6 +153,8 @@ class Window(QtWidgets.QMainWindow, Ui_MainWindow):
         self.help_label = None
         self.help = ""
         self.showingHelp = False
+        self.metrics_label = None
+        self.showingMetrics = False
         self.onlyClock = False
         self.tzOffset = None
         self.clock1 = None
@@ -128,14 +163,17 @@ class Window(QtWidgets.QMainWindow, Ui_MainWindow):
         self.clock4 = None
         self.oldPos = self.pos()
         self.firstRun = True
+        self.restarts = warm["restarts"] if warm else []
+        wmetrics.register("Restarts", self.restartStats)
 
         if settings.setAsWallpaper:
             pwc.Window(self.winId()).sendBehind()
 
-        self.updateDataStart(locIndex, ncount, nsource)
+        self.updateDataStart(locIndex, ncount, nsource, warm)
 
-        self.menu = Menu(self)
+        self.menu = Menu(self, locations=self.update_data.locations)
         self.menu.menuOption.connect(self.menuOption)
+        self.update_data.locationsChanged.connect(self.menu.setLocations)
         self.menu.show()
 
         if show_help:
@@ -175,30 +213,13 @@ class Window(QtWidgets.QMainWindow, Ui_MainWindow):
 
         return x, y, locIndex, ncount, nsource, show_help
 
-    def convertQtColors(self):
-        settings.cBkg = qtutils.getRGBAfromColorName(QtGui.QColor(settings.cBkg))
-        settings.clockc = qtutils.getRGBAfromColorName(QtGui.QColor(settings.clockc))
-        settings.clockh = qtutils.getRGBAfromColorName(QtGui.QColor(settings.clockh))
-        settings.wc = qtutils.getRGBAfromColorName(QtGui.QColor(settings.wc))
-        settings.chighlight = qtutils.getRGBAfromColorName(QtGui.QColor(settings.chighlight))
-        settings.cdark = qtutils.getRGBAfromColorName(QtGui.QColor(settings.cdark))
-        settings.cdim = qtutils.getRGBAfromColorName(QtGui.QColor(settings.cdim))
-        settings.crcm = qtutils.getRGBAfromColorName(QtGui.QColor(settings.crcm))
-        settings.crcw = qtutils.getRGBAfromColorName(QtGui.QColor(settings.crcw))
-        settings.chigh = qtutils.getRGBAfromColorName(QtGui.QColor(settings.chigh))
-        settings.clow = qtutils.getRGBAfromColorName(QtGui.QColor(settings.clow))
-        settings.byc = qtutils.getRGBAfromColorName(QtGui.QColor(settings.byc))
-        # settings.nBkg = qtutils.getRGBAfromColorName(QtGui.QColor(settings.nBkg))
-        # settings.nc = qtutils.getRGBAfromColorName(QtGui.QColor(settings.nc))
-
     def resizeUI(self):
 
         self.bkg_img.resize(self.size())
         if settings.showBkg:
             if settings.bkgMode == wconstants.BKG_WEATHER:
-                op = QtWidgets.QGraphicsOpacityEffect(self)
-                op.setOpacity(1 - (settings.dimFactor / 255))
-                self.bkg_img.setGraphicsEffect(op)
+                # Background is dimmed when prepared (see UpdateBkg), instead of using a costly QGraphicsOpacityEffect
+                self.bkgDim = settings.dimFactor
                 self.bkg_img.setAutoFillBackground(True)
             elif settings.bkgMode == wconstants.BKG_SOLID:
                 self.bkg_img.clear()
@@ -208,10 +229,17 @@ class Window(QtWidgets.QMainWindow, Ui_MainWindow):
             self.bkg_img.setStyleSheet(qtutils.setBkgColorAlpha(qtutils.setBkgColor(self.bkg_img.styleSheet(), settings.cBkg), 0))
         self.gridLayoutWidget.resize(self.xmax, self.ymax)
 
+        # Text colors are set using palettes (see wcolors), so "color:" rules must not be inherited from parents
+        # Widgets must be polished with their original stylesheets first, or Qt keeps using the stripped rules
+        self.ensurePolished()
+        for w in (self, self.centralwidget, self.gridLayoutWidget):
+            w.setStyleSheet(wcolors.colors.stripColor(w.styleSheet()))
+
         for w in self.widgets:
             if w.objectName()[-6:] == "_label":
                 w.clear()
-                w.setStyleSheet(qtutils.setColor(w.styleSheet(), self.font_color))
+                w.setStyleSheet(wcolors.colors.stripColor(w.styleSheet()))
+                wcolors.colors.setColor(w, self.font_color)
                 font = w.font()
                 font.setPointSize(int(w.font().pointSize() * (self.ymax / wconstants.REF_Y)))
                 w.setFont(font)
@@ -236,8 +264,32 @@ class Window(QtWidgets.QMainWindow, Ui_MainWindow):
             font.setPointSize(int(font.pointSize() * self.labelRatio))
             self.cc_temp_label.setFont(font)
 
-    def updateDataStart(self, locIndex, ncount, nsource):
-        self.update_data = UpdateData(self, self.geometry().width(), self.geometry().height(), locIndex, ncount, nsource)
+    def buildWidgetIndex(self):
+        # Map each forecast (by position) and field of its view (see wviews) to its widget and update kind, so repaints
+        # don't walk (and slice) all widgets. Names are like "ff_max_1_label" (field "max" of first forecast) or "ff_1_img"
+        self.ffIndex = {}
+        self.fhIndex = {}
+        for w in self.widgets:
+            name = w.objectName()
+            prefix = name[:3]
+            if prefix == "ff_":
+                index = self.ffIndex
+            elif prefix == "fh_":
+                index = self.fhIndex
+            else:
+                continue
+            if name[-6:] == "_label":
+                field, number = name[3:-6].rsplit("_", 1)
+                fields = index.setdefault(int(number) - 1, {})
+                fields[field] = (w, wconstants.W_LABEL)
+                if field == "pop":
+                    fields["pop_color"] = (w, wconstants.W_COLOR)
+            else:
+                fields = index.setdefault(int(name[3:-4]) - 1, {})
+                fields["icon"] = (w, wconstants.W_IMG)
+
+    def updateDataStart(self, locIndex, ncount, nsource, warm=None):
+        self.update_data = UpdateData(self, self.geometry().width(), self.geometry().height(), locIndex, ncount, nsource, warm)
         self.update_data.dataChanged.connect(self.onDataChanged)
         self.update_data.restart.connect(self.onRestart)
         self.update_data.closeAll.connect(self.closeAll)
@@ -246,14 +298,66 @@ class Window(QtWidgets.QMainWindow, Ui_MainWindow):
     @QtCore.pyqtSlot(dict)
     def onDataChanged(self, data):
 
+        static = any(section not in (wconstants.SEP, wconstants.TIME, wconstants.VERSION) for section in data.keys())
+        if self.canvas:
+            # Canvas repaints are already merged into a single paint event
+            self.applyData(data)
+        elif static and not self.layer:
+            # Each payload is a transaction (see UpdateData.queueData): grid is not repainted until it's fully applied
+            # Enabling updates repaints the whole grid, so this is not done for clock ticks (nor when using static layer)
+            self.gridLayoutWidget.setUpdatesEnabled(False)
+            try:
+                self.applyData(data)
+            finally:
+                self.gridLayoutWidget.setUpdatesEnabled(True)
+        else:
+            self.applyData(data)
+            if static:
+                self.renderLayer()
+
+    def renderLayer(self):
+        # Widgets must be in their final position and size (including pending font fits) before capturing them
+        self.gridLayout.activate()
+        self.repaintHEADER(None, None)
+        self.repaintALERT(None, None)
+        self.gridLayout.activate()
+        self.layer.render()
+
+    def applyData(self, data):
+
         if settings.debug: print(data)
         contents = data.keys()
 
+        # Payloads carry whole snapshots of changed sections: keep the ones shown, so only fields differing from them
+        # are repainted. Snapshots are read-only, so they are kept as they come, not copied
+        self.versions.update(data.get(wconstants.VERSION, {}))
+        if wconstants.ONLY_CLOCK in contents:
+            # Clocks screen clears all weather widgets (see UpdateData.emitData)
+            for section in wconstants.CLOCK_SECTIONS:
+                self.model.pop(section, None)
+        prev = {}
+        for section in contents:
+            if section not in wconstants.EVENT_SECTIONS and section != wconstants.VERSION:
+                prev[section] = self.model.get(section)
+                self.model[section] = data[section]
+
         if wconstants.BKG in contents:
             self.repaintBKG(data[wconstants.BKG])
 
+        if self.canvas:
+            self.canvas.applyData(data, prev)
+        else:
+            self.repaintWidgets(data, prev)
+
+        if self.showingMetrics:
+            self.metrics_label.setText(wmetrics.format_report())
+
+    def repaintWidgets(self, data, prev):
+
+        contents = data.keys()
+
         if wconstants.HEADER in contents or (not self.locAdjusted and self.location_label.isVisible()):
-            self.repaintHEADER(data[wconstants.HEADER] if wconstants.HEADER in contents else None)
+            self.repaintHEADER(data.get(wconstants.HEADER), prev.get(wconstants.HEADER))
 
         if wconstants.MOON in contents:
             self.repaintMOON(data[wconstants.MOON])
@@ -262,27 +366,25 @@ class Window(QtWidgets.QMainWindow, Ui_MainWindow):
             self.repaintSUNSIGN(data[wconstants.SUNSIGN])
 
         if wconstants.SEP in contents:
-            self.repaintSEP(data[wconstants.SEP])
+            self.repaintSEP(data[wconstants.SEP], prev[wconstants.SEP])
 
         if wconstants.TIME in contents:
-            self.repaintTIME(data[wconstants.TIME])
+            self.repaintTIME(data[wconstants.TIME], prev[wconstants.TIME])
 
         if wconstants.CC in contents:
             if self.onlyTime:
                 # We need to remove clocks first when recovering from weather data errors
-                data[wconstants.ONLY_CLOCK] = "hide"
-                self.repaintCLOCK(data[wconstants.ONLY_CLOCK])
-                data.pop(wconstants.ONLY_CLOCK, False)
-            self.repaintCC(data[wconstants.CC])
+                self.repaintCLOCK("hide")
+            self.repaintCC(data[wconstants.CC], prev[wconstants.CC])
 
         if wconstants.ALERT in contents or (not self.alertAdjusted and self.alert_label.isVisible()):
-            self.repaintALERT(data[wconstants.ALERT] if wconstants.ALERT in contents else None)
+            self.repaintALERT(data.get(wconstants.ALERT), prev.get(wconstants.ALERT))
 
         if wconstants.FF_DAILY in contents:
-            self.repaintFF(data[wconstants.FF_DAILY])
+            self.repaintFF(data[wconstants.FF_DAILY], prev[wconstants.FF_DAILY])
 
         if wconstants.FF_HOURLY in contents:
-            self.repaintFH(data[wconstants.FF_HOURLY])
+            self.repaintFH(data[wconstants.FF_HOURLY], prev[wconstants.FF_HOURLY])
 
         if wconstants.NEWS in contents:
             self.repaintNEWS(data[wconstants.NEWS])
@@ -290,173 +392,199 @@ class Window(QtWidgets.QMainWindow, Ui_MainWindow):
         if wconstants.ONLY_CLOCK in contents:
             self.repaintCLOCK(data[wconstants.ONLY_CLOCK])
 
-    def repaintBKG(self, data):
-        if self.bkg != data["bkg"]:
-            self.bkg = data["bkg"]
-            img = QtGui.QPixmap(utils.resource_path(__file__, wconstants.BKG_FOLDER) + self.bkg)
-            img = img.scaled(self.xmax, self.ymax, QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.SmoothTransformation)
-            self.bkg_img.setPixmap(img)
-
-    def repaintHEADER(self, data):
-        if data:
-            self.header_data = data
-            self.day_label.setText(data["day"])
-            self.day_week_label.setText(data["day_week"])
-            self.month_label.setText(data["month"])
-            self.by_label.setText(qtutils.setHTMLStyle(data["source"], color=settings.chighlight, strong=True) + data["by"])
-            self.location_label.setText(data["location"])
-            self.location_label.setVisible(True)
-            self.location_label.setText(data["location"])
-            if not self.location_initPointSize:
-                self.location_initPointSize = self.location_label.font().pointSize()
-            self.locAdjusted = False
+    def updateBkgStart(self, worker=None):
+        if worker:
+            # Already running thread, handed over by the window this one replaces
+            self.update_bkg_obj, self.update_bkg_thread = worker
+        else:
+            self.update_bkg_obj = UpdateBkg()
+            self.update_bkg_thread = QtCore.QThread()
+            self.update_bkg_obj.moveToThread(self.update_bkg_thread)
+            self.update_bkg_thread.start()
+        self.update_bkg_obj.bkgUpdated.connect(self.onBkgUpdated)
+
+    @QtCore.pyqtSlot()
+    def updateBkgStop(self):
+        self.update_bkg_thread.requestInterruption()
+        self.update_bkg_thread.quit()
+        self.update_bkg_thread.wait()
+
+    def repaintBKG(self, view):
+        if self.bkg != view.bkg:
+            self.bkg = view.bkg
+            # Loading and scaling a full-size image takes long on slow devices: prepare it out of the GUI thread
+            QtCore.QMetaObject.invokeMethod(self.update_bkg_obj, 'updateBkg', QtCore.Qt.QueuedConnection,
+                                            QtCore.Q_ARG(str, utils.resource_path(__file__, wconstants.BKG_FOLDER) + self.bkg),
+                                            QtCore.Q_ARG(int, self.xmax),
+                                            QtCore.Q_ARG(int, self.ymax),
+                                            QtCore.Q_ARG(int, self.bkgDim))
+
+    @QtCore.pyqtSlot(str, QtGui.QImage)
+    def onBkgUpdated(self, file, img):
+        # Discard if background changed again while preparing this one
+        if os.path.basename(file) == self.bkg and not img.isNull():
+            if self.canvas:
+                self.canvas.setBackground(img)
+            else:
+                self.bkg_img.setPixmap(QtGui.QPixmap.fromImage(img))
+                if self.layer:
+                    self.renderLayer()
+
+    def repaintHEADER(self, view, prev):
+        if view:
+            changed = view.changes(prev)
+            if "day" in changed:
+                self.day_label.setText(view.day)
+            if "day_week" in changed:
+                self.day_week_label.setText(view.day_week)
+            if "month" in changed:
+                self.month_label.setText(view.month)
+            if "source" in changed or "by" in changed:
+                self.by_label.setText(qtutils.setHTMLStyle(view.source, color=settings.chighlight, strong=True) + view.by)
+            if "location" in changed:
+                self.location_label.setVisible(True)
+                self.location_label.setText(view.location)
+                if not self.location_initPointSize:
+                    self.location_initPointSize = self.location_label.font().pointSize()
+                self.locAdjusted = False
 
         elif not self.locAdjusted and self.location_label.isVisible():
             # This will not take effect until widget is already shown
             self.locAdjusted = True
-            self.location_label.setFont(qtutils.adjustFont(self.location_label, self.location_initPointSize, qtutils.getPlainText(self.location_label)))
+            self.location_label.setFont(wcache.fonts.fit(self.location_label, self.location_initPointSize, qtutils.getPlainText(self.location_label)))
 
-    def repaintMOON(self, data):
-        icon = data.get("moon_icon", "None")
-        if icon == "None":
+    def repaintMOON(self, view):
+        if view.icon is None:
             self.moon_img.clear()
             self.moon = ""
-        elif self.moon != icon or not self.moon_img.pixmap():
-            self.moon = icon
-            size = int(data["moon_icon_size"] * self.imgRatio)
-            img = qtutils.resizeImageWithQT(utils.resource_path(__file__, wconstants.MOON_FOLDER) + self.moon, size, size, expand=False)
+        elif self.moon != view.icon or not self.moon_img.pixmap():
+            self.moon = view.icon
+            img = wcache.pixmaps.pixmap(utils.resource_path(__file__, wconstants.MOON_FOLDER), self.moon, view.size, self.imgRatio)
             self.moon_img.setPixmap(img)
 
-    def repaintSUNSIGN(self, data):
-        if self.sunsign != data["sunsign_icon"]:
-            self.sunsign = data["sunsign_icon"]
-            size = int(data["sunsign_icon_size"] * self.imgRatio)
-            img = qtutils.resizeImageWithQT(utils.resource_path(__file__, wconstants.SUNSIGNS_FOLDER) + self.sunsign, size, size, expand=False)
+    def repaintSUNSIGN(self, view):
+        if self.sunsign != view.icon:
+            self.sunsign = view.icon
+            img = wcache.pixmaps.pixmap(utils.resource_path(__file__, wconstants.SUNSIGNS_FOLDER), self.sunsign, view.size, self.imgRatio)
             self.sunsign_img.setPixmap(img)
 
-    def repaintSEP(self, data):
-        style = qtutils.setColorAlpha(self.sep_label.styleSheet(), data["sep_color"])
-        self.sep_label.setStyleSheet(style)
-        self.sep_label.setText(data["sep"])
-
-    def repaintTIME(self, data):
-        self.hour_label.setText(data["hour"])
-        self.minutes_label.setText(data["minutes"])
-
-    def repaintCC(self, data):
-        if self.iconNow != data["icon_now"]:
-            self.iconNow = data["icon_now"]
-            size = data["icon_now_size"] * self.imgRatio
-            img = qtutils.resizeImageWithQT(utils.resource_path(__file__, data["icon_now_folder"]) + self.iconNow, size, size, expand=False)
+    def repaintSEP(self, view, prev):
+        changed = view.changes(prev)
+        if "alpha" in changed:
+            wcolors.colors.setColor(self.sep_label, self.font_color, view.alpha)
+        if "sep" in changed:
+            self.sep_label.setText(view.sep)
+
+    def repaintTIME(self, view, prev):
+        changed = view.changes(prev)
+        if "hour" in changed:
+            self.hour_label.setText(view.hour)
+        if "minutes" in changed:
+            self.minutes_label.setText(view.minutes)
+
+    def repaintCC(self, view, prev):
+        changed = view.changes(prev)
+        if self.iconNow != view.icon:
+            self.iconNow = view.icon
+            img = wcache.pixmaps.pixmap(utils.resource_path(__file__, view.folder), self.iconNow, view.size, self.imgRatio)
             self.cc_img.setPixmap(img)
             self.cc_img.adjustSize()
-        if "icon_now_moon_icon" in data.keys():
-            if self.moonIconNow != data["icon_now_moon_icon"]:
-                self.moonIconNow = data["icon_now_moon_icon"]
-                size = int(data["icon_now_moon_size"] * self.imgRatio)
-                img2 = qtutils.resizeImageWithQT(utils.resource_path(__file__, wconstants.MOON_W_FOLDER) + self.moonIconNow, size, size, expand=False)
+        if view.moon_icon is not None:
+            if self.moonIconNow != view.moon_icon:
+                self.moonIconNow = view.moon_icon
+                img2 = wcache.pixmaps.pixmap(utils.resource_path(__file__, wconstants.MOON_W_FOLDER), self.moonIconNow, view.moon_size, self.imgRatio)
                 self.cc_moon_img.setPixmap(img2)
                 self.cc_moon_img.adjustSize()
-        else:
+        elif self.moonIconNow:
             self.cc_moon_img.clear()
             self.moonIconNow = ""
-        self.cc_temp_label.setText(data["temp"] + qtutils.setHTMLStyle(wconstants.degree_sign, fontSize=self.cc_temp_label.font().pointSize(), valign="super"))
-        self.cc_temp_text_label.setText(data["temp_text"])
-        self.cc_other_cond_label.setText(data["updated"] + "\n" + data["other_conds_1"] + "\n" + data["other_conds_2"])
+        if "temp" in changed:
+            self.cc_temp_label.setText(view.temp + qtutils.setHTMLStyle(wconstants.degree_sign, fontSize=self.cc_temp_label.font().pointSize(), valign="super"))
+        if "temp_text" in changed:
+            self.cc_temp_text_label.setText(view.temp_text)
+        if "updated" in changed or "other_conds_1" in changed or "other_conds_2" in changed:
+            self.cc_other_cond_label.setText(view.updated + "\n" + view.other_conds_1 + "\n" + view.other_conds_2)
 
-    def repaintALERT(self, data):
+    def repaintALERT(self, view, prev):
 
-        if data:
-            if data["alert"] != "None":
+        if view:
+            if view.text is not None:
                 if not self.showingNews:
                     if not self.alert_img.pixmap():
-                        size = int(data["alert_icon_size"] * self.imgRatio)
-                        img = qtutils.resizeImageWithQT(utils.resource_path(__file__, wconstants.ALERT_ICONFOLDER) + data["alert_icon"], size, size, expand=False)
+                        img = wcache.pixmaps.pixmap(utils.resource_path(__file__, wconstants.ALERT_ICONFOLDER), view.icon, view.icon_size, self.imgRatio)
                         self.alert_img.setPixmap(img)
-                        self.alertPixmapBAK = img
                         self.alert_img.setStyleSheet(self.alert_label.styleSheet())
-                    self.alertPixmap = self.alertPixmapBAK
-                    self.alert_label.setText(qtutils.setHTMLStyle(data["alert"], color=data["alert_color"], strong=True))
+                        wcolors.colors.forget(self.alert_img)
+                        self.alert_img.setPalette(self.alert_label.palette())
+                    self.alert_label.setText(qtutils.setHTMLStyle(view.text, color=view.color, strong=True))
                     self.alertAdjusted = False
             else:
-                self.alertPixmap = None
                 self.alert_img.clear()
                 self.alert_label.clear()
         elif not self.alertAdjusted and self.alert_label.isVisible():
             self.alertAdjusted = True
-            self.alert_label.setFont(qtutils.adjustFont(self.alert_label, self.marquee.font().pointSize(), qtutils.getPlainText(self.alert_label)))
-
-    def repaintFF(self, data):
-        for w in self.widgets:
-            name = w.objectName()
-            prefix = name[:3]
-            suffix = name[-6:]
-            label = name[:-6]
-            if prefix == "ff_":
-                if suffix == "_label":
-                    if "_pop_" in name:
-                        style = qtutils.setColor(w.styleSheet(), data[label+"_color"])
-                        w.setStyleSheet(style)
-                    w.setText(data[label])
-                    w.setFixedHeight(w.fontMetrics().height())
-                else:
-                    size = int(data["ff_icon_size"] * self.imgRatio)
-                    img = qtutils.resizeImageWithQT(self.iconf + data[name], size, size, expand=False)
-                    w.setPixmap(img)
-                    w.adjustSize()
-
-    def repaintFH(self, data):
-
-        keys = data.keys()
-        for w in self.widgets:
-            name = w.objectName()
-            prefix = name[:3]
-            suffix = name[-6:]
-            label = name[:-6]
-            if prefix == "fh_":
-                if suffix == "_label":
-                    if label in keys:
-                        w.setText(data[label])
-                        w.setFixedHeight(w.fontMetrics().height())
-                    else:
-                        w.clear()
-                else:
-                    if name in keys:
-                        size = int(data["fh_icon_size"] * self.imgRatio)
-                        img = qtutils.resizeImageWithQT(self.iconf + data[name], size, size, expand=False)
-                        w.setPixmap(img)
-                        w.adjustSize()
-                    else:
-                        w.clear()
-
-    def repaintNEWS(self, data):
-        if "titles" in data.keys():
+            self.alert_label.setFont(wcache.fonts.fit(self.alert_label, self.marquee.font().pointSize(), qtutils.getPlainText(self.alert_label)))
+
+    def repaintFF(self, views, prevs):
+        self.repaintForecasts(views, prevs, self.ffIndex)
+
+    def repaintFH(self, views, prevs):
+        self.repaintForecasts(views, prevs, self.fhIndex)
+
+    def repaintForecasts(self, views, prevs, index):
+        for i, view in enumerate(views):
+            fields = index.get(i)
+            if fields:
+                for field in view.changes(prevs[i] if prevs else None):
+                    target = fields.get(field)
+                    if target:
+                        w, kind = target
+                        if kind == wconstants.W_IMG:
+                            if view.icon is None:
+                                # Not shown (e.g. repeated icons)
+                                w.clear()
+                            else:
+                                img = wcache.pixmaps.pixmap(self.iconf, view.icon, view.icon_size, self.imgRatio)
+                                w.setPixmap(img)
+                                w.adjustSize()
+                        elif kind == wconstants.W_COLOR:
+                            wcolors.colors.setColor(w, getattr(view, field))
+                        else:
+                            value = getattr(view, field)
+                            if value is None:
+                                w.clear()
+                            else:
+                                w.setText(value)
+                                w.setFixedHeight(w.fontMetrics().height())
+
+    def repaintNEWS(self, view):
+        if view.titles is not None:
             if not self.showingNews:
                 self.showingNews = True
-                self.marquee.setHtml(data["titles"])
+                self.marquee.setHtml(view.titles)
                 self.marquee.show()
                 self.gridLayout.replaceWidget(self.alert_label, self.marquee)
                 self.marquee.start()
                 self.alert_label.hide()
                 self.alert_img.setPixmap(QtGui.QPixmap())
-                self.alert_img.setText(data["nsource"])
+                self.alert_img.setText(view.nsource)
 
-        elif "stop" in data.keys():
+        elif view.stop:
             if self.showingNews:
                 self.showingNews = False
                 self.alert_img.clear()
-                if self.alertPixmap:
-                    self.alert_img.setPixmap(self.alertPixmap)
                 self.alert_img.show()
                 self.alert_label.show()
                 self.gridLayout.replaceWidget(self.marquee, self.alert_label)
                 self.marquee.hide()
                 self.marquee.stop()
+                # Alerts received while news were shown were not painted: show the current one (as wcanvas does)
+                self.repaintALERT(self.model.get(wconstants.ALERT), None)
 
     def repaintHELP(self):
         if not self.help_label:
             self.help_label = QtWidgets.QLabel()
-            self.help_label.setFont(self.cc_other_cond_label.font())
+            self.help_label.setFont(self.infoFont)
             if not self.help:
                 with open(utils.resource_path(__file__, wconstants.RESOURCES_FOLDER) + wconstants.HELP_FILE, encoding='utf-8') as file:
                     self.help = json.load(file)
@@ -471,6 +599,19 @@ class Window(QtWidgets.QMainWindow, Ui_MainWindow):
         self.help_label.show()
         self.showingHelp = True
 
+    def repaintMETRICS(self):
+        if not self.metrics_label:
+            self.metrics_label = QtWidgets.QLabel()
+            self.metrics_label.setFont(self.infoFont)
+            self.metrics_label.setGeometry(int(self.xgap*2), int(self.ygap*2), self.xmax - int(self.xgap*4), self.ymax - int(self.ygap*4))
+            self.metrics_label.setStyleSheet(qtutils.setBkgColorAlpha(self.marquee.styleSheet(), 255))
+            self.metrics_label.setAlignment(QtCore.Qt.AlignTop | QtCore.Qt.AlignLeft)
+            self.layout().addWidget(self.metrics_label)
+        self.metrics_label.setText(wmetrics.format_report())
+        self.metrics_label.show()
+        self.showingMetrics = True
+        self.repaints.setMetrics(True)
+
     def repaintCLOCK(self, data):
         if data == "hide" and self.onlyTime:
             self.hideClocks()
@@ -568,18 +709,66 @@ class Window(QtWidgets.QMainWindow, Ui_MainWindow):
 
     @QtCore.pyqtSlot(int, int, str)
     def onRestart(self, locIndex, ncount, nsource):
-        param = " -x %s -y %s -l %s -n %s -s %s" % (str(self.pos().x()), str(self.pos().y()), str(locIndex), str(ncount), str(nsource))
-        cmd = os.path.abspath(sys.executable)
-        DETACHED_PROCESS = 0x00000008
-        CREATE_NEW_PROCESS_GROUP = 0x00000200
-        if "python" in cmd:
-            cmd += " " + os.path.abspath(__file__) + param
-            subprocess.Popen(cmd, creationflags=DETACHED_PROCESS | CREATE_NEW_PROCESS_GROUP, shell=False, close_fds=True)
+        # New settings are applied by replacing this window within the same process. Starting a new process is
+        # only the fallback if that fails
+        try:
+            self.softRestart(locIndex, ncount, nsource)
+        except:
+            print(traceback.format_exc())
+            self.coldRestart(locIndex, ncount, nsource)
+
+    def softRestart(self, locIndex, ncount, nsource):
+        global win
+        if settings.debug: print("SOFT RESTART", time.strftime("%H:%M:%S"))
+
+        start = time.perf_counter()
+        warm = self.handOver(locIndex, ncount, nsource)
+        settings.reload()
+        win = Window(warm=warm)
+        win.show()
+        self.deleteLater()
+        warm["restarts"].append((time.perf_counter() - start) * 1000)
+
+    def handOver(self, locIndex, ncount, nsource):
+        # Stops this window and returns what the new one can reuse instead of loading it again: background worker thread,
+        # last weather response and font. Decoded pixmaps and font fits are kept anyway (see wcache)
+
+        self.hide()
+        self.menu.trayIcon.hide()
+        self.releaseDesktop()
+        self.update_bkg_obj.bkgUpdated.disconnect(self.onBkgUpdated)
+        warm = self.update_data.handOver()
+        warm["opts"] = (str(self.pos().x()), str(self.pos().y()), locIndex, ncount, nsource)
+        warm["wallpaper"] = self.currentWP
+        warm["font"] = self.font
+        warm["bkgWorker"] = (self.update_bkg_obj, self.update_bkg_thread)
+        warm["restarts"] = self.restarts
+        owned = [self] + self.findChildren(QtCore.QObject)
+        wmetrics.unregister_owners(owned)
+        for obj in owned:
+            if obj.isWidgetType():
+                wcolors.colors.forget(obj)
+        return warm
+
+    def coldRestart(self, locIndex, ncount, nsource):
+        param = ["-x", str(self.pos().x()), "-y", str(self.pos().y()), "-l", str(locIndex), "-n", str(ncount), "-s", str(nsource)]
+        cmd = [os.path.abspath(sys.executable)]
+        if "python" in cmd[0]:
+            cmd.append(os.path.abspath(__file__))
+        if sys.platform == "win32":
+            # These flags only exist on Windows (Popen rejects them elsewhere)
+            flags = {"creationflags": subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
         else:
-            subprocess.Popen(cmd + param, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
-                             creationflags=DETACHED_PROCESS | CREATE_NEW_PROCESS_GROUP, shell=False, close_fds=True)
+            flags = {"start_new_session": True}
+        subprocess.Popen(cmd + param, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL,
+                         shell=False, close_fds=True, **flags)
         self.closeAll()
 
+    def restartStats(self):
+        return {"soft_restarts": len(self.restarts),
+                "last_ms": self.restarts[-1] if self.restarts else None,
+                "max_ms": max(self.restarts) if self.restarts else None}
+
     @QtCore.pyqtSlot(str)
     def menuOption(self, key):
         if key == "H":
@@ -589,8 +778,19 @@ class Window(QtWidgets.QMainWindow, Ui_MainWindow):
             else:
                 self.showingHelp = True
                 self.repaintHELP()
+        elif key == "M":
+            if self.showingMetrics:
+                self.metrics_label.hide()
+                self.showingMetrics = False
+                self.repaints.setMetrics(False)
+            else:
+                self.repaintMETRICS()
+        elif key == "R":
+            self.repaints.toggleFlash()
         elif key == "Q":
             self.closeAll()
+        elif key.startswith("L"):
+            self.update_data.show_location(int(key[1:]))
         else:
             char = QtGui.QKeySequence.fromString(key)[0]
             event = QtGui.QKeyEvent(QtCore.QEvent.KeyPress, char, QtCore.Qt.NoModifier)
@@ -602,6 +802,10 @@ class Window(QtWidgets.QMainWindow, Ui_MainWindow):
             if self.showingHelp:
                 self.help_label.hide()
                 self.showingHelp = False
+            elif self.showingMetrics:
+                self.metrics_label.hide()
+                self.showingMetrics = False
+                self.repaints.setMetrics(False)
             else:
                 self.update_data.catchAction(QtCore.QEvent.Close)
                 self.closeAll()
@@ -624,24 +828,28 @@ class Window(QtWidgets.QMainWindow, Ui_MainWindow):
 
     @QtCore.pyqtSlot()
     def closeAll(self):
+        self.updateBkgStop()
+        self.releaseDesktop()
+        QtWidgets.QApplication.quit()
+
+    def releaseDesktop(self):
         if settings.setAsWallpaper:
             self.setParent(self.parent)
             self.hide()
             # For an unknown reason, it remains in the background, so it requires to force setting previous wallpaper
             bkgutils.setWallpaper(self.currentWP)
-        QtWidgets.QApplication.quit()
 
 
 class Menu(QtWidgets.QWidget):
 
     menuOption = QtCore.pyqtSignal(str)
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, locations=(), **kwargs):
         QtWidgets.QWidget.__init__(self, *args, **kwargs)
 
-        self.setupUI()
+        self.setupUI(locations)
 
-    def setupUI(self):
+    def setupUI(self, locations):
 
         self.contextMenu = QtWidgets.QMenu(self)
         self.contextMenu.setStyleSheet("""
@@ -649,9 +857,7 @@ class Menu(QtWidgets.QWidget):
             QMenu:selected {background-color: #666; color: #fff;}""")
 
         self.locAct = self.contextMenu.addMenu("Select Weather location")
-        self.locAct.addAction(settings.location[0][0], lambda: self.execAction("1"))
-        self.locAct.addAction(settings.location[1][0], lambda: self.execAction("2"))
-        self.locAct.addAction(settings.location[2][0], lambda: self.execAction("3"))
+        self.setLocations(locations)
 
         self.newsAct = self.contextMenu.addMenu("Select News source")
         self.newsAct.addAction(wconstants.NEWS_1, lambda: self.execAction("A"))
@@ -663,6 +869,8 @@ class Menu(QtWidgets.QWidget):
 
         self.contextMenu.addSeparator()
         self.contextMenu.addAction("Show/Hide Help", lambda: self.execAction("H"))
+        self.contextMenu.addAction("Show/Hide Metrics", lambda: self.execAction("M"))
+        self.contextMenu.addAction("Show/Hide Repaints", lambda: self.execAction("R"))
         self.contextMenu.addAction("Quit", lambda: self.execAction("Q"))
 
         self.trayIcon = QtWidgets.QSystemTrayIcon(QtGui.QIcon(utils.resource_path(__file__, wconstants.ICON_FOLDER + wconstants.ICONSET_FLATFULLCOLOR) + wconstants.SYSTEM_ICON), self)
@@ -670,6 +878,13 @@ class Menu(QtWidgets.QWidget):
         self.trayIcon.setToolTip("Weather and News by alef")
         self.trayIcon.show()
 
+    @QtCore.pyqtSlot(list)
+    def setLocations(self, locations):
+        # Also when current location is known, after menu is created (see UpdateData.apply_location)
+        self.locAct.clear()
+        for i, location in enumerate(locations):
+            self.locAct.addAction(location[0], lambda i=i: self.execAction("L%s" % i))
+
     def showMenu(self, pos=QtCore.QPoint(0, 0)):
         self.contextMenu.exec_(self.mapToGlobal(pos))
 
@@ -682,8 +897,9 @@ class UpdateData(QtWidgets.QMainWindow):
     dataChanged = QtCore.pyqtSignal(dict)
     closeAll = QtCore.pyqtSignal()
     restart = QtCore.pyqtSignal(int, int, str)
+    locationsChanged = QtCore.pyqtSignal(list)
 
-    def __init__(self, parent=None, x=None, y=None, locIndex=0, ncount=0, nsource=""):
+    def __init__(self, parent=None, x=None, y=None, locIndex=0, ncount=0, nsource="", warm=None):
         QtWidgets.QMainWindow.__init__(self, parent)
         if settings.debug: print("INIT", time.strftime("%H:%M:%S"))
 
@@ -696,6 +912,17 @@ class UpdateData(QtWidgets.QMainWindow):
         self.ygap = self.ymargin * 3
 
         self.data = {}
+        self.emitted = {}
+        self.versions = {}
+        self.pending = {}
+        self.commitScheduled = False
+        self.queued = 0
+        self.commits = 0
+        wmetrics.register("Repaint transactions", self.transactionStats)
+        self.deliveries = {}
+        self.lastDelivery = {}
+        self.maxDelivery = {}
+        wmetrics.register("Worker results", self.deliveryStats)
 
         # These values will change according to some conditions. "Saving" them to self. variables
         self.firstRun = True
@@ -703,12 +930,20 @@ class UpdateData(QtWidgets.QMainWindow):
         self.bkg = None
         self.prevBkg = None
         self.nsource = (nsource if nsource else wconstants.nsource1)
-        self.nURL = wconstants.nURL1
-        self.dist_limit = 0
-        if settings.use_current_location and not settings.clockMode:
-            self.dist_limit = self.check_location()
-        self.location = settings.location[int(locIndex)][0]
-        self.zip_code = settings.location[int(locIndex)][1]
+        self.nURL = wconstants.nURL1 % settings.lang_code if self.nsource == wconstants.nsource1 else wconstants.nURL2
+        # Network requests in progress, by kind (see fetch)
+        self.requests = {}
+        # If current location is used, it replaces first one when it's away from it (see apply_location). Last known
+        # one is used from the start (if not too old), and it's checked again in background (see update_location)
+        self.locations = list(settings.location)
+        self.home = self.locations[0]
+        self.useCurrent = settings.use_current_location and not settings.clockMode
+        geoloc = wcache.geoloc.get(settings.lang_code) if self.useCurrent else None
+        if geoloc and geoloc[1] < wconstants.geolocTTL:
+            self.apply_location(geoloc[0], refresh=False)
+        locIndex = min(int(locIndex), len(self.locations) - 1)
+        self.location = self.locations[locIndex][0]
+        self.zip_code = self.locations[locIndex][1]
         self.prevMinimized = False
 
         # Settings
@@ -731,8 +966,7 @@ class UpdateData(QtWidgets.QMainWindow):
         self.updateWeather = False
         self.menu = None
         self.menu2 = None
-        self.configRun = None
-        self.configQuit = None
+        self.config = None
         self.showingConfig = False
         self.help = None
         self.changedWhileNews = False
@@ -821,53 +1055,303 @@ class UpdateData(QtWidgets.QMainWindow):
         self.sunset = '20:00'
         self.sn = '20'
 
-        self.update_weather_obj = None
-        self.update_weather_thread = None
-        self.updateWeatherStart()
-        self.update_news_obj = None
-        self.update_news_thread = None
-        self.updateNewsStart()
-
-        self.secTimer = QtCore.QTimer(self)
-        self.secTimer.timeout.connect(self.display_separator)
-        self.secTimer.start(1000)
-        self.weatherTimer = QtCore.QTimer(self)
-        self.weatherTimer.timeout.connect(self.update_weather)
-        self.weatherTimer.start(wconstants.min_update_weather * 60 * 1000)
-        self.configTimer = QtCore.QTimer(self)
-        self.configTimer.timeout.connect(self.check_config)
-        self.newsTimer = QtCore.QTimer(self)
-        self.newsTimer.timeout.connect(self.check_news)
-
-    def check_location(self):
+        # After a soft restart (see Window.softRestart), last weather response and news titles may be shown again
+        # Otherwise, last weather response stored on disk is shown until a new one arrives (see reuse_weather)
+        wcache.weather.resize(settings.weatherCacheSize)
+        self.refresh = wrefresh.RefreshPolicy(wrefresh.quota)
+        self.wRequested = None
+        self.wFetched = None
+        self.wStale = False
+        self.startTime = time.perf_counter()
+        self.firstFrame = None
+        self.warmWeather = warm["weather"] if warm else None
+        if warm and warm["news"] and warm["news"][:2] == (self.nsource, settings.lang_code):
+            self.titlesHead, self.titles = warm["news"][2:]
+
+        # Clock ticks and day events (see wtime)
+        self.clock = wtime.TimeEngine(self)
+        self.clock.second.connect(self.display_separator)
+        self.clock.minute.connect(self.display_time)
+        self.clock.midnight.connect(self.on_midnight)
+        self.clock.sunrise.connect(self.on_sunrise)
+        self.clock.sunset.connect(self.on_sunset)
+        self.clock.start()
+
+        # Weather and news refreshes, and hiding news, are run by the scheduler (see wsched)
+        # News periodic refresh starts half an interval after weather one, so they don't match on the same minute
+        self.scheduler = wsched.Scheduler(wconstants.maxJobs, self)
+        self.scheduler.add("weather", self.update_weather, interval=wconstants.min_update_weather * 60, jitter=wconstants.jobJitter)
+        newsInterval = None
+        if settings.newsMode == wconstants.NEWS_ALWAYSON:
+            newsInterval = 60
+        elif settings.newsMode == wconstants.NEWS_PERIOD:
+            newsInterval = wconstants.min_update_news * 60
+        self.scheduler.add("news", self.refresh_news, interval=newsInterval, jitter=wconstants.jobJitter,
+                           delay=newsInterval / 2 if newsInterval else None)
+        self.scheduler.add("news_stop", self.hide_news, network=False)
+        # Translation requests are queued (see translate), and sent one at a time as any other network job
+        self.tBatches = []
+        self.scheduler.add("translation", self.translate_next)
+        # Other locations are refreshed in background (one at a time, spread along weather refresh interval), so
+        # switching to them shows their weather at once
+        if settings.prefetch and len(self.locations) > 1 and not settings.clockMode:
+            self.scheduler.add("prefetch", self.prefetch_weather,
+                               interval=wconstants.min_update_weather * 60 / min(settings.prefetch, len(self.locations) - 1),
+                               jitter=wconstants.jobJitter / 2, delay=wconstants.prefetchDelay)
+        if self.useCurrent:
+            # Last known location (if any) is already shown: it's checked again in background shortly after starting
+            self.scheduler.add("location", self.update_location, interval=wconstants.geolocTTL,
+                               delay=wconstants.geolocDelay)
+        self.newsShownAt = None
+
+        # Eco mode: CPU usage (process time / wall time) is measured while running normally, to estimate how much is saved
+        self.ecoMode = False
+        self.ecoMark = (time.process_time(), time.monotonic())
+        self.ecoNormalRate = None
+        self.ecoRate = None
+        self.ecoNights = 0
+        self.ecoLastSaved = None
+        self.ecoSaved = 0.0
+        wmetrics.register("Eco mode", self.ecoStats)
+        wmetrics.register("Weather startup", self.startupStats)
+        wmetrics.register("Weather refresh", self.refreshStats)
+
+    def update_location(self):
         if settings.debug: print("GET_LOC", time.strftime("%H:%M:%S"))
 
-        loc = webutils.get_location_by_ip(wconstants.gIPURL % settings.lang_code)
-        if loc:
-            loc1 = (float(loc[3]), float(loc[4]))
-            loc2 = (float(settings.location[0][1].split("lat=")[1].split("&")[0]),
-                    float(settings.location[0][1].split("&lon=")[1]))
-            dist = webutils.get_distanceByCoordinates(loc1, loc2, settings.disp_units)
-            if dist < int(wconstants.distLimit[settings.disp_units]):
-                dist = 0
-            if settings.use_current_location:
-                locations = [(loc[0] + (", " + loc[1] if loc[1] else "") + (", " + loc[2] if loc[2] else ""),
-                              "lat=" + str(loc[3]) + "&lon=" + str(loc[4]))]
-                for i in range(0, len(settings.location)):
-                    locations.append(settings.location[i])
-                settings.location = locations
+        self.fetch("location", wconstants.gIPURL % settings.lang_code, settings.timeout, self.onLocation)
+        return True
+
+    def onLocation(self, result):
+
+        self.scheduler.finished("location")
+        loc = None
+        if result.error is None:
+            try:
+                resp = json.loads(result.data.decode('utf8'))
+                if resp["status"] == "success":
+                    loc = [resp["city"], resp["regionName"], resp["country"], resp["lat"], resp["lon"]]
+            except:
+                print(traceback.format_exc())
+        if not loc:
+            print("Error getting current location. Using default one instead")
+            return
+
+        # Kept by language, since it includes place names
+        wcache.geoloc.put(settings.lang_code, loc)
+        self.apply_location(loc)
+
+    def apply_location(self, loc, refresh=True):
+        # First location is replaced (or restored) only if current one is far enough from it. refresh: update menu and,
+        # if it's the one shown, header and weather (not needed while initializing)
+
+        loc1 = (float(loc[3]), float(loc[4]))
+        loc2 = (float(self.home[1].split("lat=")[1].split("&")[0]),
+                float(self.home[1].split("&lon=")[1]))
+        dist = webutils.get_distanceByCoordinates(loc1, loc2, settings.disp_units)
+        if dist < settings.distLimit:
+            current = self.home
         else:
-            dist = -1
+            current = (loc[0] + (", " + loc[1] if loc[1] else "") + (", " + loc[2] if loc[2] else ""),
+                       "lat=" + str(loc[3]) + "&lon=" + str(loc[4]))
+        if current == self.locations[0]:
+            return
+
+        prev = self.locations[0]
+        self.locations[0] = current
+        if refresh:
+            self.locationsChanged.emit(self.locations)
+            if self.zip_code == prev[1]:
+                self.select_location(current)
+
+    def show_location(self, index):
+        if not settings.clockMode and 0 <= index < len(self.locations):
+            self.user_clockMode = False
+            self.select_location(self.locations[index])
+
+    def select_location(self, location):
+        # Shows another location: its last weather (if any) at once, and requested now if it's not fresh
+
+        self.location, self.zip_code = location
+        self.display_header()
+        self.wLastUpdate = ""
+        self.bkgCodePrev = None
+        # Request for previous location (if any) is no longer needed
+        self.cancel_fetch("weather")
+        self.refresh.reset()
+        if not self.reuse_weather():
+            self.scheduler.trigger("weather", True)
+
+    def prefetch_weather(self):
+        # Refreshes the prefetched location with the oldest weather, if it's not fresh
+
+        if self.ecoMode:
+            return False
+        oldest = None
+        for location in [loc for loc in self.locations if loc[1] != self.zip_code][:settings.prefetch]:
+            age = wcache.weather.age(self.weather_key(location[1]))
+            if age is None:
+                age = float("inf")
+            if oldest is None or age > oldest[0]:
+                oldest = (age, location)
+        if oldest is None or oldest[0] < wconstants.min_update_weather * 60:
+            return False
+        # Only with calls to spare (location shown goes first)
+        if self.refresh.spare(self.refresh.interval) < 1 or not wrefresh.quota.spend():
+            return False
+        if settings.debug: print("PREFETCH", oldest[1][0], time.strftime("%H:%M:%S"))
+
+        zip_code = oldest[1][1]
+        self.fetch("prefetch", self.weather_url(zip_code), settings.timeout,
+                   lambda result: self.onPrefetched(result, self.weather_key(zip_code)))
+        return True
+
+    def onPrefetched(self, result, key):
+
+        self.scheduler.finished("prefetch")
+        try:
+            if result.error is not None:
+                raise IOError(result.error)
+            wcache.weather.put(key, result.data, json.loads(result.data.decode('utf8')), time.time())
+        except:
+            print("Error prefetching Weather for", key)
+
+    def fetch(self, kind, url, timeout, callback, fresh=False):
+        # Non-blocking request (see wnet.Engine). Only one of each kind is kept: a new one cancels the one in progress
+
+        previous = self.requests.pop(kind, None)
+        if previous is not None:
+            previous.cancel()
+        request = wnet.engine.get(url, timeout, fresh)
+
+        def done(result):
+            if self.requests.get(kind) is request:
+                del self.requests[kind]
+            callback(result)
+
+        request.finished.connect(done)
+        self.requests[kind] = request
+
+    def cancel_fetch(self, kind):
+        # Its result won't arrive, so the job which started it (if any, same name) is finished
+        request = self.requests.pop(kind, None)
+        if request is not None:
+            request.cancel()
+            self.scheduler.finished(kind)
+
+    def emitData(self):
+        # Only sections whose snapshot (see wviews) changed since last emission are sent, tagged with their section version
+        # Snapshots are shared as they are: receivers compare them with previous ones to know which fields changed
+
+        delta = {}
+        versions = {}
+        for section, value in self.data.items():
+            if section in wconstants.EVENT_SECTIONS or value != self.emitted.get(section):
+                if section not in wconstants.EVENT_SECTIONS:
+                    self.emitted[section] = value
+                self.versions[section] = self.versions.get(section, 0) + 1
+                versions[section] = self.versions[section]
+                delta[section] = value
+        self.data = {}
+
+        if delta:
+            if wconstants.ONLY_CLOCK in delta:
+                # Clocks screen clears all weather widgets, so they will need to be fully sent again
+                self.invalidate(*wconstants.CLOCK_SECTIONS)
+            delta[wconstants.VERSION] = versions
+            self.queueData(delta)
+
+    def queueData(self, delta):
+        # Payloads produced in the same event loop turn (e.g. header, weather and time at midnight) are merged and
+        # sent as a single transaction when control returns to the event loop, so the Window repaints only once
+
+        if self.pending and (self.hasEvents(self.pending) or self.hasEvents(delta)):
+            # News and clocks events must be applied in order regarding other updates, so they are not merged
+            self.commit()
+
+        self.queued += 1
+        for section, value in delta.items():
+            if section == wconstants.VERSION:
+                self.pending.setdefault(section, {}).update(value)
+            else:
+                # Latest snapshot replaces any former one
+                self.pending[section] = value
+
+        if not self.commitScheduled:
+            self.commitScheduled = True
+            QtCore.QTimer.singleShot(0, self.commit)
+
+    @staticmethod
+    def hasEvents(delta):
+        return any(section in delta for section in wconstants.EVENT_SECTIONS)
 
-        return dist
+    def commit(self):
+
+        self.commitScheduled = False
+        if self.pending:
+            delta = self.pending
+            self.pending = {}
+            self.commits += 1
+            self.dataChanged.emit(delta)
+
+    def transactionStats(self):
+        return {"emissions": self.queued,
+                "commits": self.commits,
+                "merged": self.queued - self.commits - (1 if self.pending else 0)}
+
+    def invalidate(self, *sections):
+        for section in sections:
+            self.emitted.pop(section, None)
 
     def show_all(self):
 
         self.display_header()
         self.display_time()
-        self.update_weather(firstRun=True)
+        if not self.reuse_weather():
+            self.scheduler.trigger("weather", True)
         if self.nCount > 0 and settings.newsMode != wconstants.NEWS_ALWAYSOFF:
-            self.update_news(self.nsource)
+            if self.titles:
+                self.show_news()
+            else:
+                self.scheduler.trigger("news", self.nsource)
+
+    def reuse_weather(self):
+        # Last response (before a soft restart, or else the one stored on disk) is shown at once, if it's not older than
+        # Max_age setting, and parsed again with current settings. If it's still fresh, next refresh is due when it
+        # would have been without restarting. Otherwise it's shown as not updated, until the new one arrives
+
+        url = self.weather_url()
+        if self.warmWeather and self.warmWeather[0] == url:
+            source = "warm"
+            wcc, fetched = self.warmWeather[1:]
+        else:
+            source = "snapshot"
+            snapshot = wcache.weather.get(self.weather_key())
+            if not snapshot:
+                return False
+            wcc, fetched = snapshot
+        self.warmWeather = None
+        age = time.time() - fetched
+        if age >= settings.maxWeatherAge:
+            return False
+        self.wRequested = url
+        self.onWeatherUpdated(wviews.Result(data=wcc), True, fetched, source)
+        if age < self.refresh.interval:
+            self.scheduler.trigger("weather", priority=wsched.PERIODIC, delay=self.refresh.interval - age)
+        else:
+            self.scheduler.trigger("weather")
+        return True
+
+    def handOver(self):
+        # Stops this instance and returns what the one replacing it can reuse (see Window.softRestart). Connections
+        # are kept by the network engine (see wnet), and requests in progress are cancelled
+
+        self.clock.stop()
+        self.scheduler.stop()
+        for kind in list(self.requests.keys()):
+            self.cancel_fetch(kind)
+        return {"weather": (self.wRequested, self.wcc, self.wFetched) if self.wFetched else None,
+                "news": (self.nsource, settings.lang_code, self.titlesHead, self.titles) if self.titles else None}
 
     def display_bkg(self):
         if settings.debug: print("DISP_BKG", time.strftime("%H:%M:%S"))
@@ -879,24 +1363,21 @@ class UpdateData(QtWidgets.QMainWindow):
             else:
                 code = str(wconstants.DEFAULT_BKG)
 
-            # Prepare Background only if changed since last time
-            if code != self.bkgCodePrev:
+            # Prepare Background only if changed since last time (will be done when leaving eco mode)
+            if code != self.bkgCodePrev and not self.ecoMode:
                 self.bkgCodePrev = code
-                data = {"bkg": code + wconstants.BKG_EXT}
-                self.data[wconstants.BKG] = data
+                self.data[wconstants.BKG] = wviews.Background(bkg=code + wconstants.BKG_EXT)
 
     def display_header(self):
         if settings.debug: print("DISP_HEADER", time.strftime("%H:%M:%S"))
 
-        self.data[wconstants.HEADER] = {}
-        self.display_calendar()
-        self.display_by()
-        self.display_location()
+        fields = {}
+        fields.update(self.display_calendar())
+        fields.update(self.display_by())
+        fields.update(self.display_location())
+        self.data[wconstants.HEADER] = wviews.Header(**fields)
         self.display_astronomics()
-        self.dataChanged.emit(self.data)
-        self.data.pop(wconstants.HEADER, False)
-        self.data.pop(wconstants.SUNSIGN, False)
-        self.data.pop(wconstants.MOON, False)
+        self.emitData()
 
     def display_calendar(self):
         if settings.debug: print("DISP_CALENDAR", time.strftime("%H:%M:%S"))
@@ -905,23 +1386,27 @@ class UpdateData(QtWidgets.QMainWindow):
         data = {"day_week": tm[0],
                 "month": tm[1],
                 "day": tm[2]}
-        self.data[wconstants.HEADER].update(data)
+        return data
 
     def display_by(self):
         if settings.debug: print("DISP_BY", time.strftime("%H:%M:%S"))
 
-        data = {"source": wconstants.WEATHER_1,
+        source = wconstants.WEATHER_1
+        if self.wStale and self.wFetched:
+            fetched = time.localtime(self.wFetched)
+            source += " " + time.strftime("%H:%M" if fetched.tm_yday == time.localtime().tm_yday else "%d/%m %H:%M", fetched)
+        data = {"source": source,
                 "by": " | " + wconstants.SYSTEM_CAPTION[-7:]}
-        self.data[wconstants.HEADER].update(data)
+        return data
 
     def display_location(self):
         if settings.debug: print("DISP_LOC", time.strftime("%H:%M:%S"))
 
         if not self.location:
-            self.location = settings.location[0][0]
+            self.location = self.locations[0][0]
 
         data = {"location": self.location}
-        self.data[wconstants.HEADER].update(data)
+        return data
 
     def display_astronomics(self):
         if settings.debug: print("DISP_ASTRO", time.strftime("%H:%M:%S"))
@@ -930,100 +1415,109 @@ class UpdateData(QtWidgets.QMainWindow):
             current_sunsign = wutils.get_constellation()
             if self.sunsign != current_sunsign:
                 self.sunsign = current_sunsign
-                data = {"sunsign_icon": current_sunsign + wconstants.ICON_EXT,
-                        "sunsign_icon_size": wconstants.sunsignIconSize * self.ymax / wconstants.REF_Y}
-                self.data[wconstants.SUNSIGN] = data
+                self.data[wconstants.SUNSIGN] = wviews.Sunsign(icon=current_sunsign + wconstants.ICON_EXT,
+                                                                size=wconstants.sunsignIconSize * self.ymax / wconstants.REF_Y)
 
         self.moon = wutils.convert_moon_phase(wutils.get_moon_position())
         if settings.moonMode in (wconstants.MOON_BOTH, wconstants.MOON_ONHEADER):
             if self.moon != self.prevMoon:
                 self.prevMoon = self.moon
-                data = {"moon_icon": self.moon + wconstants.ICON_EXT,
-                        "moon_icon_size": wconstants.sunsignIconSize * self.ymax / wconstants.REF_Y * 0.7}
-                self.data[wconstants.MOON] = data
+                self.data[wconstants.MOON] = wviews.Moon(icon=self.moon + wconstants.ICON_EXT,
+                                                          size=wconstants.sunsignIconSize * self.ymax / wconstants.REF_Y * 0.7)
 
-    def display_separator(self):
-        if settings.debug: print("DISP_SEP", time.strftime("%H:%M:%S"))
+    def display_separator(self, tm):
+        if settings.debug: print("DISP_SEP", time.strftime("%H:%M:%S", tm))
 
-        seconds = int(time.strftime("%S"))
-        if seconds == 0:
-            self.display_time()
-        else:
-            data = {"sep": ":",
-                    "sep_color": int(255 / (seconds % 2 + 1))}
-            self.data[wconstants.SEP] = data
-
-            self.dataChanged.emit(self.data)
-            self.data.pop(wconstants.SEP, False)
-
-    def display_time(self):
-        if settings.debug: print("DISP_TIME", time.strftime("%H:%M:%S"))
-
-        tm = time.strftime("%H%M%S")
-        hours = tm[:2]
-        minutes = tm[2:4]
-        seconds = tm[4:]
-        data = {"hour": hours, "minutes": minutes}
-        self.data[wconstants.TIME] = data
-        data = {"sep": ":",
-                "sep_color": int(255 / (int(seconds) % 2 + 1))}
-        self.data[wconstants.SEP] = data
-
-        if int(hours) == 0 and int(minutes) == 0:
-            self.display_header()
-            self.onWeatherUpdated({"OK": self.wcc}, False)
+        self.data[wconstants.SEP] = wviews.Separator(sep=":", alpha=int(255 / (tm.tm_sec % 2 + 1)))
+        self.emitData()
 
-        self.nightTime = (self.sunset <= hours+minutes or self.sunrise >= hours+minutes)
-        if self.sunset == hours+minutes or self.sunrise == hours+minutes:
-            self.show_weather()
+    def display_time(self, tm=None):
+        if tm is None:
+            tm = time.localtime()
+        if settings.debug: print("DISP_TIME", time.strftime("%H:%M:%S", tm))
 
-        self.dataChanged.emit(self.data)
-        self.data.pop(wconstants.TIME, False)
-        self.data.pop(wconstants.SEP, False)
+        hours = "%02d" % tm.tm_hour
+        minutes = "%02d" % tm.tm_min
+        self.check_eco(hours + minutes)
+        self.data[wconstants.TIME] = wviews.Time(hour=hours, minutes=minutes)
+        self.data[wconstants.SEP] = wviews.Separator(sep=":", alpha=255 if self.ecoMode else int(255 / (tm.tm_sec % 2 + 1)))
 
-        if not self.showingNews and \
-                (settings.newsMode == wconstants.NEWS_ALWAYSON or
-                 (settings.newsMode == wconstants.NEWS_PERIOD and int(minutes) % wconstants.min_update_news == 0)):
-            self.update_news()
+        self.emitData()
 
-    @QtCore.pyqtSlot()
-    def updateWeatherStart(self):
-        self.update_weather_obj = UpdateWeather()
-        self.update_weather_thread = QtCore.QThread()
-        self.update_weather_obj.moveToThread(self.update_weather_thread)
-        self.update_weather_obj.weatherUpdated.connect(self.onWeatherUpdated)
-        self.update_weather_thread.start()
+    def on_midnight(self, tm):
+        if settings.debug: print("MIDNIGHT", time.strftime("%H:%M:%S", tm))
 
-    @QtCore.pyqtSlot()
-    def updateWeatherStop(self):
-        self.update_weather_thread.requestInterruption()
-        self.update_weather_thread.quit()
-        self.update_weather_thread.wait()
+        self.display_header()
+        if self.wcc:
+            # Forecasts start from the new day (same response: it's as old as it was)
+            self.onWeatherUpdated(wviews.Result(data=self.wcc), False, self.wFetched)
+
+    def on_sunrise(self):
+        self.nightTime = False
+        self.show_weather()
 
-    @QtCore.pyqtSlot(dict, bool)
-    def onWeatherUpdated(self, data, firstRun):
+    def on_sunset(self):
+        self.nightTime = True
+        self.show_weather()
 
-        if "OK" in data.keys():
+    def onWeatherReply(self, result, firstRun):
+        # Response is decoded here (Qt event loop), as it's a small JSON. It's stored on disk as received
+        self.scheduler.finished("weather")
+        if result.error is None:
+            try:
+                # Decoding is needed only by arm-Linux, and only for JSON responses (not XML)
+                content = result.data
+                result = wviews.Result(data=json.loads(content.decode('utf8')), sent=result.sent)
+                wcache.weather.put(self.weather_key(), content, result.data, time.time())
+            except:
+                result = wviews.Result(error=traceback.format_exc(), sent=result.sent)
+        self.onWeatherUpdated(result, firstRun)
+        if result.error is None:
+            # Only actual responses count as samples: next refresh depends on alerts, how often responses change,
+            # and calls left today (see wrefresh)
+            interval = self.refresh.update(self.wcc, bool(self.alert_start))
+            if not self.ecoMode:
+                self.scheduler.setInterval("weather", interval)
+
+    @QtCore.pyqtSlot(object, bool)
+    def onWeatherUpdated(self, result, firstRun, fetched=None, source="network"):
+        # fetched: time of a response which was stored or is parsed again (see reuse_weather, on_midnight)
+        self.delivered("weather", result)
+
+        if result.error is None:
             self.wUpdated = True
             self.wUpdateError = False
-            self.wcc = data["OK"]
+            self.errCount = 0
+            self.wcc = result.data
+            self.wFetched = time.time() if fetched is None else fetched
             self.parse_openweathermap(self.wcc, force=firstRun)
+            self.set_stale(time.time() - self.wFetched >= self.refresh.interval)
 
             if self.onlyTime:
                 self.onlyTime = False
             self.show_weather()
+            if self.firstFrame is None:
+                self.firstFrame = ((time.perf_counter() - self.startTime) * 1000, source, time.time() - self.wFetched)
 
-        elif "KO" in data.keys():
+        else:
             self.wUpdated = False
             self.wUpdateError = True
             self.errCount += 1
-            if firstRun or self.errCount > wconstants.errMax:
+            # Last weather shown is kept (as not updated) until it's older than Max_age setting
+            if self.wFetched is None or time.time() - self.wFetched >= settings.maxWeatherAge:
                 self.onlyTime = True
                 self.show_only_clock()
                 print("No Weather info or obsolete. Falling back to World Clocks")
             else:
+                self.set_stale(time.time() - self.wFetched >= self.refresh.interval)
                 print("Error getting Weather update from", settings.wsource, "at", self.last, self.errCount, "times")
-            print(data["KO"])
+            print(result.error)
+
+    def set_stale(self, stale):
+        # Not updated weather shows when it was fetched, next to its source
+        if stale != self.wStale:
+            self.wStale = stale
+            self.display_header()
 
     def update_weather(self, firstRun=False):
         if settings.debug: print("UPD_WEATHER", time.strftime("%H:%M:%S"))
@@ -1033,16 +1527,28 @@ class UpdateData(QtWidgets.QMainWindow):
             try:
                 with open("openweathermap.json", encoding='UTF-8') as file:
                     self.wcc = json.load(file)
-                self.onWeatherUpdated({"OK": self.wcc}, firstRun)
+                self.onWeatherUpdated(wviews.Result(data=self.wcc), firstRun)
             except:
                 errorReading = True
 
         if not settings.debug or errorReading:
+            if not wrefresh.quota.spend():
+                print("Weather API calls limit for today reached. Next update will be tomorrow")
+                return False
             # Get Weather information from source
-            url = wconstants.weatherURL % (self.zip_code, settings.disp_units, settings.lang_code)
-            QtCore.QMetaObject.invokeMethod(self.update_weather_obj, 'updateWeather', QtCore.Qt.QueuedConnection,
-                                            QtCore.Q_ARG(str, url),
-                                            QtCore.Q_ARG(bool, firstRun))
+            self.wRequested = self.weather_url()
+            self.fetch("weather", self.wRequested, settings.timeout, lambda result: self.onWeatherReply(result, firstRun))
+            return True
+
+        # Read from file: no request running
+        return False
+
+    def weather_url(self, zip_code=None):
+        return wconstants.weatherURL % (zip_code or self.zip_code, settings.disp_units, settings.lang_code)
+
+    def weather_key(self, zip_code=None):
+        # Same as weather_url, without API key
+        return "%s&units=%s&lang=%s" % (zip_code or self.zip_code, settings.disp_units, settings.lang_code)
 
     def parse_openweathermap(self, w, force=False):
         if settings.debug: print("PARSE_OPENW", time.strftime("%H:%M:%S"))
@@ -1056,14 +1562,15 @@ class UpdateData(QtWidgets.QMainWindow):
         self.iconNow = wutils.convert_weather_code(str(cc["weather"][0]["id"]))
         self.bkgCode = self.iconNow
         self.temptext = str(cc["weather"][0]["description"]).capitalize()
-        self.wind_speed = str(cc["wind_speed"] * wconstants.windScale[settings.disp_units])
+        self.wind_speed = str(cc["wind_speed"] * settings.windScale)
         self.wind_dir = wutils.convert_win_direction(cc["wind_deg"], settings.lang)
-        self.baro = str("%.2f" % (cc["pressure"] * wconstants.baroScale[settings.disp_units]))
+        self.baro = str("%.2f" % (cc["pressure"] * settings.baroScale))
         self.humid = str(cc["humidity"])
         self.uvi = str(int(cc["uvi"]))
         self.moon = wutils.convert_moon_phase(ff["moon_phase"])
         self.sunrise = time.strftime("%H:%M", time.gmtime(cc["sunrise"] + self.WtzOffset))
         self.sunset = time.strftime("%H:%M", time.gmtime(cc["sunset"] + self.WtzOffset))
+        self.clock.setSunTimes(cc["sunrise"], cc["sunset"])
         hmCurrent = time.strftime("%H:%M")
         self.nightTime = (self.sunset <= hmCurrent or self.sunrise > hmCurrent)
         if self.showBkg and settings.bkgMode == wconstants.BKG_WEATHER:
@@ -1079,12 +1586,16 @@ class UpdateData(QtWidgets.QMainWindow):
         self.alert_start = ""
         self.alert_end = ""
         self.alert = None
-        wind_speed = float(ff["wind_speed"] * wconstants.windScale[settings.disp_units])
+        wind_speed = float(ff["wind_speed"] * settings.windScale)
         uvi = float(ff["uvi"])
         if "alerts" in w.keys() and w["alerts"][0]["end"] > cc["dt"]:
             self.alert_start = time.strftime("%H:%M", time.gmtime(w["alerts"][0]["start"] + self.WtzOffset))
             self.alert_end = time.strftime("%H:%M", time.gmtime(w["alerts"][0]["end"] + self.WtzOffset))
             self.alert = w["alerts"][0]["event"]
+            # Alerts come in English (the rest of them are translated too, to have them ready when they are shown)
+            if settings.lang_code != "en":
+                events = [alert["event"] for alert in w["alerts"] if alert["end"] > cc["dt"]]
+                self.alert = self.translate(events, settings.lang_code).get(self.alert, self.alert)
         elif wind_speed >= wconstants.WindHigh[settings.disp_units]:
             self.alert = settings.texts["121"] + \
                          " - " + str(wind_speed) + " " + wconstants.windSpeed[settings.disp_units]
@@ -1092,8 +1603,6 @@ class UpdateData(QtWidgets.QMainWindow):
             self.alert = settings.texts["120"] + " " + \
                          settings.texts[str(wconstants.uviUnits[min(int(uvi), 11)])] + \
                          " - " + str(uvi)
-        if self.alert and settings.lang_code != "en":
-            self.alert = self.translate(self.alert, settings.lang_code)
 
         # No apparent way to detect if data has already been updated
         wUpdated = False
@@ -1140,19 +1649,78 @@ class UpdateData(QtWidgets.QMainWindow):
 
         return wUpdated
 
-    def translate(self, text, lang):
+    def translate(self, texts, lang):
+        # Returns translations already known (see wcache.TranslationCache). The rest of texts are queued to be requested
+        # (several of them per request), and alert is shown again if its translation arrives
+
+        translated = {}
+        missing = []
+        for text in dict.fromkeys(texts):
+            value = wcache.translations.get(text, lang)
+            if value is None:
+                missing.append(text)
+            else:
+                translated[text] = value
+
+        batches = []
+        size = 0
+        for text in missing:
+            length = len(text.encode("utf-8")) + len(wconstants.tBatchSep)
+            if not batches or size + length > wconstants.tBatchBytes:
+                batches.append([])
+                size = 0
+            batches[-1].append(text)
+            size += length
+        for batch in batches:
+            self.queue_translation(batch, lang)
+
+        return translated
+
+    def queue_translation(self, batch, lang):
+        if (batch, lang) not in self.tBatches:
+            self.tBatches.append((batch, lang))
+            self.scheduler.trigger("translation")
+
+    def translate_next(self):
+        # Scheduler job: requests next queued batch
+
+        if not self.tBatches:
+            return False
+        batch, lang = self.tBatches.pop(0)
+        url = wconstants.tUrl % (urllib.parse.quote(wconstants.tBatchSep.join(batch)), lang)
+        start = time.perf_counter()
+        self.fetch("translation", url, settings.timeout, lambda result: self.onTranslated(result, batch, lang, start))
+        return True
 
-        safeText = urllib.parse.quote(text)
-        url = wconstants.tUrl % (safeText, lang)
+    def onTranslated(self, result, batch, lang, start):
 
+        self.scheduler.finished("translation")
+        if self.tBatches:
+            self.scheduler.trigger("translation")
+
+        translated = None
         try:
-            with requests.get(url, timeout=settings.timeout) as response:
-                res = response.json()
-                translated = res["responseData"]["translatedText"]
+            if result.error is not None:
+                raise IOError(result.error)
+            lines = json.loads(result.data.decode('utf8'))["responseData"]["translatedText"].split(wconstants.tBatchSep)
+            if len(lines) == len(batch):
+                translated = dict(zip(batch, (line.strip() for line in lines)))
         except:
-            translated = text
-
-        return translated
+            print("Error translating:", batch)
+        wcache.translations.done(len(batch), (time.perf_counter() - start) * 1000, translated is not None)
+
+        if translated is None:
+            if len(batch) > 1 and result.error is None:
+                # Lines not kept by translation: one by one then
+                for text in batch:
+                    self.queue_translation([text], lang)
+            return
+
+        wcache.translations.put(translated, lang)
+        if self.alert in translated and lang == settings.lang_code:
+            self.alert = translated[self.alert]
+            self.display_alert()
+            self.emitData()
 
     def show_weather(self):
         if settings.debug: print("SHOW_WEATHER", time.strftime("%H:%M:%S"))
@@ -1167,22 +1735,12 @@ class UpdateData(QtWidgets.QMainWindow):
         self.display_alert()
 
         # Daily Forecasts
-        self.data[wconstants.FF_DAILY] = {}
-        for i in range(wconstants.NSUB):
-            self.display_daily_forecasts(i)
+        self.data[wconstants.FF_DAILY] = tuple(self.display_daily_forecasts(i) for i in range(wconstants.NSUB))
 
         # Hourly Forecasts
-        self.data[wconstants.FF_HOURLY] = {}
-        for i in range(wconstants.hourly_number):
-            self.display_hourly_forecasts(i)
-
-        self.dataChanged.emit(self.data)
-        self.data.pop(wconstants.BKG, False)
-        self.data.pop(wconstants.CC, False)
-        self.data.pop(wconstants.MOON, False)
-        self.data.pop(wconstants.ALERT, False)
-        self.data.pop(wconstants.FF_DAILY, False)
-        self.data.pop(wconstants.FF_HOURLY, False)
+        self.data[wconstants.FF_HOURLY] = tuple(self.display_hourly_forecasts(i) for i in range(wconstants.hourly_number))
+
+        self.emitData()
 
     def display_current_conditions(self):
         if settings.debug: print("DISP_CURR", time.strftime("%H:%M:%S"))
@@ -1206,26 +1764,18 @@ class UpdateData(QtWidgets.QMainWindow):
                 if self.iconC2 is not None:
                     drawMoonWIcon = True
 
-        data = {}
+        moonIcon = moonSize = None
         if drawMoonWIcon:
-            data["icon_now_moon_icon"] = self.iconC2 + wconstants.ICON_EXT
-            data["icon_now_moon_size"] = self.iconScaleC * 0.7
+            moonIcon = self.iconC2 + wconstants.ICON_EXT
+            moonSize = self.iconScaleC * 0.7
 
         if drawMoonPhase:
             self.prevMoon = self.moon
-            self.data[wconstants.MOON] = {"moon_icon": self.moon + wconstants.ICON_EXT,
-                                          "moon_icon_size": wconstants.sunsignIconSize * self.ymax / wconstants.REF_Y}
+            self.data[wconstants.MOON] = wviews.Moon(icon=self.moon + wconstants.ICON_EXT,
+                                                      size=wconstants.sunsignIconSize * self.ymax / wconstants.REF_Y)
         elif settings.moonMode != wconstants.MOON_ONHEADER:
             self.prevMoon = ""
-            self.data[wconstants.MOON] = {"moon_icon": "None"}
-
-        data["icon_now"] = icon + wconstants.ICON_EXT
-        data["icon_now_folder"] = folder
-        data["icon_now_size"] = scale
-        data["temp"] = self.temp
-        data["temp_text"] = self.temptext
-        data["updated"] = settings.texts["106"] + " " + self.last
-        self.data[wconstants.CC] = data
+            self.data[wconstants.MOON] = wviews.Moon()
 
         if settings.debug: print("DISP_OTHER", time.strftime("%H:%M:%S"))
 
@@ -1233,12 +1783,23 @@ class UpdateData(QtWidgets.QMainWindow):
         windspeed = settings.texts["102"] + " " + (
                     "%.0f %s" % (float(self.wind_speed), wconstants.windSpeed[settings.disp_units]))
         winddir = settings.texts["103"] + " " + self.wind_dir
-        self.data[wconstants.CC]["other_conds_1"] = windchill + "   " + windspeed + "   " + winddir
 
         barometer = settings.texts["104"] + " " + self.baro + wconstants.baroUnits[settings.disp_units]
         humidity = settings.texts["105"] + " " + self.humid + "%"
         uvi = "UVI " + settings.texts[str(wconstants.uviUnits[min(int(self.uvi), 11)])]
-        self.data[wconstants.CC]["other_conds_2"] = barometer + "   " + humidity + "   " + uvi
+
+        self.data[wconstants.CC] = wviews.CurrentConditions(
+            icon=icon + wconstants.ICON_EXT,
+            folder=folder,
+            size=scale,
+            moon_icon=moonIcon,
+            moon_size=moonSize,
+            temp=self.temp,
+            temp_text=self.temptext,
+            updated=settings.texts["106"] + " " + self.last,
+            other_conds_1=windchill + "   " + windspeed + "   " + winddir,
+            other_conds_2=barometer + "   " + humidity + "   " + uvi
+        )
 
     def display_alert(self):
         if settings.debug: print("DISP_ALERT", time.strftime("%H:%M:%S"))
@@ -1247,12 +1808,12 @@ class UpdateData(QtWidgets.QMainWindow):
             prefix = ""
             if self.alert_start:
                 prefix = self.alert_start + " - " + self.alert_end + ": "
-            data = {"alert": prefix + self.alert,
-                    "alert_color": settings.chighlight,
-                    "alert_icon": wconstants.ALERT_ICON + wconstants.ICON_EXT,
-                    "alert_icon_size": wconstants.alertIconSize * self.ymax / wconstants.REF_Y}
+            data = wviews.Alert(text=prefix + self.alert,
+                                color=settings.chighlight,
+                                icon=wconstants.ALERT_ICON + wconstants.ICON_EXT,
+                                icon_size=wconstants.alertIconSize * self.ymax / wconstants.REF_Y)
         else:
-            data = {"alert": "None"}
+            data = wviews.Alert()
         self.data[wconstants.ALERT] = data
 
     def display_daily_forecasts(self, subwin):
@@ -1264,71 +1825,101 @@ class UpdateData(QtWidgets.QMainWindow):
         elif int(self.rain[subwin]) >= 20:
             crc = settings.crcm
 
-        data = {"ff_day_" + str(subwin + 1): self.day[subwin],
-                "ff_" + str(subwin + 1) + "_img": self.icon[subwin] + wconstants.ICON_EXT,
-                "ff_icon_size": self.iconScaleF,
-                "ff_max_" + str(subwin + 1): self.temps[subwin][0],
-                "ff_min_" + str(subwin + 1): self.temps[subwin][1],
-                "ff_pop_" + str(subwin + 1): self.rain[subwin] + "%",
-                "ff_pop_" + str(subwin + 1) + "_color": crc}
-        self.data[wconstants.FF_DAILY].update(data)
+        return wviews.DailyForecast(day=self.day[subwin],
+                                    icon=self.icon[subwin] + wconstants.ICON_EXT,
+                                    icon_size=self.iconScaleF,
+                                    max=self.temps[subwin][0],
+                                    min=self.temps[subwin][1],
+                                    pop=self.rain[subwin] + "%",
+                                    pop_color=crc)
 
     def display_hourly_forecasts(self, subwin):
         if settings.debug: print("DISP_HOURLY", time.strftime("%H:%M:%S"))
 
-        data = {"fh_temp_"+str(subwin+1): self.hTemps[subwin]}
+        icon = None
         if self.hIcons[subwin] != self.hIconPrev or subwin == 0:
             self.hIconPrev = self.hIcons[subwin]
-            data["fh_"+str(subwin+1)+"_img"] = self.hIcons[subwin] + wconstants.ICON_EXT
-            data["fh_icon_size"] = int(self.iconScaleF / 2)
-        if subwin % 2 == 0:
-            data["fh_time_"+str(subwin+1)] = self.hHours[subwin]
-        self.data[wconstants.FF_HOURLY].update(data)
+            icon = self.hIcons[subwin] + wconstants.ICON_EXT
+        return wviews.HourlyForecast(temp=self.hTemps[subwin],
+                                     icon=icon,
+                                     icon_size=int(self.iconScaleF / 2),
+                                     time=self.hHours[subwin] if subwin % 2 == 0 else None)
 
     def show_only_clock(self):
         self.data[wconstants.ONLY_CLOCK] = "True"
         self.display_bkg()
-        self.dataChanged.emit(self.data)
-        self.data.pop(wconstants.BKG, False)
-        self.data.pop(wconstants.ONLY_CLOCK, False)
+        self.emitData()
 
-    @QtCore.pyqtSlot()
-    def updateNewsStart(self):
-        self.update_news_obj = UpdateNews()
-        self.update_news_thread = QtCore.QThread()
-        self.update_news_obj.moveToThread(self.update_news_thread)
-        self.update_news_obj.newsUpdated.connect(self.onNewsUpdated)
-        self.update_news_thread.start()
+    def onNewsReply(self, result, nsource):
+        # Parsed into a tuple of titles
 
-    @QtCore.pyqtSlot()
-    def updateNewsStop(self):
-        self.update_news_thread.requestInterruption()
-        self.update_news_thread.quit()
-        self.update_news_thread.wait()
+        if result.error is None:
+            try:
+                if nsource == wconstants.NEWS_1:
+                    titles = self.parse_rtve(result.data, nsource)
+                elif nsource == wconstants.NEWS_2:
+                    titles = self.parse_bbc(result.data, nsource)
+                else:
+                    print("ERROR: Unknown News source. Unable to access/parse it. Check settings!")
+                    titles = ()
+                result = wviews.Result(data=titles, sent=result.sent)
+            except:
+                result = wviews.Result(error=traceback.format_exc(), sent=result.sent)
+        self.onNewsUpdated(result)
 
-    @QtCore.pyqtSlot(dict)
-    def onNewsUpdated(self, data):
+    @staticmethod
+    def parse_rtve(n, nsource):
+        if settings.debug: print("PARSE_RTVE", time.strftime("%H:%M:%S"))
+
+        titles = []
+        n = ET.fromstring(n)
+        try:
+            for item in n.findall('./page/items/com.irtve.plataforma.rest.model.dto.news.NewsDTO'):
+                if len(titles) < wconstants.newsNumber:
+                    titles.append(item.find('longTitle').text)
+                else:
+                    break
+
+        except:
+            print("Error parsing News from:", nsource)
+            print(traceback.format_exc())
+
+        return tuple(titles)
+
+    @staticmethod
+    def parse_bbc(n, nsource):
+        if settings.debug: print("PARSE_BBC", time.strftime("%H:%M:%S"))
+
+        titles = []
+        n = ET.fromstring(n)
+        try:
+            for item in n.findall('./channel/item'):
+                if len(titles) < wconstants.newsNumber:
+                    titles.append(item.find('title').text)
+                else:
+                    break
+        except:
+            print("Error parsing News from:", nsource)
+            print(traceback.format_exc())
+
+        return tuple(titles)
+
+    @QtCore.pyqtSlot(object)
+    def onNewsUpdated(self, result):
         if settings.debug: print("NEWS UPDATED", time.strftime("%H:%M:%S"))
+        self.delivered("news", result)
+        self.scheduler.finished("news")
 
-        if "OK" in data.keys():
-            n = data["OK"]
+        if result.error is None:
             hm = time.strftime('%H:%M')
             self.titlesHead = self.nsource + " " + hm + " | "
-            self.titles = ""
-
-            # Get news from RSS source and parse them into string variable
-            if self.nsource == wconstants.NEWS_1:
-                self.parse_rtve(n)
-            elif self.nsource == wconstants.NEWS_2:
-                self.parse_bbc(n)
-            else:
-                print("ERROR: Unknown News source. Unable to access/parse it. Check settings!")
+            self.titles = "".join(title + settings.separator for title in result.data)
 
-        elif "KO" in data.keys():
+        else:
             print("Error getting News from", self.nsource)
-            print(data["KO"])
+            print(result.error)
 
-        if self.titles:
+        if self.titles and not self.ecoMode:
             self.show_news()
 
         if settings.alternSource:
@@ -1345,138 +1936,185 @@ class UpdateData(QtWidgets.QMainWindow):
         if nsource:
             if nsource == wconstants.nsource1:
                 self.nsource = wconstants.nsource1
-                self.nURL = wconstants.nURL1
+                self.nURL = wconstants.nURL1 % settings.lang_code
             elif nsource == wconstants.nsource2:
                 self.nsource = wconstants.nsource2
                 self.nURL = wconstants.nURL2
 
-        QtCore.QMetaObject.invokeMethod(self.update_news_obj, 'updateNews', QtCore.Qt.QueuedConnection,
-                                        QtCore.Q_ARG(str, self.nURL))
-
-    def parse_rtve(self, n):
-        if settings.debug: print("PARSE_RTVE", time.strftime("%H:%M:%S"))
-
-        n = ET.fromstring(n)
-        try:
-            i = 0
-            for item in n.findall('./page/items/com.irtve.plataforma.rest.model.dto.news.NewsDTO'):
-                if i < wconstants.newsNumber:
-                    self.titles += item.find('longTitle').text + settings.separator
-                    i += 1
-                else:
-                    break
-
-        except:
-            print("Error parsing News from:", self.nsource)
-            print(traceback.format_exc())
-
-    def parse_bbc(self, n):
-        if settings.debug: print("PARSE_BBC", time.strftime("%H:%M:%S"))
-
-        n = ET.fromstring(n)
-        try:
-            i = 0
-            for item in n.findall('./channel/item'):
-                if i < wconstants.newsNumber:
-                    self.titles += item.find('title').text + settings.separator
-                    i += 1
-                else:
-                    break
-        except:
-            print("Error parsing News from:", self.nsource)
-            print(traceback.format_exc())
+        # RTVE API may return obsolete news otherwise (see wconstants.noCacheHeaders)
+        nsource = self.nsource
+        self.fetch("news", self.nURL, settings.timeout*2, lambda result: self.onNewsReply(result, nsource),
+                   fresh=nsource == wconstants.NEWS_1)
+
+        return True
+
+    def refresh_news(self, nsource=None):
+        # Periodic refresh: not while showing news (nor in eco mode). Runs triggered for a news source (user, or news
+        # turned on again) always go on
+        if nsource is None and (self.showingNews or self.ecoMode):
+            return False
+        return self.update_news(nsource)
+
+    def delivered(self, kind, result):
+        # Time from a result being ready (see wnet.Engine) to handling it here
+        if result.sent is not None:
+            latency = (time.perf_counter() - result.sent) * 1000
+            self.deliveries[kind] = self.deliveries.get(kind, 0) + 1
+            self.lastDelivery[kind] = latency
+            self.maxDelivery[kind] = max(self.maxDelivery.get(kind, 0.0), latency)
+
+    def deliveryStats(self):
+        stats = {}
+        for kind in self.deliveries.keys():
+            stats[kind + "_results"] = self.deliveries[kind]
+            stats[kind + "_last_ms"] = self.lastDelivery[kind]
+            stats[kind + "_max_ms"] = self.maxDelivery[kind]
+        return stats
 
     def show_news(self):
         if settings.debug: print("SHOW_NEWS", time.strftime("%H:%M:%S"))
 
         self.nCount = 0
-        self.newsTimer.start(1000)
+        self.newsShownAt = time.monotonic()
+        self.scheduler.cancel("news_stop")
+        self.scheduler.trigger("news_stop", delay=wconstants.nTime)
         self.showingNews = True
-        data = {"nsource": self.titlesHead,
-                "titles": self.titles}
-        self.data[wconstants.NEWS] = data
-        self.dataChanged.emit(self.data)
-        self.data.pop(wconstants.NEWS, False)
+        self.data[wconstants.NEWS] = wviews.News(nsource=self.titlesHead, titles=self.titles)
+        self.emitData()
 
-    def check_news(self):
+    def news_count(self):
+        # Seconds news have been shown
+        return int(time.monotonic() - self.newsShownAt) if self.showingNews else 0
 
-        if self.nCount < wconstants.nTime:
-            self.nCount += 1
-        else:
-            self.newsTimer.stop()
-            data = {"stop": True}
-            self.showingNews = False
-            self.nCount = 0
-            self.data[wconstants.NEWS] = data
-            self.dataChanged.emit(self.data)
-            self.data.pop(wconstants.NEWS, False)
+    def hide_news(self):
+
+        self.scheduler.cancel("news_stop")
+        self.showingNews = False
+        self.nCount = 0
+        self.data[wconstants.NEWS] = wviews.News(stop=True)
+        self.emitData()
+
+    def check_eco(self, hhmm):
+
+        if settings.ecoMode:
+            if settings.ecoStart <= settings.ecoEnd:
+                inside = settings.ecoStart <= hhmm < settings.ecoEnd
+            else:
+                # Schedule spans midnight
+                inside = hhmm >= settings.ecoStart or hhmm < settings.ecoEnd
+            if inside and not self.ecoMode:
+                self.start_eco()
+            elif not inside and self.ecoMode:
+                self.stop_eco()
+
+    def start_eco(self):
+        if settings.debug: print("ECO_START", time.strftime("%H:%M:%S"))
+
+        cpu, wall = self.ecoMark
+        self.ecoMark = (time.process_time(), time.monotonic())
+        if self.ecoMark[1] > wall:
+            self.ecoNormalRate = (self.ecoMark[0] - cpu) / (self.ecoMark[1] - wall)
+        self.ecoMode = True
+
+        # Stopping news also stops the marquee. Background changes and news updates are skipped while in eco mode
+        if self.showingNews:
+            self.hide_news()
+        # Separator doesn't blink and clock is only updated at the beginning of each minute
+        self.scheduler.setInterval("weather", wconstants.eco_update_weather * 60)
+        self.clock.setResolution(60)
+
+    def stop_eco(self):
+        if settings.debug: print("ECO_STOP", time.strftime("%H:%M:%S"))
+
+        cpu, wall = self.ecoMark
+        self.ecoMark = (time.process_time(), time.monotonic())
+        used = self.ecoMark[0] - cpu
+        elapsed = self.ecoMark[1] - wall
+        if elapsed > 0:
+            self.ecoRate = used / elapsed
+            if self.ecoNormalRate is not None:
+                self.ecoNights += 1
+                self.ecoLastSaved = max(0.0, self.ecoNormalRate * elapsed - used)
+                self.ecoSaved += self.ecoLastSaved
+        self.ecoMode = False
+
+        self.scheduler.setInterval("weather", self.refresh.interval)
+        self.clock.setResolution(1)
+        # Refresh weather right away. It will also apply the background for current conditions
+        self.scheduler.trigger("weather")
+
+    def startupStats(self):
+        # Time to first weather shown, from where it came (network, stored on disk or handed over) and how old it was
+        if self.firstFrame is None:
+            return {"first_weather_ms": None}
+        return {"first_weather_ms": self.firstFrame[0],
+                "from": self.firstFrame[1],
+                "age_secs": int(self.firstFrame[2]),
+                "stale": self.wStale}
+
+    def refreshStats(self):
+        stats = self.refresh.stats()
+        stats["weather_age_secs"] = None if self.wFetched is None else int(time.time() - self.wFetched)
+        return stats
+
+    def ecoStats(self):
+        return {"active": self.ecoMode,
+                "nights": self.ecoNights,
+                "normal_cpu_pct": None if self.ecoNormalRate is None else round(self.ecoNormalRate * 100, 2),
+                "eco_cpu_pct": None if self.ecoRate is None else round(self.ecoRate * 100, 2),
+                "last_night_saved_cpu_secs": None if self.ecoLastSaved is None else round(self.ecoLastSaved, 1),
+                "total_saved_cpu_secs": round(self.ecoSaved, 1)}
 
     def show_config(self):
         if not self.showingConfig:
             self.showingConfig = True
-            if self.configRun is None:
-                t = wconfig.WeatherConfig()
-                self.configQuit = threading.Event()  # Using an event to effectively close thread
-                self.configRun = threading.Thread(target=t.run, args=(self.configQuit, self.parent().pos().x(), self.parent().pos().y()))
-            self.configRun.start()
-            self.configTimer.start(1000)
-
-    def check_config(self):
-
-        if not self.configRun.is_alive():
-            self.configTimer.stop()
-            self.showingConfig = False
-            self.configQuit.set()
-            self.configRun.join()
+            if self.config is None:
+                self.config = ConfigEditor(self)
+                self.config.closed.connect(self.check_config)
+            self.config.open(self.parent().pos().x(), self.parent().pos().y())
+
+    @QtCore.pyqtSlot(bool)
+    def check_config(self, applied):
+
+        self.showingConfig = False
+        if applied:
             locIndex = 0
-            for i, code in enumerate(settings.location):
+            for i, code in enumerate(self.locations):
                 if code[1] == self.zip_code:
                     locIndex = i
                     break
-            self.restart.emit(locIndex, self.nCount, self.nsource)
+            self.restart.emit(locIndex, self.news_count(), self.nsource)
 
     def catchAction(self, event):
 
         if isinstance(event, QtGui.QCloseEvent):
-            if self.configRun:
-                self.configQuit.set()
-                self.configRun.join()
-                self.secTimer.stop()
-                self.newsTimer.stop()
-                self.configTimer.stop()
+            if self.config:
+                self.config.close()
+                self.clock.stop()
+                self.scheduler.stop()
 
         if isinstance(event, QtGui.QKeyEvent):
 
             key = event.key()
 
             if key in (QtCore.Qt.Key_Q, QtCore.Qt.Key_Escape):
-                if self.configRun:
-                    self.configQuit.set()
-                    self.configRun.join()
-                    self.secTimer.stop()
-                    self.newsTimer.stop()
-                    self.configTimer.stop()
-
-            elif "1" <= QtGui.QKeySequence(key).toString() <= str(len(settings.location)) and \
+                if self.config:
+                    self.config.close()
+                    self.clock.stop()
+                    self.scheduler.stop()
+
+            elif "1" <= QtGui.QKeySequence(key).toString() <= str(min(9, len(self.locations))) and \
                     not settings.clockMode and self.keyP != key:
-                # Change Weather Location (assigned to numbers) and show Weather
-                locIndex = int(QtGui.QKeySequence(key).toString())
-                self.user_clockMode = False
-                self.location = settings.location[locIndex - 1][0]
-                self.zip_code = settings.location[locIndex - 1][1]
-                self.display_header()
-                self.wLastUpdate = ""
-                self.bkgCodePrev = None
-                self.update_weather(firstRun=True)
+                # Change Weather Location (first 9 ones are assigned to numbers, all of them are in menu) and show Weather
+                self.show_location(int(QtGui.QKeySequence(key).toString()) - 1)
 
             elif key in (QtCore.Qt.Key_A, QtCore.Qt.Key_B) and \
                     not settings.clockMode and self.keyP != key:
                 # Select first (A) or second (B) News source and force update/showing News
                 if key == QtCore.Qt.Key_A:
-                    self.update_news(wconstants.nsource1)
+                    self.scheduler.trigger("news", wconstants.nsource1)
                 elif key == QtCore.Qt.Key_B:
-                    self.update_news(wconstants.nsource2)
-                self.update_news()
+                    self.scheduler.trigger("news", wconstants.nsource2)
 
             elif key == QtCore.Qt.Key_S and not self.showingConfig:
                 self.show_config()
@@ -1485,7 +2123,7 @@ class UpdateData(QtWidgets.QMainWindow):
                 if self.user_clockMode:
                     # Back to Weather mode
                     self.user_clockMode = False
-                    self.update_weather()
+                    self.scheduler.trigger("weather")
                 else:
                     # World Clocks Mode (no weather)
                     self.user_clockMode = True
@@ -1498,54 +2136,95 @@ class UpdateData(QtWidgets.QMainWindow):
         self.show_all()
 
 
-class UpdateWeather(QtCore.QThread):
+class ConfigEditor(QtCore.QObject):
+    # Settings editor (wconfig) runs as a separate process, with its own event loop, so it doesn't interfere with this
+    # one. closed is emitted when it ends, telling if new settings were applied (it reports it on its standard output)
 
-    weatherUpdated = QtCore.pyqtSignal(dict, bool)
+    closed = QtCore.pyqtSignal(bool)
 
     def __init__(self, parent=None):
-        QtCore.QThread.__init__(self, parent)
+        QtCore.QObject.__init__(self, parent)
 
-    @QtCore.pyqtSlot(str, bool)
-    def updateWeather(self, url, firstRun=False):
-        if settings.debug: print("UPD_WEATHER_TH", time.strftime("%H:%M:%S"))
+        self.proc = QtCore.QProcess(self)
+        self.proc.readyReadStandardOutput.connect(self.onOutput)
+        self.proc.finished.connect(self.onFinished)
+        self.proc.errorOccurred.connect(self.onError)
+        self.applied = False
+        self.openedAt = None
+        self.opens = 0
+        self.lastReady = None
+        self.maxReady = None
+        self.lastBuild = None
+        wmetrics.register("Settings editor", self.stats)
 
-        # Get Weather information from source
-        try:
-            with urllib.request.urlopen(url, timeout=settings.timeout) as response:
-                # Decoding is needed only by arm-Linux, and only for JSON responses (not XML)
-                wcc = json.loads(response.read().decode('utf8'))
-                data = {"OK": wcc}
-        except:
-            tb_content = traceback.format_exc()
-            data = {"KO": tb_content}
+    def isRunning(self):
+        return self.proc.state() != QtCore.QProcess.NotRunning
 
-        self.weatherUpdated.emit(data, firstRun)
+    def open(self, x, y):
 
-    def run(self):
-        QtCore.QThread.run(self)
+        cmd = os.path.abspath(sys.executable)
+        if "python" in cmd:
+            args = [os.path.abspath(wconfig.__file__)]
+        else:
+            # Frozen executable: it runs wconfig itself (see __main__)
+            args = ["--config"]
+        self.applied = False
+        self.openedAt = time.perf_counter()
+        self.opens += 1
+        self.proc.start(cmd, args + ["-x", str(x), "-y", str(y)])
+
+    def close(self):
+        if self.isRunning():
+            self.proc.terminate()
+            if not self.proc.waitForFinished(1000):
+                self.proc.kill()
+                self.proc.waitForFinished(1000)
+
+    @QtCore.pyqtSlot()
+    def onOutput(self):
+
+        while self.proc.canReadLine():
+            line = bytes(self.proc.readLine()).decode("utf-8", "ignore").strip()
+            if line == wconstants.CONFIG_APPLIED:
+                self.applied = True
+            elif line.startswith(wconstants.CONFIG_READY):
+                # Time to interactive, from pressing S (including process start), and only building the window
+                self.lastReady = (time.perf_counter() - self.openedAt) * 1000
+                self.maxReady = max(self.maxReady or 0.0, self.lastReady)
+                self.lastBuild = int(line.split()[-1])
+
+    @QtCore.pyqtSlot(int, QtCore.QProcess.ExitStatus)
+    def onFinished(self, exitCode, exitStatus):
+        self.onOutput()
+        self.closed.emit(exitStatus == QtCore.QProcess.NormalExit and self.applied)
 
+    @QtCore.pyqtSlot(QtCore.QProcess.ProcessError)
+    def onError(self, error):
+        if error == QtCore.QProcess.FailedToStart:
+            print("Error opening Settings:", self.proc.errorString())
+            self.closed.emit(False)
 
-class UpdateNews(QtCore.QThread):
+    def stats(self):
+        return {"opened": self.opens,
+                "last_ready_ms": self.lastReady,
+                "max_ready_ms": self.maxReady,
+                "last_window_build_ms": self.lastBuild}
 
-    newsUpdated = QtCore.pyqtSignal(dict)
+
+class UpdateBkg(QtCore.QThread):
+
+    bkgUpdated = QtCore.pyqtSignal(str, QtGui.QImage)
 
     def __init__(self, parent=None):
         QtCore.QThread.__init__(self, parent)
 
-    @QtCore.pyqtSlot(str)
-    def updateNews(self, url):
-
-        # Get news from RSS source and parse them into string variable
-        try:
-            # requests module returns obsolete info (caching?) for rtve API
-            with urllib.request.urlopen(url, timeout=settings.timeout*2) as response:
-                n = response.read()
-                data = {"OK": n}
-        except:
-            tb_content = traceback.format_exc()
-            data = {"KO": tb_content}
+    @QtCore.pyqtSlot(str, int, int, int)
+    def updateBkg(self, file, width, height, dim):
+        if settings.debug: print("UPD_BKG_TH", time.strftime("%H:%M:%S"))
 
-        self.newsUpdated.emit(data)
+        # Scaled (and dimmed) image is taken from disk cache if already prepared on a previous run
+        img = wcache.backgrounds.image(file, width, height, dim)
+        self.bkgUpdated.emit(file, img)
 
     def run(self):
         QtCore.QThread.run(self)
@@ -1565,6 +2244,11 @@ def exception_hook(exctype, value, tb):
 
 
 if __name__ == "__main__":
+    if "--config" in sys.argv[1:]:
+        # Settings editor, when opened from a frozen executable (see ConfigEditor)
+        sys.argv.remove("--config")
+        wconfig.main()
+        sys.exit()
     app = QtWidgets.QApplication(sys.argv)
     if "python" in sys.executable.lower():
         # This will allow to manage Ctl-C interruption (e.g. when running from IDE)
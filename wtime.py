@@ -0,0 +1,128 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import math
+import time
+
+from PyQt5 import QtCore
+
+import wmetrics
+
+
+class TimeEngine(QtCore.QObject):
+    # Clock ticks aligned to wall-clock boundaries: a single-shot timer is re-armed on every tick to fire at the
+    # next second (or minute, see setResolution()), so timer drift or a busy event loop never accumulates
+    # Events are found by comparing current time with the one of previous tick, not by expecting a tick on each
+    # second :00, so they still fire (once) when ticks were delayed or skipped (stalls, suspend, clock changes)
+
+    second = QtCore.pyqtSignal(object)      # time.struct_time, on ticks not starting a new minute
+    minute = QtCore.pyqtSignal(object)
+    hour = QtCore.pyqtSignal(object)
+    midnight = QtCore.pyqtSignal(object)
+    sunrise = QtCore.pyqtSignal()
+    sunset = QtCore.pyqtSignal()
+
+    def __init__(self, parent=None):
+        QtCore.QObject.__init__(self, parent)
+
+        self.resolution = 1
+        self.due = None
+        self.last = None
+        self.lastTm = None
+        self.sunriseTime = None
+        self.sunsetTime = None
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self.timer.timeout.connect(self.tick)
+
+        self.ticks = 0
+        self.earlyWakes = 0
+        self.lastJitter = 0.0
+        self.totalJitter = 0.0
+        self.maxJitter = 0.0
+        self.missed = 0
+        self.catchups = 0
+        wmetrics.register("Time engine", self.stats)
+
+    def start(self):
+        self.last = time.time()
+        self.lastTm = time.localtime(self.last)
+        self.arm(self.last)
+
+    def stop(self):
+        self.timer.stop()
+        self.due = None
+
+    def isActive(self):
+        return self.timer.isActive()
+
+    def setResolution(self, seconds):
+        # 1: tick every second. 60: tick only at the beginning of each minute (e.g. separator doesn't blink)
+        self.resolution = seconds
+        if self.timer.isActive():
+            self.arm(time.time())
+
+    def setSunTimes(self, sunrise, sunset):
+        # Epoch times. Events fire when a tick crosses them
+        self.sunriseTime = sunrise
+        self.sunsetTime = sunset
+
+    def arm(self, now):
+        self.due = (math.floor(now / self.resolution) + 1) * self.resolution
+        self.timer.start(max(0, math.ceil((self.due - now) * 1000)))
+
+    def tick(self):
+
+        now = time.time()
+        if now < self.due:
+            if self.due - now > self.resolution:
+                # Wall clock was set back: align to it again
+                self.arm(now)
+            else:
+                # Timers may fire some milliseconds early
+                self.earlyWakes += 1
+                self.timer.start(max(1, math.ceil((self.due - now) * 1000)))
+            return
+
+        jitter = (now - self.due) * 1000
+        self.ticks += 1
+        self.lastJitter = jitter
+        self.totalJitter += jitter
+        self.maxJitter = max(self.maxJitter, jitter)
+        skipped = int(now // self.resolution - self.due // self.resolution)
+        if skipped > 0:
+            self.missed += skipped
+            self.catchups += 1
+
+        last = self.last
+        lastTm = self.lastTm
+        self.last = now
+        self.lastTm = tm = time.localtime(now)
+        # Re-armed before emitting, so time spent by receivers doesn't delay next tick
+        self.arm(now)
+
+        if self.sunriseTime is not None and last < self.sunriseTime <= now:
+            self.sunrise.emit()
+        if self.sunsetTime is not None and last < self.sunsetTime <= now:
+            self.sunset.emit()
+
+        newDay = (tm.tm_year, tm.tm_yday) != (lastTm.tm_year, lastTm.tm_yday)
+        if newDay or (tm.tm_hour, tm.tm_min) != (lastTm.tm_hour, lastTm.tm_min):
+            if newDay:
+                self.midnight.emit(tm)
+            if newDay or tm.tm_hour != lastTm.tm_hour:
+                self.hour.emit(tm)
+            self.minute.emit(tm)
+        else:
+            self.second.emit(tm)
+
+    def stats(self):
+        return {"resolution_secs": self.resolution,
+                "ticks": self.ticks,
+                "last_jitter_ms": self.lastJitter,
+                "mean_jitter_ms": self.totalJitter / self.ticks if self.ticks else 0.0,
+                "max_jitter_ms": self.maxJitter,
+                "early_wakes": self.earlyWakes,
+                "catchups": self.catchups,
+                "missed_ticks": self.missed}
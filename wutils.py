@@ -1,12 +1,12 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import json
 import time
 import datetime
 import math
 import decimal
-import urllib.request
+
+import wnet
 
 
 def convert_weather_code(code):
@@ -139,12 +139,11 @@ def convert_win_direction(code, lang):
     return direction[lang][(value % 16)]
 
 
-def get_coordinates(url):
+def get_coordinates(url, timeout=None):
 
     coordinates = []
     try:
-        with urllib.request.urlopen(url) as data:
-            resp = json.loads(data.read().decode('utf8'))
+        resp = wnet.session.get_json(url, timeout)
 
         for i in range(20):
             try:
@@ -157,12 +156,11 @@ def get_coordinates(url):
     return coordinates
 
 
-def get_location_by_ip(url):
+def get_location_by_ip(url, timeout=None):
 
     ret = []
     try:
-        with urllib.request.urlopen(url) as data:
-            resp = json.loads((data.read().decode('utf8')))
+        resp = wnet.session.get_json(url, timeout)
 
         if resp["status"] == "success":
             ret = [resp["city"], resp["regionName"], resp["country"], resp["lat"], resp["lon"]]
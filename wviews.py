@@ -0,0 +1,102 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+
+class View:
+    # Read-only snapshot of the data shown in one screen section. UpdateData builds a new one on each parse and shares it
+    # with the Window as is (never copied, merged or modified), so it's replaced as a whole, and compared by its fields
+    # to find what must be repainted
+
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError("%s got unexpected fields: %s" % (type(self).__name__, ", ".join(fields)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("%s is read-only" % type(self).__name__)
+
+    def __delattr__(self, name):
+        raise AttributeError("%s is read-only" % type(self).__name__)
+
+    def values(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return other is self or (type(other) is type(self) and self.values() == other.values())
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.values())
+
+    def __repr__(self):
+        return "%s(%s)" % (type(self).__name__, ", ".join("%s=%r" % (name, getattr(self, name)) for name in self.__slots__))
+
+    def changes(self, prev):
+        # Names of the fields which differ from previous snapshot (all of them if there is none)
+        if prev is None or type(prev) is not type(self):
+            return self.__slots__
+        if prev is self:
+            return ()
+        return tuple(name for name in self.__slots__ if getattr(self, name) != getattr(prev, name))
+
+
+class Background(View):
+    __slots__ = ("bkg",)
+
+
+class Header(View):
+    __slots__ = ("day_week", "month", "day", "source", "by", "location")
+
+
+class Moon(View):
+    # No icon if moon phase is not shown
+    __slots__ = ("icon", "size")
+
+
+class Sunsign(View):
+    __slots__ = ("icon", "size")
+
+
+class Separator(View):
+    __slots__ = ("sep", "alpha")
+
+
+class Time(View):
+    __slots__ = ("hour", "minutes")
+
+
+class CurrentConditions(View):
+    # No moon_icon if weather icon is not mixed with a moon one (at night)
+    __slots__ = ("icon", "folder", "size", "moon_icon", "moon_size", "temp", "temp_text", "updated",
+                 "other_conds_1", "other_conds_2")
+
+
+class Alert(View):
+    # No text if there is no alert
+    __slots__ = ("text", "color", "icon", "icon_size")
+
+
+class DailyForecast(View):
+    __slots__ = ("day", "icon", "icon_size", "max", "min", "pop", "pop_color")
+
+
+class HourlyForecast(View):
+    # No icon if same as previous hour, and time only every other hour
+    __slots__ = ("temp", "icon", "icon_size", "time")
+
+
+class News(View):
+    # Either the titles to show, or stop
+    __slots__ = ("nsource", "titles", "stop")
+
+
+class Result(View):
+    # Outcome of a fetch done in a worker thread: already parsed data, or the error (traceback text). It's handed over
+    # by reference (signals are typed as object, so PyQt doesn't convert it to and from a QVariant), so the sender
+    # must not keep nor modify data once sent. "sent" is the perf_counter() time of sending, to measure delivery
+    __slots__ = ("data", "error", "sent")